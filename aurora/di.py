@@ -32,7 +32,7 @@
 import collections
 
 __all__ = ['Dependency', 'list', 'dict', 'Reference', 'Value', 'inject',
-           'create_descriptor']
+           'Descriptor', 'create_descriptor']
 
 
 class Dependency:
@@ -152,28 +152,38 @@ def inject(target_factory: collections.Callable, container: object, *arg_spec, *
     return target
 
 
+class Descriptor:
+    """ Descriptor that produce target by injecting its dependencies.
+
+    Instances are created using :func:`create_descriptor`, the class is
+    public to allow recognizing DI provided attributes of a container.
+    """
+
+    def __init__(self, target_factory: collections.Callable, arg_spec: tuple,
+                 attr_spec: dict):
+        self.target_factory = target_factory
+        self.arg_spec = arg_spec
+        self.attr_spec = attr_spec
+        self.cache = {}
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return self.cache[instance]
+        except KeyError:
+            # keep the first target built if it is built concurrently
+            return self.cache.setdefault(instance, inject(
+                self.target_factory, instance, *self.arg_spec,
+                **self.attr_spec))
+
+
 def create_descriptor(target_factory: collections.Callable, *arg_spec,
-                      **attr_spec):
+                      **attr_spec) -> Descriptor:
     """ Create a descriptor that produce target by injecting its dependencies.
 
     This function produce a descriptor object that create a target object
     the first time the attribute is accessed for every class instance. It use
     the class instance as DI container.
     """
-
-    class Descriptor:
-
-        def __init__(self):
-            self.cache = {}
-
-        def __get__(self, instance, owner):
-            if instance is None:
-                return self
-            try:
-                return self.cache[instance]
-            except KeyError:
-                self.cache[instance] = inject(target_factory, instance,
-                                              *arg_spec, **attr_spec)
-                return self.cache[instance]
-
-    return Descriptor()
+    return Descriptor(target_factory, arg_spec, attr_spec)
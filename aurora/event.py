@@ -27,6 +27,8 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
 # EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import inspect
+
 __all__ = ['Event']
 
 
@@ -37,9 +39,27 @@ class Event(list):
     of callable objects previously registered as listeners. The event
     implement the :class:`list` interface and you can use it to register and
     un-register event listeners.
+
+    Listeners can be coroutine functions. Once a listener return an
+    awaitable object the call return a coroutine that await it and notify
+    the remaining listeners in order (awaiting them if needed), otherwise
+    the call return `None`.
     """
 
     #noinspection PyCallingNonCallable
     def __call__(self, *args, **kwargs):
-        for listener in self:
-            listener(*args, **kwargs)
+        for i, listener in enumerate(self):
+            result = listener(*args, **kwargs)
+
+            if inspect.isawaitable(result):
+                return self._notify_async(result, self[i + 1:], args, kwargs)
+
+    @staticmethod
+    async def _notify_async(awaitable, listeners, args, kwargs):
+        await awaitable
+
+        for listener in listeners:
+            result = listener(*args, **kwargs)
+
+            if inspect.isawaitable(result):
+                await result
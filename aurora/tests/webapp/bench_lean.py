@@ -0,0 +1,169 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+""" Benchmarks for the Web request and response implementations.
+
+The per Web request overhead of the default WebOb based pair and the
+:mod:`aurora.webapp.lean` pair is measured calling the WSGI application of
+an Aurora Web application directly (no server involved) for a few
+scenarios: a not mapped path, a mapped path and a mapped path reading the
+query string and cookies::
+
+    python -m aurora.tests.webapp.bench_lean -o results.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import aurora
+from aurora.webapp import foundation, infrastructure, lean, mapping
+
+__all__ = ['IMPLEMENTATIONS', 'SCENARIOS', 'application', 'measure', 'run',
+           'main']
+
+IMPLEMENTATIONS = {
+    'webob': foundation.Request,
+    'lean': lean.Request,
+}
+
+SCENARIOS = {
+    'not_found': ('/nowhere', ''),
+    'hello': ('/hello', ''),
+    'params': ('/params', 'q=aurora&page=2'),
+}
+
+
+def application() -> infrastructure.Application:
+    """ Build the Web application used by every scenario.
+    """
+    def hello(request):
+        return request.response_factory(text='Hello world!')
+
+    def params(request):
+        return request.response_factory(text='%s %s %s' % (
+            request.GET.get('q'), request.GET.get('page'),
+            request.cookies.get('session')))
+
+    app = infrastructure.Application()
+    app.mapper.add_rule(mapping.Route('/hello'), _handler=hello)
+    app.mapper.add_rule(mapping.Route('/params'), _handler=params)
+
+    return app
+
+
+def _environ(path: str, query: str) -> dict:
+    return {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '8008',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost:8008',
+        'HTTP_COOKIE': 'session=0123456789abcdef; theme=dark',
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': None,
+    }
+
+
+def measure(request_factory, path: str, query: str, count: int) -> float:
+    """ Return the mean seconds spent per Web request.
+    """
+    wsgi_app = foundation.wsgi(application(), request_factory=request_factory)
+
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    # exclude the first Web request lazy setup
+    b''.join(wsgi_app(_environ(path, query), start_response))
+
+    start = time.perf_counter()
+    for i in range(count):
+        b''.join(wsgi_app(_environ(path, query), start_response))
+
+    return (time.perf_counter() - start) / count
+
+
+def run(implementations=IMPLEMENTATIONS, scenarios=SCENARIOS,
+        count=20000) -> list:
+    """ Run the benchmarks and return a list of result dictionaries.
+    """
+    results = []
+    for scenario, (path, query) in scenarios.items():
+        for name, request_factory in implementations.items():
+            results.append({
+                'scenario': scenario,
+                'implementation': name,
+                'us_per_request': measure(request_factory, path, query,
+                                          count) * 1e6,
+            })
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the Web request and response implementations.')
+    parser.add_argument('-n', '--count', type=int, default=20000,
+                        help='Web requests per benchmark')
+    parser.add_argument('-o', '--output', help='JSON results file')
+    args = parser.parse_args(argv)
+
+    results = run(count=args.count)
+
+    line = '{:<12} {:<8} {:>10} {:>8}'
+    print(line.format('scenario', 'pair', 'us/req', 'speedup'))
+    baseline = {}
+    for result in results:
+        if result['implementation'] == 'webob':
+            baseline[result['scenario']] = result['us_per_request']
+
+        print(line.format(
+            result['scenario'], result['implementation'],
+            '%.2f' % result['us_per_request'],
+            '%.2fx' % (baseline[result['scenario']] /
+                       result['us_per_request'])))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'aurora': aurora.version,
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'results': results,
+            }, file, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
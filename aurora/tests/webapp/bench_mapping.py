@@ -0,0 +1,301 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+""" Benchmarks for the Web request path mapping components.
+
+Route tables of increasing size are built with a mix of static and dynamic
+:class:`~aurora.webapp.mapping.Route` objects and the
+:class:`~aurora.webapp.mapping.Mapper` ``match`` and ``assemble`` services
+are measured for every available engine. A table built the way the
+blogpress example application does it is measured too.
+
+Results are printed and optionally written as JSON, a previous JSON
+results file can be used as baseline to detect regressions::
+
+    python -m aurora.tests.webapp.bench_mapping -o results.json
+    python -m aurora.tests.webapp.bench_mapping -c results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import aurora
+from aurora.webapp import mapping
+from aurora.webcomponents import assets
+
+__all__ = ['ENGINES', 'synthetic_table', 'blogpress_table', 'measure', 'run',
+           'compare', 'main']
+
+ENGINES = {
+    'linear': None,
+    'trie': mapping.TrieEngine,
+    'regex': mapping.RegexEngine,
+}
+
+SIZES = (10, 100, 1000, 10000)
+
+
+def synthetic_table(size: int, engine_factory=None, fallback=True) -> tuple:
+    """ Build a mapper with `size` routes mixing static and dynamic patterns.
+
+    :param size: The number of routes.
+    :param engine_factory: The mapper engine factory.
+    :param fallback: Whether a :class:`~aurora.webapp.mapping.DefaultRule`
+        is added first (like :class:`aurora.webapp.Application` does).
+    :return: The mapper and the lists of hit paths and assemble
+        characteristics.
+    """
+    mapper = mapping.Mapper(engine_factory)
+
+    if fallback:
+        mapper.add_rule(mapping.DefaultRule(), _handler='not_found')
+
+    paths = []
+    characteristics = []
+    for i in range(size):
+        kind = i % 4
+        handler = 'h%d' % i
+
+        if kind == 0:
+            mapper.add_rule(mapping.Route('/s%d' % i), _handler=handler)
+            paths.append('/s%d' % i)
+            characteristics.append({'_handler': handler})
+        elif kind == 1:
+            mapper.add_rule(mapping.Route(r'/d%d/(?P<id>\d+)' % i),
+                            _handler=handler)
+            paths.append('/d%d/%d' % (i, i))
+            characteristics.append({'_handler': handler, 'id': i})
+        elif kind == 2:
+            mapper.add_rule(
+                mapping.Route(r'/d%d/(?P<id>\d+)/(?P<slug>\w+)' % i),
+                _handler=handler)
+            paths.append('/d%d/%d/post' % (i, i))
+            characteristics.append(
+                {'_handler': handler, 'id': i, 'slug': 'post'})
+        else:
+            mapper.add_rule(mapping.Route(r'/p%d-(?P<id>\d+)' % i),
+                            _handler=handler)
+            paths.append('/p%d-%d' % (i, i))
+            characteristics.append({'_handler': handler, 'id': i})
+
+    return mapper, paths, characteristics
+
+
+def blogpress_table(engine_factory=None) -> tuple:
+    """ Build a mapper the way the blogpress example application does it.
+
+    The assets rule serve the files of the Aurora package folder.
+    """
+    mapper = mapping.Mapper(engine_factory)
+    mapper.add_rule(mapping.DefaultRule(), _handler='not_found')
+
+    _assets = assets.Assets()
+    _assets.add_path(os.path.dirname(aurora.__file__))
+    mapper.add_rule(_assets.rule_factory())
+
+    mapper.add_rule(mapping.Route('/'), _handler='list_posts')
+    mapper.add_rule(mapping.Route(r'/(?P<id>\d+)'), _handler='show_post')
+    mapper.add_rule(mapping.Route('/compose'), _handler='compose_post')
+
+    paths = ['/', '/1', '/compose', '/event.py']
+    characteristics = [
+        {'_handler': 'list_posts'},
+        {'_handler': 'show_post', 'id': '1'},
+        {'_handler': 'compose_post'},
+        {'filename': '/event.py'},
+    ]
+
+    return mapper, paths, characteristics
+
+
+def measure(operation, arguments: list, samples: int) -> dict:
+    """ Measure the latency of calls to `operation`.
+
+    :param operation: A callable taking one of `arguments` items.
+    :param arguments: The list of arguments used round robin.
+    :param samples: The number of calls measured.
+    :return: Throughput and latency percentiles (microseconds) mapping.
+    """
+    timer = time.perf_counter
+    latencies = []
+
+    # warm up lazily built structures (engines, indexes, caches)
+    operation(arguments[0])
+
+    count = len(arguments)
+    for i in range(samples):
+        argument = arguments[i % count]
+        start = timer()
+        operation(argument)
+        latencies.append(timer() - start)
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(int(p / 100 * samples), samples - 1)] * 1e6
+
+    return {
+        'samples': samples,
+        'ops_per_sec': samples / sum(latencies),
+        'p50_us': percentile(50),
+        'p90_us': percentile(90),
+        'p99_us': percentile(99),
+        'max_us': latencies[-1] * 1e6,
+    }
+
+
+def run(sizes=SIZES, engines=ENGINES, samples=2000, seed=0) -> list:
+    """ Run all benchmarks and return the list of results.
+    """
+    rnd = random.Random(seed)
+    results = []
+
+    def record(table, engine, operation, scenario, operation_callable,
+               arguments):
+        result = {
+            'table': table,
+            'engine': engine,
+            'operation': operation,
+            'scenario': scenario,
+        }
+        result.update(measure(operation_callable, arguments, samples))
+        results.append(result)
+
+    for engine, engine_factory in sorted(engines.items()):
+        tables = [('blogpress', blogpress_table(engine_factory),
+                   blogpress_table(engine_factory)[0])]
+        for size in sizes:
+            table = synthetic_table(size, engine_factory)
+            tables.append(('synthetic-%d' % size, table,
+                           synthetic_table(size, engine_factory, False)[0]))
+
+        for name, (mapper, paths, characteristics), bare_mapper in tables:
+            paths = [rnd.choice(paths) for i in range(samples)]
+            characteristics = [
+                rnd.choice(characteristics) for i in range(samples)]
+
+            record(name, engine, 'match', 'hit', mapper.match, paths)
+            record(name, engine, 'match', 'miss', bare_mapper.match,
+                   ['/missing/path/%d' % i for i in range(samples)])
+            record(name, engine, 'match', 'fallback', mapper.match,
+                   ['/missing/path/%d' % i for i in range(samples)])
+            record(name, engine, 'assemble', 'hit',
+                   lambda item: mapper.assemble(**item), characteristics)
+            record(name, engine, 'assemble', 'miss',
+                   lambda item: mapper.assemble(**item),
+                   [{'_handler': 'missing', 'id': i} for i in range(samples)])
+
+    return results
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """ Compare results against a baseline and return the regressions.
+
+    A regression is a result whose throughput is lower than the baseline
+    one by more than the `tolerance` fraction.
+    """
+    def key(result):
+        return (result['table'], result['engine'], result['operation'],
+                result['scenario'])
+
+    baseline = dict((key(result), result) for result in baseline)
+
+    regressions = []
+    for result in results:
+        try:
+            reference = baseline[key(result)]
+        except KeyError:
+            continue
+
+        ratio = result['ops_per_sec'] / reference['ops_per_sec']
+        if ratio < 1 - tolerance:
+            regressions.append((result, reference, ratio))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the Web request path mapping components.')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=SIZES,
+                        help='route table sizes')
+    parser.add_argument('-e', '--engines', nargs='+', default=sorted(ENGINES),
+                        choices=sorted(ENGINES), help='mapper engines')
+    parser.add_argument('-n', '--samples', type=int, default=2000,
+                        help='measured calls per benchmark')
+    parser.add_argument('-o', '--output', help='JSON results file')
+    parser.add_argument('-c', '--compare', help='JSON baseline results file')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.2,
+                        help='allowed throughput loss against the baseline')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes,
+                  dict((name, ENGINES[name]) for name in args.engines),
+                  args.samples)
+
+    line = '{:<16} {:<7} {:<9} {:<9} {:>12} {:>9} {:>9} {:>9}'
+    print(line.format('table', 'engine', 'operation', 'scenario', 'ops/s',
+                      'p50 us', 'p90 us', 'p99 us'))
+    for result in results:
+        print(line.format(
+            result['table'], result['engine'], result['operation'],
+            result['scenario'], '%.0f' % result['ops_per_sec'],
+            '%.2f' % result['p50_us'], '%.2f' % result['p90_us'],
+            '%.2f' % result['p99_us']))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'aurora': aurora.version,
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'results': results,
+            }, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)['results']
+
+        regressions = compare(results, baseline, args.tolerance)
+        for result, reference, ratio in regressions:
+            print('regression: {table} {engine} {operation} {scenario} '
+                  '{0:.0%} of baseline throughput'.format(ratio, **result))
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+""" Benchmarks for the multi-threaded WSGI server.
+
+An Aurora Web application whose handler simulate some I/O wait is served
+by :mod:`wsgiref.simple_server` and by :class:`aurora.webapp.server.Server`
+and both are loaded by concurrent clients using persistent connections
+(simple_server close the connection after every Web request)::
+
+    python -m aurora.tests.webapp.bench_server -c 16 -o results.json
+"""
+
+import argparse
+import http.client
+import json
+import platform
+import socketserver
+import sys
+import threading
+import time
+from wsgiref import simple_server
+
+import aurora
+from aurora.webapp import foundation, infrastructure, mapping, server
+
+__all__ = ['application', 'SERVERS', 'measure', 'run', 'main']
+
+
+def application(delay: float):
+    """ Build a WSGI application that wait `delay` seconds per Web request.
+    """
+    def handler(request):
+        if delay:
+            time.sleep(delay)
+        return request.response_factory(text='Hello world!')
+
+    handler_app = infrastructure.Application()
+    handler_app.mapper.add_rule(mapping.Route('/'), _handler=handler)
+
+    return foundation.wsgi(handler_app)
+
+
+class _QuietHandler(simple_server.WSGIRequestHandler):
+
+    def log_request(self, *args):
+        pass
+
+
+class _ThreadingWSGIServer(socketserver.ThreadingMixIn,
+                           simple_server.WSGIServer):
+    daemon_threads = True
+
+
+def _simple_server(app, threads):
+    httpd = simple_server.make_server('127.0.0.1', 0, app,
+                                      handler_class=_QuietHandler)
+    return httpd, httpd.shutdown
+
+
+def _threading_simple_server(app, threads):
+    httpd = simple_server.make_server('127.0.0.1', 0, app,
+                                      server_class=_ThreadingWSGIServer,
+                                      handler_class=_QuietHandler)
+    return httpd, httpd.shutdown
+
+
+def _aurora_server(app, threads):
+    httpd = server.Server(('127.0.0.1', 0), app, threads=threads)
+    return httpd, httpd.stop
+
+
+SERVERS = {
+    'simple_server': _simple_server,
+    'threading_simple_server': _threading_simple_server,
+    'aurora': _aurora_server,
+}
+
+
+def measure(factory, app, clients: int, duration: float,
+            threads: int) -> dict:
+    """ Load a server with `clients` concurrent clients for `duration`.
+    """
+    httpd, stop = factory(app, threads)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.start()
+
+    port = httpd.server_address[1]
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + duration
+
+    def client():
+        connection = None
+        while time.perf_counter() < deadline:
+            if connection is None:
+                connection = http.client.HTTPConnection('127.0.0.1', port,
+                                                        timeout=10)
+            start = time.perf_counter()
+            try:
+                connection.request('GET', '/')
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors.append(1)
+                connection.close()
+                connection = None
+                continue
+
+            latencies.append(time.perf_counter() - start)
+            if response.will_close:
+                connection.close()
+                connection = None
+
+        if connection is not None:
+            connection.close()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=client) for i in range(clients)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    stop()
+    thread.join()
+
+    latencies.sort()
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1,
+                             int(len(latencies) * p))] * 1e3
+
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'requests_per_sec': len(latencies) / elapsed,
+        'p50_ms': percentile(0.5),
+        'p99_ms': percentile(0.99),
+    }
+
+
+def run(servers=SERVERS, clients=(1, 16), delay=0.005, duration=3.0,
+        threads=16) -> list:
+    """ Run the benchmarks and return a list of result dictionaries.
+    """
+    app = application(delay)
+    results = []
+    for name, factory in servers.items():
+        for count in clients:
+            result = measure(factory, app, count, duration, threads)
+            result.update(server=name, clients=count, delay_ms=delay * 1e3)
+            results.append(result)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the multi-threaded WSGI server.')
+    parser.add_argument('-s', '--servers', nargs='+', default=list(SERVERS),
+                        choices=list(SERVERS), help='servers')
+    parser.add_argument('-c', '--clients', type=int, nargs='+',
+                        default=(1, 16), help='concurrent clients')
+    parser.add_argument('-d', '--delay', type=float, default=0.005,
+                        help='seconds the handler wait per Web request')
+    parser.add_argument('-D', '--duration', type=float, default=3.0,
+                        help='seconds every benchmark last')
+    parser.add_argument('-T', '--threads', type=int, default=16,
+                        help='aurora server worker threads')
+    parser.add_argument('-o', '--output', help='JSON results file')
+    args = parser.parse_args(argv)
+
+    results = run(dict((name, SERVERS[name]) for name in args.servers),
+                  args.clients, args.delay, args.duration, args.threads)
+
+    line = '{:<24} {:>7} {:>10} {:>8} {:>8} {:>7}'
+    print(line.format('server', 'clients', 'req/s', 'p50 ms', 'p99 ms',
+                      'errors'))
+    for result in results:
+        print(line.format(
+            result['server'], result['clients'],
+            '%.0f' % result['requests_per_sec'], '%.2f' % result['p50_ms'],
+            '%.2f' % result['p99_ms'], result['errors']))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'aurora': aurora.version,
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'results': results,
+            }, file, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import json
+import threading
+import time
+import unittest
+from aurora.webapp import admission, foundation, infrastructure, mapping
+
+__all__ = ['TestAdmissionControl']
+
+
+class TestAdmissionControl(unittest.TestCase):
+    """ Tests for the Web request admission control.
+    """
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+
+        self.application = infrastructure.Application()
+        self.application.mapper.add_rule(mapping.Route('/'),
+                                         _handler=self.wait)
+        self.application.mapper.add_rule(mapping.Route('/search'),
+                                         _handler=self.search,
+                                         _concurrency=1)
+        self.application.mapper.add_rule(mapping.Route('/fast'),
+                                         _handler=self.fast)
+
+    def wait(self, request):
+        self.started.release()
+        self.release.wait(5)
+        return request.response_factory(text='done')
+
+    def search(self, request):
+        return self.wait(request)
+
+    def fast(self, request):
+        return request.response_factory(text=repr(request.characteristics))
+
+    def call(self, path, responses):
+        responses.append(self.application(foundation.Request.blank(path)))
+
+    def start(self, path, responses, count=1):
+        threads = [threading.Thread(target=self.call, args=(path, responses))
+                   for i in range(count)]
+        for thread in threads:
+            thread.start()
+
+        self.addCleanup(self.join, threads)
+        return threads
+
+    def join(self, threads):
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+
+    def test_reject(self):
+        control = self.application.admission = admission.AdmissionControl(
+            limit=2, retry_after=3)
+
+        responses = []
+        threads = self.start('/', responses, 2)
+        for i in range(2):
+            self.assertTrue(self.started.acquire(timeout=5))
+
+        response = self.application(foundation.Request.blank('/fast'))
+        self.assertEqual(response.status_int, 503)
+        self.assertEqual(response.headers['Retry-After'], '3')
+        self.assertEqual(control.report()['rejected'], 1)
+        self.assertEqual(control.report()['active'], 2)
+
+        self.join(threads)
+        response = self.application(foundation.Request.blank('/fast'))
+        self.assertEqual(response.status_int, 200)
+        self.assertEqual(response.text, '{}')
+
+    def test_queue(self):
+        control = self.application.admission = admission.AdmissionControl(
+            limit=1, queue_size=1, timeout=5)
+
+        responses = []
+        threads = self.start('/', responses)
+        self.assertTrue(self.started.acquire(timeout=5))
+
+        threads += self.start('/fast', responses)
+        while not control.queued:
+            time.sleep(0.001)
+
+        # the queue is full
+        response = self.application(foundation.Request.blank('/fast'))
+        self.assertEqual(response.status_int, 503)
+
+        self.join(threads)
+        self.assertEqual([response.status_int for response in responses],
+                         [200, 200])
+        self.assertEqual(control.report(), {
+            'active': 0, 'queued': 0, 'admitted': 2, 'rejected': 1,
+            'expired': 0, 'handlers': {}})
+
+    def test_deadline(self):
+        control = self.application.admission = admission.AdmissionControl(
+            limit=1, queue_size=1, timeout=0.01)
+
+        self.start('/', [])
+        self.assertTrue(self.started.acquire(timeout=5))
+
+        response = self.application(foundation.Request.blank('/fast'))
+        self.assertEqual(response.status_int, 503)
+        self.assertEqual(control.expired, 1)
+        self.assertEqual(control.queued, 0)
+
+    def test_handler_limit(self):
+        control = self.application.admission = admission.AdmissionControl()
+
+        self.start('/search', [])
+        self.assertTrue(self.started.acquire(timeout=5))
+
+        self.assertEqual(control.report()['handlers'],
+                         {'TestAdmissionControl.search': 1})
+        self.assertEqual(self.application(
+            foundation.Request.blank('/search')).status_int, 503)
+        self.assertEqual(self.application(
+            foundation.Request.blank('/fast')).status_int, 200)
+
+        self.assertEqual(self.application.url_for(_handler=self.search),
+                         'http://localhost/search')
+
+    def test_stream(self):
+        """ Test streamed bodies keep the slot until they are closed.
+        """
+        def stream(request):
+            response = request.response_factory()
+            response.app_iter = iter([b'rendered'])
+            return response
+
+        self.application.mapper.add_rule(mapping.Route('/stream'),
+                                         _handler=stream, _concurrency=1)
+        control = self.application.admission = admission.AdmissionControl(
+            limit=1)
+
+        response = self.application(foundation.Request.blank('/stream'))
+        self.assertEqual(control.active, 1)
+        self.assertEqual(self.application(
+            foundation.Request.blank('/fast')).status_int, 503)
+
+        app_iter = response.app_iter
+        self.assertEqual(b''.join(app_iter), b'rendered')
+        self.assertEqual(control.active, 1)
+        app_iter.close()
+
+        self.assertEqual(control.report()['active'], 0)
+        self.assertEqual(control.report()['handlers'], {})
+        self.assertEqual(self.application(
+            foundation.Request.blank('/fast')).status_int, 200)
+
+    def test_error(self):
+        """ Test the slot is released when the handler fails.
+        """
+        def fail(request):
+            raise ValueError()
+
+        self.application.mapper.add_rule(mapping.Route('/fail'),
+                                         _handler=fail)
+        control = self.application.admission = admission.AdmissionControl(
+            limit=1)
+
+        self.assertRaises(ValueError, self.application,
+                          foundation.Request.blank('/fail'))
+        self.assertEqual(control.active, 0)
+
+    def test_handler(self):
+        control = admission.AdmissionControl()
+
+        response = control.handler(foundation.Request.blank('/_admission'))
+        self.assertEqual(response.content_type, 'application/json')
+        self.assertEqual(json.loads(response.text), control.report())
+
+if __name__ == '__main__':
+    unittest.main()
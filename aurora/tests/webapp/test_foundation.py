@@ -0,0 +1,166 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import time
+import unittest
+from aurora.webapp import foundation, infrastructure, mapping
+
+__all__ = ['TestASGI']
+
+
+class TestASGI(unittest.TestCase):
+    """ Tests for the ASGI application adapter.
+    """
+
+    def setUp(self):
+        self.application = infrastructure.Application()
+        self.application.mapper.add_rule(mapping.Route('/sync'),
+                                         _handler=self.sync_handler)
+        self.application.mapper.add_rule(mapping.Route('/async'),
+                                         _handler=self.async_handler)
+
+    def sync_handler(self, request):
+        time.sleep(0.05)
+        return request.response_factory(
+            text=' '.join((request.path_info, request.body.decode())))
+
+    async def async_handler(self, request):
+        await asyncio.sleep(0.05)
+        return request.response_factory(
+            text=' '.join((request.path_info, request.GET['q'])))
+
+    def request(self, asgi_app, path, query=b'', body=b'', method='GET',
+                headers=()):
+        messages = []
+        chunks = [body[:2], body[2:]]
+        self.received = 0
+
+        async def receive():
+            self.received += 1
+            return {'type': 'http.request', 'body': chunks.pop(0),
+                    'more_body': bool(chunks)}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http', 'method': method, 'path': path,
+            'query_string': query,
+            'headers': [(b'host', b'example.com')] + list(headers),
+        }
+
+        async def call():
+            await asgi_app(scope, receive, send)
+            return messages
+
+        return call()
+
+    def test_asgi_dispatch(self):
+        """ Test Web applications served through the `dispatch` service.
+
+        Slow Web requests should be handled concurrently.
+        """
+        asgi_app = foundation.asgi(self.application.dispatch)
+
+        async def run():
+            return await asyncio.gather(*(
+                [self.request(asgi_app, '/async', b'q=%d' % i)
+                 for i in range(50)] +
+                [self.request(asgi_app, '/sync', body=b'body', method='POST')]
+            ))
+
+        start = time.perf_counter()
+        results = asyncio.run(run())
+        self.assertLess(time.perf_counter() - start, 1)
+
+        for i, messages in enumerate(results[:-1]):
+            self.assertEqual(messages[0]['type'], 'http.response.start')
+            self.assertEqual(messages[0]['status'], 200)
+            self.assertEqual(
+                b''.join(message.get('body', b'')
+                         for message in messages[1:]),
+                b'/async %d' % i)
+
+        self.assertEqual(
+            b''.join(message.get('body', b'')
+                     for message in results[-1][1:]),
+            b'/sync body')
+
+    def test_asgi_sync_handler(self):
+        """ Test synchronous Web request handlers served through ASGI.
+        """
+        asgi_app = foundation.asgi(self.application)
+
+        messages = asyncio.run(self.request(asgi_app, '/nowhere'))
+        self.assertEqual(messages[0]['status'], 404)
+
+        messages = asyncio.run(self.request(asgi_app, '/async', b'q=x'))
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertEqual(messages[1]['body'], b'/async x')
+
+    def test_asgi_body_size(self):
+        """ Test Web request bodies are limited as they are received.
+        """
+        asgi_app = foundation.asgi(self.application, max_body_size=4)
+
+        messages = asyncio.run(self.request(asgi_app, '/sync',
+                                            body=b'body', method='POST'))
+        self.assertEqual(messages[1]['body'], b'/sync body')
+
+        messages = asyncio.run(self.request(asgi_app, '/sync',
+                                            body=b'large', method='POST'))
+        self.assertEqual(messages[0]['status'], 413)
+        self.assertEqual(self.received, 2)
+
+        messages = asyncio.run(self.request(
+            asgi_app, '/sync', body=b'large', method='POST',
+            headers=[(b'content-length', b'5')]))
+        self.assertEqual(messages[0]['status'], 413)
+        self.assertEqual(self.received, 0)
+
+    def test_asgi_after_response(self):
+        """ Test scheduled tasks are invoked once the response is sent.
+        """
+        done = []
+
+        def handler(request):
+            request.after_response(done.append, request.path_info)
+            return request.response_factory(text='sent')
+
+        self.application.mapper.add_rule(mapping.Route('/after'),
+                                         _handler=handler)
+
+        messages = asyncio.run(self.request(
+            foundation.asgi(self.application), '/after'))
+        self.assertEqual(messages[1]['body'], b'sent')
+        self.assertEqual(done, ['/after'])
+
+if __name__ == '__main__':
+    unittest.main()
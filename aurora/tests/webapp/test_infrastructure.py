@@ -0,0 +1,245 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import threading
+import time
+import unittest
+from aurora import di, event
+from aurora.webapp import foundation, infrastructure, mapping, metrics, \
+    testing
+from aurora.webcomponents import session
+
+__all__ = ['TestApplication']
+
+
+class TestApplication(testing.TestHandler):
+    """ Tests for the Web application infrastructure.
+    """
+
+    def handler_factory(self):
+        application = infrastructure.Application()
+
+        application.mapper.add_rule(mapping.Route('/'), _handler=self.list)
+        application.mapper.add_rule(mapping.Route(r'/(?P<id>\d+)'),
+                                    _handler=self.show)
+
+        return application
+
+    def request_factory(self, environ):
+        return foundation.Request.blank('/', environ)
+
+    def list(self, request):
+        urls = self.handler.url_for_many(
+            ({'id': str(id)} for id in range(3)), _handler=self.show)
+
+        return request.response_factory(text=' '.join(urls))
+
+    def show(self, request):
+        return request.response_factory(text=request.characteristics['id'])
+
+    async def show_async(self, request):
+        await asyncio.sleep(0)
+        return request.response_factory(text=request.characteristics['id'])
+
+    def echo(self, request):
+        self.session.get_session()['id'] = request.characteristics['id']
+
+        # give other threads the chance to handle its requests
+        time.sleep(0.001)
+
+        if self.handler.get_request() is not request:
+            return request.response_factory(text='wrong request')
+
+        return request.response_factory(text=' '.join((
+            self.handler.url_for(_handler=self.echo, id=request.characteristics['id']),
+            self.session.get_session()['id']
+        )))
+
+    def test_url_for_many(self):
+        """ Test `url_for_many` call produce the `url_for` results.
+        """
+        request = foundation.Request.blank('/', base_url='http://host/app')
+
+        self.assertEqual(
+            self.handler(request).text,
+            ' '.join(self.handler.url_for(_handler=self.show, id=str(id))
+                     for id in range(3))
+        )
+        self.assertEqual(
+            self.handler(request).text,
+            'http://host/0 http://host/1 http://host/2'
+        )
+
+    def test_concurrent_requests(self):
+        """ Test Web requests handled concurrently from multiple threads.
+
+        Every thread should see its own Web request on `get_request` calls
+        and the services depending on it.
+        """
+        self.session = session.SessionProvider('secret',
+                                               self.handler.get_request)
+        self.handler.post_dispatch = self.session.post_dispatch
+        self.handler.mapper.add_rule(mapping.Route('/echo/(?P<id>\d+)'),
+                                     _handler=self.echo)
+
+        errors = []
+
+        def client(thread):
+            for i in range(20):
+                id = str(thread * 100 + i)
+                request = foundation.Request.blank(
+                    '/echo/' + id, base_url='http://host%d' % thread)
+
+                response = self.handler(request)
+
+                expected = 'http://host%d/echo/%s %s' % (thread, id, id)
+                if response.text != expected or \
+                        'aurora-sid' not in response.headers['Set-Cookie']:
+                    errors.append((expected, response.text))
+
+        threads = [threading.Thread(target=client, args=(thread, ))
+                   for thread in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+    def test_async_handler(self):
+        """ Test asynchronous Web request handlers and listeners.
+
+        They should be supported by both, synchronous calls and the
+        `dispatch` service.
+        """
+        self.handler.mapper.add_rule(mapping.Route('/async/(?P<id>\d+)'),
+                                     _handler=self.show_async)
+
+        notified = []
+
+        async def listener(response):
+            await asyncio.sleep(0)
+            notified.append(response.text)
+
+        self.handler.post_dispatch = event.Event(
+            [listener, lambda response: notified.append('sync')])
+
+        response = self.handler(foundation.Request.blank('/async/1'))
+        self.assertEqual(response.text, '1')
+
+        response = asyncio.run(
+            self.handler.dispatch(foundation.Request.blank('/async/2')))
+        self.assertEqual(response.text, '2')
+
+        response = asyncio.run(
+            self.handler.dispatch(foundation.Request.blank('/3')))
+        self.assertEqual(response.text, '3')
+
+        self.assertEqual(notified, ['1', 'sync', '2', 'sync', '3', 'sync'])
+
+    def test_characteristics(self):
+        """ Test characteristics are kept apart from the GET mapping.
+
+        The query string should not be parsed unless the compatibility
+        switch is set.
+        """
+        request = foundation.Request.blank('/1?id=2')
+        self.assertEqual(self.handler(request).text, '1')
+        self.assertEqual(request.characteristics, {'id': '1'})
+        self.assertNotIn('webob._parsed_query_vars', request.environ)
+        self.assertEqual(request.GET['id'], '2')
+
+        self.handler.merge_characteristics = True
+        request = foundation.Request.blank('/1?id=2')
+        self.handler(request)
+        self.assertEqual(request.params['id'], '1')
+
+    def test_metrics(self):
+        """ Test Web request handling phases are timed per handler.
+        """
+        def listener(response):
+            time.sleep(0.01)
+
+        self.handler.metrics = metrics.Metrics()
+        self.handler.post_dispatch = event.Event([listener])
+
+        for path in ('/1', '/2', '/'):
+            self.handler(foundation.Request.blank(path))
+
+        report = self.handler.metrics.report()
+        self.assertEqual(sorted(report), ['TestApplication.list',
+                                          'TestApplication.show'])
+
+        phases = report['TestApplication.show']
+        self.assertEqual(sorted(phases), [
+            'handler', 'match', 'post_dispatch',
+            'post_dispatch:TestApplication.test_metrics.<locals>.listener',
+            'pre_dispatch', 'total'])
+        self.assertEqual(phases['total']['count'], 2)
+        self.assertGreaterEqual(phases['post_dispatch']['min'], 0.01)
+        self.assertGreaterEqual(phases['total']['min'],
+                                phases['post_dispatch']['min'])
+
+        # the dispatch service record the metrics too
+        asyncio.run(self.handler.dispatch(foundation.Request.blank('/3')))
+        phases = self.handler.metrics.report()['TestApplication.show']
+        self.assertEqual(phases['total']['count'], 3)
+        self.assertEqual(phases['handler']['count'], 3)
+
+    def test_warmup(self):
+        """ Test DI provided components are built and warmed up.
+        """
+        built = []
+
+        class Component:
+
+            def __init__(self):
+                built.append(self)
+
+            def warmup(self):
+                self.warm = True
+
+        class Application(infrastructure.Application):
+            component = di.create_descriptor(Component)
+            other = di.create_descriptor(list)
+
+        application = Application()
+        application.warmup()
+
+        self.assertEqual(built, [application.component])
+        self.assertTrue(application.component.warm)
+        self.assertEqual(application.other, [])
+
+        application.freeze()
+        self.assertTrue(application.mapper.frozen)
+        self.assertEqual(built, [application.component])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,322 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from aurora.webapp import foundation, infrastructure, lean, mapping
+from aurora.webcomponents import assets, conditional, session, views
+
+__all__ = ['TestRequest', 'TestResponse', 'TestApplication']
+
+
+class TestRequest(unittest.TestCase):
+    """ Tests for the lightweight Web request.
+    """
+
+    def test_slots(self):
+        request = lean.Request.blank('/')
+        self.assertRaises(AttributeError, setattr, request, 'other', 1)
+
+    def test_path(self):
+        request = lean.Request.blank('/a b/c?x=1', SCRIPT_NAME='/app',
+                                     HTTP_HOST='example.com:8080')
+
+        self.assertEqual(request.path_info, '/a b/c')
+        self.assertEqual(request.path, '/app/a%20b/c')
+        self.assertEqual(request.path_qs, '/app/a%20b/c?x=1')
+        self.assertEqual(request.host_url, 'http://example.com:8080')
+        self.assertEqual(request.application_url,
+                         'http://example.com:8080/app')
+        self.assertEqual(lean.Request.blank('/').application_url,
+                         'http://localhost')
+
+    def test_get(self):
+        request = lean.Request.blank('/?a=1&b=2&a=3&c=')
+
+        self.assertEqual(request.GET['a'], '3')
+        self.assertEqual(request.GET.getall('a'), ['1', '3'])
+        self.assertEqual(request.GET['c'], '')
+        self.assertIs(request.GET, request.GET)
+
+        request.GET.update({'a': '4'})
+        self.assertEqual(request.GET.getall('a'), ['4'])
+
+    def test_post(self):
+        body = b'a=1&b=%C3%A9'
+        request = lean.Request.blank(
+            '/?a=2', REQUEST_METHOD='POST',
+            CONTENT_TYPE='application/x-www-form-urlencoded',
+            CONTENT_LENGTH=str(len(body)))
+        request.environ['wsgi.input'] = io.BytesIO(body + b'extra')
+
+        self.assertEqual(request.POST, {'a': '1', 'b': 'é'})
+        self.assertEqual(request.params['a'], '2')
+        self.assertEqual(request.params.getall('a'), ['1', '2'])
+        self.assertEqual(request.body, body)
+
+        self.assertEqual(lean.Request.blank('/?a=1').POST, {})
+
+    def test_multipart(self):
+        body = (b'--x\r\n'
+                b'Content-Disposition: form-data; name="title"\r\n\r\n'
+                b'Hello\r\n'
+                b'--x\r\n'
+                b'Content-Disposition: form-data; name="file"; '
+                b'filename="a.txt"\r\n'
+                b'Content-Type: text/plain\r\n\r\n'
+                b'content\r\n'
+                b'--x--\r\n')
+        request = lean.Request.blank(
+            '/', REQUEST_METHOD='POST',
+            CONTENT_TYPE='multipart/form-data; boundary=x',
+            CONTENT_LENGTH=str(len(body)))
+        request.environ['wsgi.input'] = io.BytesIO(body)
+
+        self.assertEqual(request.POST['title'], 'Hello')
+        upload = request.POST['file']
+        self.assertEqual(upload.filename, 'a.txt')
+        self.assertEqual(upload.type, 'text/plain')
+        self.assertEqual(upload.value, b'content')
+
+    def test_cookies(self):
+        request = lean.Request.blank(
+            '/', HTTP_COOKIE='a=1; b="two"; broken; c=x=y')
+
+        self.assertEqual(request.cookies, {'a': '1', 'b': 'two', 'c': 'x=y'})
+
+    def test_body_file(self):
+        request = lean.Request.blank('/', CONTENT_LENGTH='4')
+        request.environ['wsgi.input'] = io.BytesIO(b'bodyextra')
+
+        self.assertEqual(request.body_file.read(), b'body')
+        self.assertEqual(request.headers['Content-Length'], '4')
+
+
+class TestResponse(unittest.TestCase):
+    """ Tests for the lightweight Web response.
+    """
+
+    def call(self, response, method='GET'):
+        start = []
+        app_iter = response({'REQUEST_METHOD': method},
+                            lambda status, headers: start.extend(
+                                (status, headers)))
+        return start[0], dict(start[1]), b''.join(app_iter)
+
+    def test_text(self):
+        response = lean.Response(text='é', status='404 Not Found')
+
+        self.assertEqual(response.status_int, 404)
+        self.assertEqual(response.content_type, 'text/html')
+        self.assertEqual(response.content_length, 2)
+        self.assertEqual(self.call(response), (
+            '404 Not Found',
+            {'Content-Type': 'text/html; charset=UTF-8',
+             'Content-Length': '2'},
+            'é'.encode()))
+        self.assertEqual(self.call(response, 'HEAD')[2], b'')
+
+    def test_headers(self):
+        response = lean.Response(status=503)
+        response.headers['Retry-After'] = '1'
+        response.headers['retry-after'] = '2'
+        response.content_type = 'application/octet-stream'
+
+        self.assertEqual(response.status, '503 Service Unavailable')
+        self.assertEqual(response.headers.getall('Retry-After'), ['2'])
+        self.assertEqual(response.headers['Content-Type'],
+                         'application/octet-stream')
+        self.assertNotIn('ETag', response.headers)
+
+        response.content_type = None
+        self.assertNotIn('Content-Type', response.headers)
+        self.assertEqual(response.content_type, '')
+        response.charset = 'latin-1'
+        self.assertNotIn('Content-Type', response.headers)
+
+    def test_app_iter(self):
+        response = lean.Response(app_iter=iter([b'a', b'b']))
+        self.assertIsNone(response.content_length)
+
+        self.assertEqual(response.body, b'ab')
+        self.assertEqual(response.content_length, 2)
+        self.assertEqual(response.app_iter, [b'ab'])
+
+    def test_last_modified(self):
+        modified = datetime.datetime(2012, 5, 1, 10, 30,
+                                     tzinfo=datetime.timezone.utc)
+        response = lean.Response()
+        self.assertIsNone(response.last_modified)
+
+        for value in (modified.replace(tzinfo=None), modified.timestamp(),
+                      'Tue, 01 May 2012 10:30:00 GMT'):
+            response.last_modified = value
+            self.assertEqual(response.headers['Last-Modified'],
+                             'Tue, 01 May 2012 10:30:00 GMT')
+            self.assertEqual(response.last_modified, modified)
+
+        response.last_modified = None
+        self.assertNotIn('Last-Modified', response.headers)
+
+        request = lean.Request.blank(
+            '/', HTTP_IF_MODIFIED_SINCE='Tue, 01 May 2012 10:30:00 GMT')
+        self.assertEqual(request.if_modified_since, modified)
+        self.assertIsNone(lean.Request.blank('/').if_modified_since)
+
+    def test_location(self):
+        response = lean.Response(status=303)
+        response.location = 'http://localhost/post'
+        self.assertEqual(response.headers['Location'],
+                         'http://localhost/post')
+        self.assertEqual(response.location, 'http://localhost/post')
+
+        response.location = None
+        self.assertIsNone(response.location)
+
+    def test_set_cookie(self):
+        response = lean.Response()
+        response.set_cookie('id', 'abc', max_age=60, path='/app',
+                            httponly=True)
+        response.delete_cookie('old')
+
+        self.assertEqual(response.headers.getall('Set-Cookie'), [
+            'id=abc; Max-Age=60; Path=/app; HttpOnly',
+            'old=; Max-Age=0; Path=/'])
+
+
+class TestApplication(unittest.TestCase):
+    """ Tests for Web applications served with the lightweight pair.
+    """
+
+    def setUp(self):
+        self.application = infrastructure.Application()
+        self.application.mapper.add_rule(mapping.Route(r'/(?P<id>\d+)'),
+                                         _handler=self.show)
+
+    def show(self, request):
+        return request.response_factory(text=self.application.url_for(
+            _handler=self.show, id=int(request.characteristics['id']) + 1))
+
+    def call(self, path, **kwargs):
+        start = []
+        wsgi_app = foundation.wsgi(self.application,
+                                   request_factory=lean.Request)
+        result = wsgi_app(lean.Request.blank(path, **kwargs).environ,
+                          lambda status, headers: start.extend(
+                              (status, headers)))
+        try:
+            return start[0], b''.join(result), start[1]
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+    def test_wsgi(self):
+        self.assertEqual(self.call('/1')[:2],
+                         ('200 OK', b'http://localhost/2'))
+        self.assertEqual(self.call('/none')[0], '404 Not Found')
+
+    def test_session(self):
+        sessions = session.SessionProvider('secret',
+                                           self.application.get_request)
+        self.application.post_dispatch = sessions.post_dispatch
+
+        def count(request):
+            data = sessions.get_session()
+            data['count'] = data.get('count', 0) + 1
+            return request.response_factory(text=str(data['count']))
+
+        self.application.mapper.add_rule(mapping.Route('/count'),
+                                         _handler=count)
+
+        status, body, headers = self.call('/count')
+        self.assertEqual(body, b'1')
+        cookie = dict(headers)['Set-Cookie'].partition(';')[0]
+        self.assertTrue(cookie.startswith(sessions.cookie_name + '='))
+
+        status, body, headers = self.call('/count', HTTP_COOKIE=cookie)
+        self.assertEqual(body, b'2')
+        self.assertEqual(dict(headers)['Set-Cookie'].partition(';')[0],
+                         cookie)
+
+    def test_assets(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        with open(os.path.join(path, 'style.css'), 'wb') as file:
+            file.write(b'body {}')
+
+        static = assets.Assets()
+        static.add_path(path)
+        self.application.mapper.add_rule(static.rule_factory('/static'))
+        self.application.post_dispatch = conditional.ConditionalGet(
+            self.application.get_request).post_dispatch
+
+        status, body, headers = self.call('/static/style.css')
+        headers = dict(headers)
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, b'body {}')
+        self.assertEqual(headers['Content-Type'], 'text/css; charset=UTF-8')
+        self.assertEqual(headers['Content-Length'], '7')
+
+        status, body, headers = self.call(
+            '/static/style.css',
+            HTTP_IF_MODIFIED_SINCE=headers['Last-Modified'])
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_views(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        for name in ('page.html.fmt', 'page.unknown.fmt'):
+            with open(os.path.join(path, name), 'w') as file:
+                file.write('<p>{name}</p>')
+
+        def engine(file_name, **context):
+            with open(file_name) as file:
+                return file.read().format(**context)
+
+        pages = views.Views()
+        pages.add_path(path)
+        pages.add_engine(engine, 'fmt')
+
+        # the content type of unknown extensions is the default one
+        for template_name in ('page.html', 'page.unknown'):
+            self.application.mapper.add_rule(
+                mapping.Route('/' + template_name),
+                _handler=pages.handler4template(template_name, name='é'))
+
+            status, body, headers = self.call('/' + template_name)
+            self.assertEqual(body, '<p>é</p>'.encode())
+            self.assertEqual(dict(headers)['Content-Type'],
+                             'text/html; charset=UTF-8')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -30,7 +30,8 @@
 import unittest
 from aurora.webapp import mapping, testing
 
-__all__ = ['TestRoute', 'TestMapper']
+__all__ = ['TestRoute', 'TestMapper', 'TestTrieMapper',
+           'TestRegexMapper', 'TestCachedMapper']
 
 
 class TestRoute(testing.TestRule):
@@ -76,6 +77,20 @@ class TestRoute(testing.TestRule):
             '/2/r2?extra=extra_value'
         )
 
+    def test_assemble_quote_query(self):
+        """ Test that characteristics appended as query are quoted.
+        """
+        self.assertEqual(
+            self.rule.assemble(id=2, extra='a b&c=%'),
+            '/2/name?extra=a+b%26c%3D%25'
+        )
+
+    def test_assemble_literal_percent_sign(self):
+        """ Test `assemble` method call for patterns with a percent sign.
+        """
+        rule = mapping.Route('/100%/(?P<id>\d+)%')
+        self.assertEqual(rule.assemble(id=1), '/100%/1%')
+
 
 class TestMapper(testing.TestRule):
     """ Tests for Web request path mapping mapper.
@@ -108,11 +123,245 @@ class TestMapper(testing.TestRule):
         """
         self.assertDictEqual(self.rule.match('/a'), {'id': 'a', '_name': 'r1'})
 
+    def test_match_static_rule_precedence(self):
+        """ Test precedence between static rules and rules added later.
+        """
+        self.rule.add_rule(mapping.Route('/compose'), _name='compose')
+        self.assertDictEqual(
+            self.rule.match('/compose'), {'_name': 'compose'})
+
+        self.rule.add_rule(mapping.Route('/(?P<id>\w+)'), _name='r3')
+        self.assertDictEqual(
+            self.rule.match('/compose'), {'id': 'compose', '_name': 'r3'})
+
+        self.rule.add_rule(mapping.Route('/compose', x='y'), _name='r4')
+        self.assertDictEqual(
+            self.rule.match('/compose'), {'x': 'y', '_name': 'r4'})
+
     def test_assemble_strip_metadata(self):
         """ Test metadata is stripped from characteristics on `assemble` call.
         """
         self.assertEqual(self.rule.assemble(_name='default'), '/')
         self.assertEqual(self.rule.assemble(_name='r2', id='1'), '/1')
 
+    def test_assemble_indexed_rule_precedence(self):
+        """ Test the precedence of rules indexed by Web request handler.
+
+        Rules without a Web request handler are evaluated in its place
+        respect to the rules indexed by the Web request handler.
+        """
+        handler = 'show'
+
+        self.rule.add_rule(mapping.Route('/h/(?P<id>\d+)'), _handler=handler)
+        self.assertEqual(self.rule.assemble(_handler=handler, id='1'), '/h/1')
+
+        self.rule.add_rule(mapping.Route('/any/(?P<id>\d+)'))
+        self.assertEqual(
+            self.rule.assemble(_handler=handler, id='1'),
+            '/any/1?_handler=show')
+
+        self.rule.add_rule(mapping.Route('/h2/(?P<id>\d+)'), _handler=handler)
+        self.assertEqual(self.rule.assemble(_handler=handler, id='1'), '/h2/1')
+
+    def test_assemble_many(self):
+        """ Test mapper `assemble_many` call produce the `assemble` results.
+        """
+        self.rule.add_rule(mapping.Route('/en/(?P<id>\d+)'), _name='r2',
+                           lang='en')
+
+        values = [{'id': '1'}, {'id': '2', 'lang': 'en'}, {'id': '3'},
+                  {'id': '4', 'extra': 'x'}, {'other': '5'}]
+
+        self.assertEqual(
+            self.rule.assemble_many(values, _name='r2'),
+            [self.rule.assemble(_name='r2', **item) for item in values]
+        )
+        self.assertEqual(
+            self.rule.assemble_many(values, _name='r2'),
+            ['/1', '/en/2', '/3', '/4?extra=x', False]
+        )
+
+    def test_assemble_unhashable_metadata(self):
+        """ Test rules tagged with unhashable metadata values are assembled.
+        """
+        self.rule.add_rule(mapping.Route('/l/(?P<id>\d+)'), _handler=[1])
+
+        self.assertEqual(self.rule.assemble(_handler=[1], id='1'), '/l/1')
+        self.assertEqual(self.rule.assemble(_name='r2', id='1'), '/1')
+
+    def test_annotation_keys(self):
+        """ Test annotation metadata is matched but not required to assemble.
+        """
+        self.rule.add_rule(mapping.Route('/s/(?P<id>\d+)'), _name='search',
+                           _concurrency=2)
+
+        self.assertDictEqual(self.rule.match('/s/1'), {
+            'id': '1', '_name': 'search', '_concurrency': 2})
+        self.assertEqual(self.rule.assemble(_name='search', id='1'), '/s/1')
+        self.assertEqual(
+            self.rule.assemble_many([{'id': '1'}, {'id': '2'}],
+                                    _name='search'),
+            ['/s/1', '/s/2'])
+
+    def test_freeze(self):
+        """ Test a frozen mapper keep mapping and reject new rules.
+        """
+        self.rule.add_rule(mapping.Route('/compose'), _name='compose')
+        self.rule.freeze()
+
+        self.assertTrue(self.rule.frozen)
+        self.assertDictEqual(self.rule.match('/1'), {'id': '1', '_name': 'r2'})
+        self.assertDictEqual(self.rule.match('/compose'),
+                             {'_name': 'compose'})
+        self.assertEqual(self.rule.assemble(_name='r2', id='1'), '/1')
+        self.assertRaises(RuntimeError, self.rule.add_rule,
+                          mapping.Route('/x'), _name='x')
+
+        if self.rule.engine_factory is not None:
+            self.assertIsNotNone(self.rule._engine)
+
+
+
+class TestTrieMapper(TestMapper):
+    """ Tests for Web request path mapping mapper using the trie engine.
+    """
+
+    def rule_factory(self):
+        mapper = super().rule_factory()
+        mapper.engine_factory = mapping.TrieEngine
+
+        return mapper
+
+    def test_match_opaque_rule_precedence(self):
+        """ Test opaque rules keep their precedence respect to indexed rules.
+        """
+        self.rule.add_rule(mapping.DefaultRule(), _name='any')
+        self.rule.add_rule(mapping.Route('/(?P<id>\d+)/view'), _name='r3')
+
+        self.assertDictEqual(self.rule.match('/1'), {'_name': 'any'})
+        self.assertDictEqual(
+            self.rule.match('/1/view'), {'id': '1', '_name': 'r3'})
+
+    def test_match_not_indexed_route(self):
+        """ Test mapper `match` call for routes that can't be indexed.
+        """
+        self.rule.add_rule(mapping.Route('/(?P<n>\d+)/(?P<id>[a-z]+)'),
+                           _name='r3')
+
+        self.assertDictEqual(self.rule.match('/1/abc'),
+                             {'id': 'abc', 'n': '1', '_name': 'r3'})
+        self.assertDictEqual(self.rule.match('/abc'),
+                             {'id': 'abc', '_name': 'r1'})
+
+    def test_match_partially_static_segment(self):
+        """ Test mapper `match` call for segments with static and dynamic parts.
+        """
+        self.rule.add_rule(mapping.Route('/post-(?P<id>\d+)-view'),
+                           _name='r3')
+
+        self.assertDictEqual(
+            self.rule.match('/post-1-view'), {'id': '1', '_name': 'r3'})
+        self.assertFalse(self.rule.match('/post-a-view'))
+
+
+class TestRegexMapper(TestMapper):
+    """ Tests for Web request path mapping mapper using the regex engine.
+    """
+
+    def rule_factory(self):
+        mapper = super().rule_factory()
+        mapper.engine_factory = mapping.RegexEngine
+
+        return mapper
+
+    def test_match_opaque_rule_precedence(self):
+        """ Test opaque rules keep their precedence respect to joined rules.
+        """
+        self.rule.add_rule(mapping.DefaultRule(), _name='any')
+        self.rule.add_rule(mapping.Route('/(?P<id>\d+)/view'), _name='r3')
+
+        self.assertDictEqual(self.rule.match('/1'), {'_name': 'any'})
+        self.assertDictEqual(
+            self.rule.match('/1/view'), {'id': '1', '_name': 'r3'})
+
+    def test_match_position_dependent_route(self):
+        """ Test mapper `match` call for routes that can't be joined.
+        """
+        self.rule.add_rule(mapping.Route('/(?P<id>\d+)/(?P<n>a|b)'),
+                           _name='r3')
+
+        self.assertDictEqual(
+            self.rule.match('/1/b'), {'id': '1', 'n': 'b', '_name': 'r3'})
+        self.assertDictEqual(self.rule.match('/b'), {'id': 'b', '_name': 'r1'})
+
+    def test_match_default_values(self):
+        """ Test route default values are used by the joined rules.
+        """
+        self.rule.add_rule(
+            mapping.Route('/(?P<id>\d+)/(?P<name>\w+)', name='n', x='y'),
+            _name='r3')
+
+        self.assertDictEqual(
+            self.rule.match('/1/a'),
+            {'id': '1', 'name': 'a', 'x': 'y', '_name': 'r3'})
+
+
+class TestCachedMapper(TestMapper):
+    """ Tests for Web request path mapping mapper with a match cache.
+    """
+
+    def rule_factory(self):
+        mapper = super().rule_factory()
+        mapper.cache_size = 2
+
+        return mapper
+
+    def test_match_cached_result_copy(self):
+        """ Test cached results are not affected by changes made by callers.
+        """
+        self.rule.match('/1')['id'] = '2'
+        self.assertDictEqual(self.rule.match('/1'), {'id': '1', '_name': 'r2'})
+
+        del self.rule.match('/1')['id']
+        self.assertDictEqual(self.rule.match('/1'), {'id': '1', '_name': 'r2'})
+
+    def test_match_cache_bounded(self):
+        """ Test the cache size is bounded.
+        """
+        for path in ('/1', '/2', '/3', '/a', '/'):
+            self.rule.match(path)
+
+        self.assertEqual(len(self.rule._cache), 2)
+
+    def test_match_cache_cleared_on_add_rule(self):
+        """ Test the cache is cleared after a rule is added.
+        """
+        self.assertDictEqual(self.rule.match('/1'), {'id': '1', '_name': 'r2'})
+
+        self.rule.add_rule(mapping.Route('/(?P<n>\d+)'), _name='r3')
+        self.assertDictEqual(self.rule.match('/1'), {'n': '1', '_name': 'r3'})
+
+    def test_match_not_cacheable_rule(self):
+        """ Test results produced by evaluating a not cacheable rule.
+        """
+        state = {'/x/y': False}
+
+        class Rule(mapping.DefaultRule):
+            cacheable = False
+
+            def match(self, path):
+                return state.get(path, False) and {}
+
+        self.rule.add_rule(Rule(), _name='state')
+        self.rule.add_rule(mapping.Route('/(?P<id>\d+)/x'), _name='r3')
+
+        self.assertFalse(self.rule.match('/x/y'))
+        state['/x/y'] = True
+        self.assertDictEqual(self.rule.match('/x/y'), {'_name': 'state'})
+
+        self.rule.match('/1/x')
+        self.assertIn('/1/x', self.rule._cache)
+        self.assertNotIn('/x/y', self.rule._cache)
+
 if __name__ == '__main__':
     unittest.main()
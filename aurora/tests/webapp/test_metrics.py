@@ -0,0 +1,97 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import unittest
+from aurora.webapp import foundation, metrics
+
+__all__ = ['TestHistogram', 'TestMetrics']
+
+
+class TestHistogram(unittest.TestCase):
+    """ Tests for the duration histograms.
+    """
+
+    def test_add(self):
+        histogram = metrics.Histogram()
+        self.assertIsNone(histogram.percentile(0.5))
+
+        for value in (0.0000005, 0.001, 0.001, 0.003, 500):
+            histogram.add(value)
+
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.minimum, 0.0000005)
+        self.assertEqual(histogram.maximum, 500)
+        self.assertEqual(sum(histogram.buckets), 5)
+        self.assertEqual(histogram.buckets[0], 1)
+        self.assertEqual(histogram.buckets[-1], 1)
+
+    def test_percentile(self):
+        histogram = metrics.Histogram()
+        for i in range(99):
+            histogram.add(0.001)
+        histogram.add(0.1)
+
+        # within the bucket holding the values
+        self.assertTrue(0.001 <= histogram.percentile(0.5) < 0.002)
+        self.assertTrue(0.001 <= histogram.percentile(0.99) < 0.002)
+        self.assertEqual(histogram.percentile(1), 0.1)
+
+
+class TestMetrics(unittest.TestCase):
+    """ Tests for the Web request timing metrics.
+    """
+
+    def handler(self, request):
+        pass
+
+    def test_record(self):
+        registry = metrics.Metrics()
+        registry.record(self.handler, {'handler': 0.5, 'total': 1})
+        registry.record('TestMetrics.handler', {'handler': 1.5})
+
+        report = registry.report()
+        self.assertEqual(list(report), ['TestMetrics.handler'])
+        self.assertEqual(report['TestMetrics.handler']['handler']['count'], 2)
+        self.assertEqual(report['TestMetrics.handler']['handler']['mean'], 1)
+        self.assertEqual(report['TestMetrics.handler']['total']['max'], 1)
+
+        registry.reset()
+        self.assertEqual(registry.report(), {})
+
+    def test_handler(self):
+        registry = metrics.Metrics()
+        registry.record(self.handler, {'handler': 0.5})
+
+        response = registry.handler(foundation.Request.blank('/_metrics'))
+        self.assertEqual(response.content_type, 'application/json')
+        self.assertEqual(json.loads(response.text), registry.report())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,282 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import io
+import unittest
+from aurora.webapp import foundation, lean, multipart
+
+__all__ = ['TestReader', 'TestParseForm', 'TestRequest']
+
+CONTENT_TYPE = 'multipart/form-data; boundary=----aurora'
+
+
+def body(*parts, preamble=b'') -> bytes:
+    """ Build a multipart body from (headers, content) pairs.
+    """
+    data = [preamble]
+    for headers, content in parts:
+        data.append(b'------aurora\r\n' + headers + b'\r\n' + content +
+                    b'\r\n')
+    data.append(b'------aurora--\r\n')
+
+    return b''.join(data)
+
+
+def field(name: str, value: bytes) -> tuple:
+    return (b'Content-Disposition: form-data; name="%s"\r\n' %
+            name.encode(), value)
+
+
+def upload(name: str, filename: str, content: bytes) -> tuple:
+    return (b'Content-Disposition: form-data; name="%s"; filename="%s"\r\n'
+            b'Content-Type: application/octet-stream\r\n' %
+            (name.encode(), filename.encode()), content)
+
+
+class _Stream(io.BytesIO):
+    """ Body stream recording the bytes read.
+    """
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.consumed = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.consumed += len(data)
+        return data
+
+
+class TestReader(unittest.TestCase):
+    """ Tests for the incremental multipart parser.
+    """
+
+    def parts(self, data: bytes, chunk_size=7) -> list:
+        reader = multipart.Reader(io.BytesIO(data), b'----aurora',
+                                  chunk_size=chunk_size)
+        return [(part.name, part.filename, part.read()) for part in reader]
+
+    def test_parts(self):
+        data = body(field('title', b'Hello\r\n--world'),
+                    upload('file', 'a.bin', b'\x00\r\n------auror\xff'),
+                    field('empty', b''),
+                    preamble=b'ignored preamble\r\n')
+
+        for chunk_size in (1, 7, 65536):
+            self.assertEqual(self.parts(data, chunk_size), [
+                ('title', None, b'Hello\r\n--world'),
+                ('file', 'a.bin', b'\x00\r\n------auror\xff'),
+                ('empty', None, b''),
+            ])
+
+    def test_skip_unread(self):
+        data = body(upload('a', 'a.bin', b'a' * 100), field('b', b'b'))
+        reader = multipart.Reader(io.BytesIO(data), b'----aurora', 8)
+
+        self.assertEqual([part.name for part in reader], ['a', 'b'])
+
+    def test_incremental(self):
+        """ Test parts are produced before the whole body is read.
+        """
+        stream = _Stream(body(upload('a', 'a.bin', b'a' * 100000),
+                              upload('b', 'b.bin', b'b' * 100000)))
+        reader = iter(multipart.Reader(stream, b'----aurora', 4096))
+
+        part = next(reader)
+        chunks = iter(part)
+        self.assertTrue(next(chunks))
+        self.assertLess(stream.consumed, 10000)
+
+        self.assertEqual(next(reader).name, 'b')
+        self.assertLess(stream.consumed, 110000)
+
+    def test_truncated(self):
+        data = body(field('title', b'Hello'))[:-20]
+        self.assertRaises(ValueError, self.parts, data)
+
+    def test_header_size(self):
+        data = body((b'X-Large: ' + b'x' * 100 + b'\r\n', b''))
+        reader = multipart.Reader(io.BytesIO(data), b'----aurora',
+                                  max_header_size=50)
+        self.assertRaises(multipart.BodyTooLarge, list, reader)
+
+    def test_max_size(self):
+        data = body(upload('file', 'a.bin', b'a' * 1000))
+        stream = _Stream(data)
+        reader = multipart.Reader(stream, b'----aurora', 100, max_size=500)
+        self.assertRaises(multipart.BodyTooLarge, list, reader)
+        self.assertLessEqual(stream.consumed, 600)
+
+        reader = multipart.Reader(io.BytesIO(data), b'----aurora',
+                                  max_size=len(data))
+        self.assertEqual([part.read() for part in reader], [b'a' * 1000])
+
+    def test_read_body(self):
+        stream = _Stream(b'a' * 1000)
+        self.assertRaises(multipart.BodyTooLarge, multipart.read_body,
+                          stream, 500, 100)
+        self.assertLessEqual(stream.consumed, 600)
+
+        self.assertEqual(multipart.read_body(io.BytesIO(b'abc'), 3), b'abc')
+        self.assertEqual(multipart.read_body(io.BytesIO(b'abc'), None),
+                         b'abc')
+
+    def test_boundary(self):
+        self.assertEqual(multipart.boundary(CONTENT_TYPE), b'----aurora')
+        self.assertEqual(multipart.boundary(
+            'multipart/form-data; boundary="a b"'), b'a b')
+        self.assertRaises(ValueError, multipart.boundary,
+                          'multipart/form-data')
+
+
+class TestParseForm(unittest.TestCase):
+    """ Tests for the multipart form variables parsing.
+    """
+
+    def test_spool(self):
+        data = body(field('title', 'Olá'.encode()),
+                    upload('small', 's.bin', b's' * 10),
+                    upload('large', 'l.bin', b'l' * 1000))
+
+        items = multipart.parse_form(io.BytesIO(data), CONTENT_TYPE,
+                                     spool_size=100)
+        self.assertEqual(items[0], ('title', 'Olá'))
+
+        small, large = items[1][1], items[2][1]
+        self.assertEqual((small.filename, small.type),
+                         ('s.bin', 'application/octet-stream'))
+        self.assertEqual(small.value, b's' * 10)
+        self.assertFalse(small.file._rolled)
+        self.assertEqual(large.file.tell(), 0)
+        self.assertEqual(large.file.read(), b'l' * 1000)
+        large.file.seek(0)
+        self.assertEqual(large.value, b'l' * 1000)
+        self.assertEqual(b''.join(large), b'l' * 1000)
+        self.assertTrue(large.file._rolled)
+
+    def test_field_size(self):
+        data = body(field('title', b't' * 100))
+        self.assertRaises(multipart.BodyTooLarge, multipart.parse_form,
+                          io.BytesIO(data), CONTENT_TYPE, max_field_size=50)
+
+
+class TestRequest(unittest.TestCase):
+    """ Tests for the Web request form parsing services.
+    """
+
+    factories = (foundation.Request, lean.Request)
+
+    def request(self, factory, data: bytes, content_type=CONTENT_TYPE):
+        request = factory.blank('/?q=1', environ={
+            'REQUEST_METHOD': 'POST',
+            'CONTENT_TYPE': content_type,
+            'CONTENT_LENGTH': str(len(data)),
+            'wsgi.input': io.BytesIO(data),
+        })
+        return request
+
+    def test_post(self):
+        data = body(field('title', b'Hello'), upload('file', 'a.txt', b'a'))
+
+        for factory in self.factories:
+            request = self.request(factory, data)
+
+            self.assertEqual(request.POST['title'], 'Hello')
+            self.assertEqual(request.POST['file'].file.read(), b'a')
+            self.assertEqual(request.POST['file'].value, b'a')
+            self.assertIs(request.POST, request.POST)
+            self.assertEqual(request.params['q'], '1')
+
+    def test_urlencoded(self):
+        for factory in self.factories:
+            request = self.request(factory, b'title=Hello',
+                                   'application/x-www-form-urlencoded')
+            self.assertEqual(request.POST['title'], 'Hello')
+
+    def test_max_body_size(self):
+        data = body(field('title', b't' * 100))
+
+        for factory in self.factories:
+            for content_type in (CONTENT_TYPE,
+                                 'application/x-www-form-urlencoded'):
+                request = self.request(factory, data, content_type)
+                request.environ['wsgi.input'] = _Stream(data)
+                type(request).max_body_size = 50
+                try:
+                    self.assertRaises(multipart.BodyTooLarge,
+                                      getattr, request, 'POST')
+                finally:
+                    del type(request).max_body_size
+
+                # nothing is read
+                self.assertEqual(request.environ['wsgi.input'].consumed, 0)
+
+    def test_input_terminated(self):
+        """ Test bodies of unknown size are limited as they are read.
+        """
+        data = body(field('title', b't' * 100000))
+        urlencoded = b'title=' + b't' * 100000
+
+        for factory in self.factories:
+            for content_type, content in (
+                    (CONTENT_TYPE, data),
+                    ('application/x-www-form-urlencoded', urlencoded)):
+                request = self.request(factory, content, content_type)
+                del request.environ['CONTENT_LENGTH']
+                request.environ['wsgi.input'] = stream = _Stream(content)
+                request.environ['wsgi.input_terminated'] = True
+                type(request).max_body_size = 1000
+                try:
+                    self.assertRaises(multipart.BodyTooLarge,
+                                      getattr, request, 'POST')
+                finally:
+                    del type(request).max_body_size
+
+                self.assertLess(stream.consumed, 100000)
+
+                request = self.request(factory, content, content_type)
+                del request.environ['CONTENT_LENGTH']
+                request.environ['wsgi.input_terminated'] = True
+                self.assertEqual(request.POST['title'], 't' * 100000)
+
+    def test_iter_form(self):
+        data = body(field('title', b'Hello'), upload('file', 'a.txt', b'a'))
+
+        for factory in self.factories:
+            request = self.request(factory, data)
+
+            self.assertEqual([(part.name, b''.join(part))
+                              for part in request.iter_form()],
+                             [('title', b'Hello'), ('file', b'a')])
+            self.assertRaises(RuntimeError, getattr, request, 'POST')
+
+        self.assertRaises(ValueError, self.request(
+            foundation.Request, b'', 'text/plain').iter_form)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from aurora.webapp import foundation, infrastructure, mapping, profiling
+
+__all__ = ['TestProfiler']
+
+
+def _render_chunk(i):
+    return sum(range(i * 1000))
+
+
+class TestProfiler(unittest.TestCase):
+    """ Tests for the sampled Web request profiler.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        self.application = infrastructure.Application()
+        self.application.mapper.add_rule(mapping.Route('/'),
+                                         _handler=self.list)
+        self.application.mapper.add_rule(mapping.Route(r'/(?P<id>\d+)'),
+                                         _handler=self.show)
+
+    def list(self, request):
+        return request.response_factory(text=str(sum(range(1000))))
+
+    def show(self, request):
+        return request.response_factory(text=str(sorted(range(1000))[0]))
+
+    def stream(self, request):
+        def render():
+            for i in range(3):
+                yield str(_render_chunk(i)).encode()
+
+        response = request.response_factory()
+        response.app_iter = render()
+        return response
+
+    def files(self, handler_name):
+        path = os.path.join(self.directory, handler_name)
+        return os.listdir(path) if os.path.isdir(path) else []
+
+    def test_rate(self):
+        for rate in (1, 2, 3, 10):
+            directory = os.path.join(self.directory, str(rate))
+            self.application.profiler = profiling.Profiler(directory,
+                                                           rate=rate)
+            for i in range(60):
+                self.application(foundation.Request.blank('/'))
+
+            self.assertEqual(len(os.listdir(os.path.join(
+                directory, 'TestProfiler.list'))), 60 // rate)
+
+    def test_handlers(self):
+        self.application.profiler = profiling.Profiler(
+            self.directory, rate=0, handlers=['TestProfiler.show'])
+        for path in ('/', '/1', '/', '/2'):
+            self.application(foundation.Request.blank(path))
+
+        self.assertEqual(self.files('TestProfiler.list'), [])
+        self.assertEqual(len(self.files('TestProfiler.show')), 2)
+
+    def test_keep(self):
+        self.application.profiler = profiling.Profiler(self.directory,
+                                                       rate=1, keep=2)
+        for i in range(5):
+            self.application(foundation.Request.blank('/'))
+
+        self.assertEqual(len(self.files('TestProfiler.list')), 2)
+
+    def test_error(self):
+        """ Test the profiler is released when the handler fails.
+        """
+        def fail(request):
+            raise ValueError()
+
+        self.application.mapper.add_rule(mapping.Route('/fail'),
+                                         _handler=fail)
+        profiler = self.application.profiler = profiling.Profiler(
+            self.directory, rate=1)
+
+        with self.assertRaises(ValueError):
+            self.application(foundation.Request.blank('/fail'))
+
+        self.assertIsNotNone(profiler.sample(self.list))
+
+    def test_report(self):
+        self.application.profiler = profiling.Profiler(self.directory, rate=1)
+        for path in ('/', '/', '/1'):
+            self.application(foundation.Request.blank(path))
+
+        report = self.application.profiler.report(limit=5, sort='cumtime')
+        self.assertEqual(sorted(report), ['TestProfiler.list',
+                                          'TestProfiler.show'])
+
+        functions = report['TestProfiler.list']
+        self.assertLessEqual(len(functions), 5)
+        self.assertEqual(functions[0]['samples'], 2)
+        self.assertEqual([function['cumtime'] for function in functions],
+                         sorted((function['cumtime']
+                                 for function in functions), reverse=True))
+        self.assertTrue(any('TestProfiler.list' not in function['function']
+                            and 'list' in function['function']
+                            for function in functions))
+
+        response = self.application.profiler.handler(
+            foundation.Request.blank('/_profiles?limit=5&sort=cumtime'))
+        self.assertEqual(response.content_type, 'application/json')
+        self.assertEqual(json.loads(response.text), report)
+
+    def test_stream(self):
+        """ Test streamed bodies are profiled until they are closed.
+        """
+        self.application.mapper.add_rule(mapping.Route('/stream'),
+                                         _handler=self.stream)
+        profiler = self.application.profiler = profiling.Profiler(
+            self.directory, rate=1)
+
+        response = self.application(foundation.Request.blank('/stream'))
+        self.assertEqual(self.files('TestProfiler.stream'), [])
+        self.assertIsNone(profiler.sample(self.list))
+
+        app_iter = response.app_iter
+        self.assertEqual(b''.join(app_iter), b'04995001999000')
+        app_iter.close()
+
+        functions = [function['function'] for function in
+                     profiler.report()['TestProfiler.stream']]
+        self.assertTrue(any('_render_chunk' in function
+                            for function in functions))
+        self.assertIsNotNone(profiler.sample(self.list))
+
+    def test_disabled(self):
+        self.application(foundation.Request.blank('/'))
+        self.assertEqual(os.listdir(self.directory), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,266 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from aurora.webapp import foundation, infrastructure, mapping, server
+
+__all__ = ['PidApplication', 'TestServer', 'TestPrefork']
+
+
+class PidApplication(infrastructure.Application):
+    """ Web application telling the process that handle the Web request.
+    """
+
+    warm = False
+
+    def __init__(self):
+        self.mapper.add_rule(mapping.Route('/'), _handler=self.pid)
+        self.mapper.add_rule(mapping.Route('/crash'), _handler=self.crash)
+
+    def warmup(self):
+        super().warmup()
+        self.warm = True
+
+    def pid(self, request):
+        return request.response_factory(
+            text='%d %s' % (os.getpid(), self.warm))
+
+    def crash(self, request):
+        os._exit(3)
+
+
+class TestServer(unittest.TestCase):
+    """ Tests for the multi-threaded WSGI server.
+    """
+
+    def setUp(self):
+        application = infrastructure.Application()
+        application.mapper.add_rule(mapping.Route('/echo'),
+                                    _handler=self.echo)
+        application.mapper.add_rule(mapping.Route('/stream'),
+                                    _handler=self.stream)
+        application.mapper.add_rule(mapping.Route('/slow'),
+                                    _handler=self.slow)
+        application.mapper.add_rule(mapping.Route('/file'),
+                                    _handler=self.file)
+
+        self.server = server.Server(('127.0.0.1', 0),
+                                    foundation.wsgi(application), threads=2)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.stop(5)
+        self.thread.join()
+
+    def echo(self, request):
+        return request.response_factory(
+            text=' '.join((request.path_info, request.body.decode())))
+
+    def stream(self, request):
+        response = request.response_factory()
+        response.app_iter = iter([b'Hello', b' ', b'world!'])
+        response.content_length = None
+        return response
+
+    def slow(self, request):
+        time.sleep(0.2)
+        return request.response_factory(text='done')
+
+    def file(self, request):
+        file = tempfile.TemporaryFile()
+        file.write(b'0123456789' * 10000)
+        file.seek(int(request.GET.get('offset', 0)))
+
+        response = request.response_factory()
+        response.app_iter = foundation.FileIter(file)
+        if 'length' in request.GET:
+            response.content_length = int(request.GET['length'])
+        return response
+
+    def connection(self):
+        return http.client.HTTPConnection(
+            '127.0.0.1', self.server.server_address[1], timeout=5)
+
+    def test_keep_alive(self):
+        connection = self.connection()
+        for i in range(3):
+            connection.request('POST', '/echo', body=b'body %d' % i)
+            response = connection.getresponse()
+            self.assertEqual(response.read(), b'/echo body %d' % i)
+            self.assertFalse(response.will_close)
+
+        # the chunked request body is decoded by the server
+        connection.request('POST', '/echo', body=iter([b'ab', b'cd']),
+                           encode_chunked=True)
+        self.assertEqual(connection.getresponse().read(), b'/echo abcd')
+
+        connection.request('HEAD', '/echo')
+        response = connection.getresponse()
+        self.assertEqual(response.read(), b'')
+        connection.request('GET', '/missing')
+        self.assertEqual(connection.getresponse().status, 404)
+        connection.close()
+
+    def test_chunked_size(self):
+        connection = self.connection()
+        with mock.patch.object(server.WSGIRequestHandler,
+                               'max_chunked_size', 3):
+            connection.request('POST', '/echo', body=iter([b'ab', b'cd']),
+                               encode_chunked=True)
+            response = connection.getresponse()
+
+        self.assertEqual(response.status, 413)
+        self.assertTrue(response.will_close)
+        connection.close()
+
+    def test_chunked_response(self):
+        connection = self.connection()
+        connection.request('GET', '/stream')
+        response = connection.getresponse()
+        self.assertEqual(response.getheader('Transfer-Encoding'), 'chunked')
+        self.assertEqual(response.read(), b'Hello world!')
+
+        connection.request('GET', '/stream')
+        self.assertEqual(connection.getresponse().read(), b'Hello world!')
+        connection.close()
+
+    def test_sendfile(self):
+        """ Test files are sent by the kernel when its length is known.
+        """
+        connection = self.connection()
+        with mock.patch.object(socket.socket, 'sendfile', autospec=True,
+                               side_effect=socket.socket.sendfile) as sendfile:
+            connection.request('GET', '/file?length=100000')
+            self.assertEqual(connection.getresponse().read(),
+                             b'0123456789' * 10000)
+
+            connection.request('GET', '/file?offset=5&length=10')
+            self.assertEqual(connection.getresponse().read(), b'5678901234')
+
+            connection.request('HEAD', '/file?length=100000')
+            response = connection.getresponse()
+            self.assertEqual(response.getheader('Content-Length'), '100000')
+            self.assertEqual(response.read(), b'')
+
+        self.assertEqual(sendfile.call_count, 2)
+
+        # the length is unknown, the file is read and sent chunked
+        connection.request('GET', '/file')
+        response = connection.getresponse()
+        self.assertEqual(response.getheader('Transfer-Encoding'), 'chunked')
+        self.assertEqual(response.read(), b'0123456789' * 10000)
+        connection.close()
+
+    def test_graceful_stop(self):
+        connection = self.connection()
+        connection.request('GET', '/slow')
+        time.sleep(0.05)
+
+        self.assertTrue(self.server.stop(5))
+        response = connection.getresponse()
+        self.assertEqual(response.read(), b'done')
+        self.assertTrue(response.will_close)
+        connection.close()
+
+        self.assertRaises(OSError, self.connection().request, 'GET', '/echo')
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'requires os.fork')
+class TestPrefork(unittest.TestCase):
+    """ Tests for the pre-forking multi-process WSGI server.
+    """
+
+    def setUp(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+
+        environ = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'aurora.webapp.server',
+             __name__ + ':PidApplication', '--host', '127.0.0.1',
+             '--port', str(self.port), '--workers', '2', '--threads', '2',
+             '--max-requests', '3'],
+            env=environ, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', self.port)).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def tearDown(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.process.stderr.close()
+
+    def request(self, path):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port,
+                                                timeout=5)
+        try:
+            connection.request('GET', path)
+            return connection.getresponse().read().decode()
+        finally:
+            connection.close()
+
+    def test_workers(self):
+        pids = set()
+        for i in range(12):
+            pid, warm = self.request('/').split()
+            self.assertEqual(warm, 'True')
+            pids.add(pid)
+
+        # workers are recycled every three Web requests
+        self.assertGreater(len(pids), 2)
+        self.assertNotIn(str(self.process.pid), pids)
+
+        self.assertRaises((OSError, http.client.HTTPException),
+                          self.request, '/crash')
+        for i in range(6):
+            self.assertEqual(self.request('/').split()[1], 'True')
+
+        self.process.send_signal(signal.SIGTERM)
+        self.assertEqual(self.process.wait(15), 0)
+        self.assertIn(b'exited unexpectedly', self.process.stderr.read())
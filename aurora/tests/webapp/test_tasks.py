@@ -0,0 +1,169 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import contextlib
+import io
+import threading
+import unittest
+from aurora.webapp import foundation, infrastructure, mapping, tasks
+
+__all__ = ['TestTaskPool', 'TestAfterResponse']
+
+
+class TestTaskPool(unittest.TestCase):
+    """ Tests for the background task pool.
+    """
+
+    def setUp(self):
+        self.pool = tasks.TaskPool(workers=1, queue_size=1)
+        self.addCleanup(self.pool.shutdown, 5)
+
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.done = []
+
+    def wait(self, value):
+        self.release.wait(5)
+        self.done.append(value)
+
+    def test_submit(self):
+        self.assertTrue(self.pool.submit(self.done.append, 1))
+        self.assertTrue(self.pool.submit(self.done.append, 2))
+
+        self.assertTrue(self.pool.drain(5))
+        self.assertEqual(self.done, [1, 2])
+        self.assertEqual(self.pool.completed, 2)
+
+    def test_reject(self):
+        """ Test tasks are rejected once the pool is full.
+        """
+        self.assertTrue(self.pool.submit(self.wait, 1))
+        self.assertTrue(self.pool.submit(self.wait, 2))
+
+        with contextlib.redirect_stderr(io.StringIO()) as errors:
+            self.assertFalse(self.pool.submit(self.wait, 3))
+
+        self.assertIn('TestTaskPool.wait rejected', errors.getvalue())
+        self.assertEqual(self.pool.rejected, 1)
+
+        self.release.set()
+        self.assertTrue(self.pool.drain(5))
+        self.assertEqual(self.done, [1, 2])
+
+    def test_error(self):
+        reported = []
+        self.pool.report_error = lambda task, exc_info: reported.append(
+            (task, exc_info[0]))
+
+        self.pool.submit(int, 'x')
+        self.pool.submit(self.done.append, 1)
+
+        self.assertTrue(self.pool.drain(5))
+        self.assertEqual(reported, [(int, ValueError)])
+        self.assertEqual(self.pool.failed, 1)
+        self.assertEqual(self.done, [1])
+
+    def test_drain(self):
+        self.pool.submit(self.wait, 1)
+        self.assertFalse(tasks.drain(0.01))
+
+        self.release.set()
+        self.assertTrue(tasks.drain(5))
+        self.assertEqual(self.done, [1])
+
+    def test_shutdown(self):
+        self.pool.submit(self.done.append, 1)
+        self.assertTrue(self.pool.shutdown(5))
+        self.assertEqual(self.done, [1])
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertFalse(self.pool.submit(self.done.append, 2))
+
+
+class TestAfterResponse(unittest.TestCase):
+    """ Tests for the tasks scheduled after the Web response.
+    """
+
+    def setUp(self):
+        self.done = []
+
+        self.application = infrastructure.Application()
+        self.application.mapper.add_rule(mapping.Route('/'),
+                                         _handler=self.handler)
+
+    def handler(self, request):
+        request.after_response(self.task, request.path_info, value=1)
+        return request.response_factory(text='sent')
+
+    def task(self, path, value):
+        self.done.append((path, value,
+                          self.application.get_request().path_info))
+
+    def call(self, wsgi_app):
+        environ = foundation.Request.blank('/').environ
+        result = wsgi_app(environ, lambda status, headers, exc_info=None: None)
+
+        self.assertEqual(b''.join(result), b'sent')
+        self.assertEqual(self.done, [])
+        result.close()
+
+    def test_in_place(self):
+        self.call(foundation.wsgi(self.application))
+        self.assertEqual(self.done, [('/', 1, '/')])
+
+    def test_in_place_error(self):
+        def fail(request):
+            request.after_response(int, 'x')
+            return self.handler(request)
+
+        self.application.mapper.add_rule(mapping.Route('/'), _handler=fail)
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.call(foundation.wsgi(self.application))
+
+        self.assertEqual(self.done, [('/', 1, '/')])
+        self.assertIn('Background task int failed', stderr.getvalue())
+        self.assertIn('ValueError', stderr.getvalue())
+
+    def test_task_pool(self):
+        self.application.tasks = tasks.TaskPool()
+        self.addCleanup(self.application.tasks.shutdown)
+
+        self.call(foundation.wsgi(self.application))
+        self.assertTrue(self.application.tasks.drain(5))
+        self.assertEqual(self.done, [('/', 1, '/')])
+
+    def test_not_scheduled(self):
+        app_iter = foundation.wsgi(self.application.not_found)(
+            foundation.Request.blank('/').environ,
+            lambda status, headers, exc_info=None: None)
+        self.assertIsInstance(app_iter, list)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import shutil
+import tempfile
+import unittest
+from aurora.webapp import foundation, infrastructure
+from aurora.webcomponents import assets
+
+__all__ = ['TestAssets']
+
+
+class TestAssets(unittest.TestCase):
+    """ Tests for the static assets component.
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+        with open(os.path.join(self.path, 'style.css'), 'wb') as file:
+            file.write(b'body {}')
+
+        self.assets = assets.Assets()
+        self.assets.add_path(self.path)
+
+        self.application = infrastructure.Application()
+        self.application.mapper.add_rule(
+            self.assets.rule_factory('/static'))
+
+    def call(self, environ: dict) -> tuple:
+        start = []
+        result = foundation.wsgi(self.application)(
+            environ, lambda status, headers, exc_info=None: start.extend(
+                (status, dict(headers))))
+        try:
+            return start[0], start[1], result, b''.join(result)
+        finally:
+            result.close()
+
+    def test_handler(self):
+        request = foundation.Request.blank('/static/style.css')
+        response = self.application(request)
+
+        self.assertIsInstance(response.app_iter, foundation.FileIter)
+        self.assertEqual(response.content_type, 'text/css')
+        self.assertEqual(response.content_length, 7)
+        self.assertEqual(response.body, b'body {}')
+
+    def test_file_wrapper(self):
+        """ Test the file is given to the WSGI server file wrapper.
+        """
+        class FileWrapper(foundation.FileIter):
+            pass
+
+        environ = foundation.Request.blank('/static/style.css').environ
+        environ['wsgi.file_wrapper'] = FileWrapper
+
+        status, headers, result, body = self.call(environ)
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Length'], '7')
+        self.assertIsInstance(result, FileWrapper)
+        self.assertEqual(body, b'body {}')
+        self.assertTrue(result.file.closed)
+
+        environ = foundation.Request.blank('/static/style.css').environ
+        status, headers, result, body = self.call(environ)
+        self.assertIsInstance(result, foundation.FileIter)
+        self.assertEqual(body, b'body {}')
+
+if __name__ == '__main__':
+    unittest.main()
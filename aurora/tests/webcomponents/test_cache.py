@@ -0,0 +1,169 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import time
+import unittest
+from aurora import event
+from aurora.webapp import foundation, infrastructure, mapping
+from aurora.webcomponents import cache, layout
+
+__all__ = ['TestResponseCache']
+
+
+class TestResponseCache(unittest.TestCase):
+    """ Tests for the full-page Web response cache component.
+    """
+
+    def setUp(self):
+        self.calls = []
+        self.application = infrastructure.Application()
+        self.cache = cache.ResponseCache(self.application.get_request,
+                                         vary=['Accept-Language'])
+        self.layout = layout.Layout(
+            lambda template_name, content: '<html>%s</html>' % content)
+        self.application.post_dispatch = event.Event(
+            [self.layout.post_dispatch, self.cache.post_dispatch])
+
+        self.page = self.cache.cached(self.page)
+        self.application.mapper.add_rule(mapping.Route('/page'),
+                                         _handler=self.page)
+        self.application.mapper.add_rule(
+            mapping.Route('/async'),
+            _handler=self.cache.cached(self.async_page))
+        self.application.mapper.add_rule(
+            mapping.Route('/cookie'), _handler=self.cache.cached(self.cookie))
+        self.application.mapper.add_rule(
+            mapping.Route('/stream'), _handler=self.cache.cached(self.stream))
+
+    @layout.partial
+    def page(self, request):
+        self.calls.append(request.path_qs)
+        return request.response_factory(text=str(len(self.calls)))
+
+    async def async_page(self, request):
+        self.calls.append(request.path_qs)
+        return request.response_factory(text=str(len(self.calls)))
+
+    def cookie(self, request):
+        self.calls.append(request.path_qs)
+        response = request.response_factory(text='cookie')
+        response.set_cookie('name', 'value')
+        return response
+
+    def stream(self, request):
+        self.calls.append(request.path_qs)
+        response = request.response_factory()
+        response.app_iter = iter([b'a', b'b'])
+        return response
+
+    def get(self, path, **kwargs):
+        return self.application(foundation.Request.blank(path, **kwargs))
+
+    def test_hit(self):
+        self.assertEqual(self.get('/page').text, '<html>1</html>')
+        response = self.get('/page')
+        self.assertEqual(response.text, '<html>1</html>')
+        self.assertEqual(response.content_type, 'text/html')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        # the key include the query string, method and vary headers
+        self.assertEqual(self.get('/page?a=1').text, '<html>2</html>')
+        self.assertEqual(self.get('/page', method='HEAD').text,
+                         '<html>3</html>')
+        self.assertEqual(self.get('/page', headers={
+            'Accept-Language': 'es'}).text, '<html>4</html>')
+        self.assertEqual(self.get('/page', headers={
+            'Accept-Language': 'es'}).text, '<html>4</html>')
+        self.assertEqual(self.get('/page', headers={
+            'User-Agent': 'test'}).text, '<html>1</html>')
+
+        self.assertEqual(self.get('/page', POST={'a': '1'}).text,
+                         '<html>5</html>')
+
+        self.assertEqual(asyncio.run(self.application.dispatch(
+            foundation.Request.blank('/async'))).text, '6')
+        self.assertEqual(self.get('/async').text, '6')
+
+    def test_streamed(self):
+        response = self.get('/stream')
+        self.assertEqual(self.cache.size, 0)
+        self.assertEqual(list(response.app_iter), [b'a', b'b'])
+        self.assertEqual(self.get('/stream').body, b'ab')
+        self.assertEqual(self.calls, ['/stream'])
+
+        # bodies produced before an invalidation are not stored
+        self.cache.invalidate()
+        response = self.get('/stream')
+        self.cache.invalidate()
+        self.assertEqual(list(response.app_iter), [b'a', b'b'])
+        self.assertEqual(self.cache.size, 0)
+
+    def test_not_stored(self):
+        self.get('/cookie')
+        self.get('/cookie')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_expiration(self):
+        self.cache.ttl = 0.05
+        self.assertEqual(self.get('/page').text, '<html>1</html>')
+        time.sleep(0.1)
+        self.assertEqual(self.get('/page').text, '<html>2</html>')
+
+    def test_eviction(self):
+        self.get('/page?1')
+        self.cache.max_size = self.cache.size * 2
+        self.get('/page?2')
+        self.get('/page?1')
+        self.get('/page?3')
+
+        # the least recently used entry is evicted
+        self.assertLessEqual(self.cache.size, self.cache.max_size)
+        self.get('/page?1')
+        self.get('/page?2')
+        self.assertEqual(self.calls, ['/page?1', '/page?2', '/page?3',
+                                      '/page?2'])
+
+    def test_invalidate(self):
+        for path in ('/page', '/page?a=1', '/async'):
+            self.get(path)
+
+        self.cache.invalidate(path='/page', handler=self.page)
+        self.get('/page')
+        self.get('/page?a=1')
+        self.get('/async')
+        self.assertEqual(len(self.calls), 5)
+
+        self.cache.invalidate()
+        self.assertEqual(self.cache.size, 0)
+        self.get('/async')
+        self.assertEqual(len(self.calls), 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import gzip
+import tempfile
+import unittest
+import zlib
+from aurora.webapp import foundation, infrastructure, mapping
+from aurora.webcomponents import compression
+
+__all__ = ['TestCompression']
+
+TEXT = 'Hello world! ' * 200
+
+
+class TestCompression(unittest.TestCase):
+    """ Tests for the Web response compression component.
+    """
+
+    def setUp(self):
+        self.application = infrastructure.Application()
+        self.compression = compression.Compression(
+            self.application.get_request)
+        self.application.post_dispatch = self.compression.post_dispatch
+
+        self.application.mapper.add_rule(mapping.Route('/page'),
+                                         _handler=self.page)
+        self.application.mapper.add_rule(mapping.Route('/small'),
+                                         _handler=self.small)
+        self.application.mapper.add_rule(mapping.Route('/image'),
+                                         _handler=self.image)
+        self.application.mapper.add_rule(mapping.Route('/stream'),
+                                         _handler=self.stream)
+        self.application.mapper.add_rule(mapping.Route('/fragments'),
+                                         _handler=self.fragments)
+        self.application.mapper.add_rule(mapping.Route('/file'),
+                                         _handler=self.file)
+
+    def page(self, request):
+        response = request.response_factory(text=TEXT)
+        response.headers['ETag'] = '"tag"'
+        return response
+
+    def small(self, request):
+        return request.response_factory(text='small')
+
+    def image(self, request):
+        response = request.response_factory(body=TEXT.encode())
+        response.content_type = 'image/png'
+        return response
+
+    def stream(self, request):
+        self.chunks = []
+
+        def generate():
+            for i in range(3):
+                self.chunks.append(i)
+                yield TEXT.encode()
+
+        response = request.response_factory(content_type='text/plain')
+        response.app_iter = generate()
+        return response
+
+    def fragments(self, request):
+        response = request.response_factory(content_type='text/html')
+        response.app_iter = (('<li>item %d</li>' % i).encode()
+                             for i in range(2000))
+        return response
+
+    def file(self, request):
+        file = tempfile.TemporaryFile()
+        file.write(TEXT.encode())
+        file.seek(0)
+
+        response = request.response_factory(content_type='text/css')
+        response.app_iter = foundation.FileIter(file)
+        return response
+
+    def get(self, path, accept_encoding=None):
+        headers = {}
+        if accept_encoding is not None:
+            headers['Accept-Encoding'] = accept_encoding
+
+        return self.application(foundation.Request.blank(path,
+                                                         headers=headers))
+
+    def test_buffered(self):
+        response = self.get('/page', 'gzip, deflate')
+        self.assertEqual(response.content_encoding, 'gzip')
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.headers['ETag'], 'W/"tag"')
+        self.assertEqual(int(response.headers['Content-Length']),
+                         len(response.body))
+        self.assertEqual(gzip.decompress(response.body).decode(), TEXT)
+
+        response = self.get('/page', 'gzip;q=0.5, deflate')
+        self.assertEqual(response.content_encoding, 'deflate')
+        self.assertEqual(zlib.decompress(response.body).decode(), TEXT)
+
+        for accept_encoding in (None, 'identity', 'gzip;q=0, deflate;q=0',
+                                'br'):
+            response = self.get('/page', accept_encoding)
+            self.assertIsNone(response.content_encoding)
+            self.assertEqual(response.text, TEXT)
+            self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+
+        self.assertEqual(self.get('/page', '*').content_encoding, 'gzip')
+
+    def test_skipped(self):
+        response = self.get('/small', 'gzip')
+        self.assertIsNone(response.content_encoding)
+        self.assertNotIn('Vary', response.headers)
+
+        response = self.get('/image', 'gzip')
+        self.assertIsNone(response.content_encoding)
+        self.assertEqual(response.body, TEXT.encode())
+
+    def test_streamed(self):
+        self.compression.flush_size = len(TEXT)
+        response = self.get('/stream', 'gzip')
+        self.assertEqual(response.content_encoding, 'gzip')
+        self.assertIsNone(response.content_length)
+
+        decompressor = zlib.decompressobj(31)
+        data = b''
+        for chunk in response.app_iter:
+            # chunks are compressed as they are produced
+            data += decompressor.decompress(chunk)
+            self.assertEqual(len(data), len(TEXT) * len(self.chunks))
+        self.assertEqual(data.decode(), TEXT * 3)
+
+    def test_fragments(self):
+        """ Test small chunks are compressed together.
+        """
+        response = self.get('/fragments', 'gzip')
+        chunks = list(response.app_iter)
+        data = gzip.decompress(b''.join(chunks))
+
+        self.assertEqual(data, ''.join('<li>item %d</li>' % i
+                                       for i in range(2000)).encode())
+        self.assertLess(len(chunks), 10)
+        self.assertLess(len(b''.join(chunks)),
+                        len(gzip.compress(data)) * 1.2)
+
+    def test_file(self):
+        response = self.get('/file', 'gzip')
+        self.assertIsNone(response.content_encoding)
+        self.assertIsInstance(response.app_iter, foundation.FileIter)
+        response.app_iter.close()
+
+if __name__ == '__main__':
+    unittest.main()
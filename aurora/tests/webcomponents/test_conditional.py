@@ -0,0 +1,162 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import datetime
+import unittest
+from aurora import event
+from aurora.webapp import foundation, infrastructure, mapping
+from aurora.webcomponents import cache, conditional
+
+__all__ = ['TestConditionalGet']
+
+MODIFIED = datetime.datetime(2012, 5, 1, 10, 30)
+
+
+class _Body:
+    """ Streamed Web response body recording whether it is closed.
+    """
+
+    closed = False
+
+    def __init__(self, chunks: list):
+        self.chunks = chunks
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+class TestConditionalGet(unittest.TestCase):
+    """ Tests for the conditional GET component.
+    """
+
+    def setUp(self):
+        self.rendered = 0
+        self.application = infrastructure.Application()
+        self.conditional = conditional.ConditionalGet(
+            self.application.get_request)
+        self.cache = cache.ResponseCache(self.application.get_request)
+        self.application.post_dispatch = event.Event(
+            [self.conditional.post_dispatch, self.cache.post_dispatch])
+
+        self.application.mapper.add_rule(mapping.Route('/page'),
+                                         _handler=self.page)
+        self.application.mapper.add_rule(
+            mapping.Route('/post'), _handler=self.cache.cached(self.post))
+        self.application.mapper.add_rule(mapping.Route('/stream'),
+                                         _handler=self.stream)
+        self.application.mapper.add_rule(mapping.Route('/file'),
+                                         _handler=self.file)
+
+    def page(self, request):
+        self.rendered += 1
+        return request.response_factory(text='page')
+
+    def post(self, request):
+        response = self.conditional.validate(request, etag='1',
+                                             last_modified=MODIFIED)
+        if response is not None:
+            return response
+
+        self.rendered += 1
+        return request.response_factory(text='post')
+
+    def stream(self, request):
+        response = request.response_factory()
+        response.app_iter = iter([b'stream'])
+        return response
+
+    def file(self, request):
+        response = request.response_factory()
+        response.app_iter = self.body = _Body([b'file'])
+        response.last_modified = MODIFIED
+        return response
+
+    def get(self, path, **headers):
+        return self.application(foundation.Request.blank(path,
+                                                         headers=headers))
+
+    def test_computed_etag(self):
+        response = self.get('/page')
+        etag = response.headers['ETag']
+        self.assertEqual(response.status_int, 200)
+        self.assertTrue(etag.startswith('"'))
+
+        response = self.get('/page', **{'If-None-Match': etag})
+        self.assertEqual(response.status_int, 304)
+        self.assertEqual(response.body, b'')
+        self.assertNotIn('Content-Type', response.headers)
+        self.assertEqual(response.headers['ETag'], etag)
+
+        response = self.get('/page', **{'If-None-Match': '"x", W/' + etag})
+        self.assertEqual(response.status_int, 304)
+        response = self.get('/page', **{'If-None-Match': '"x"'})
+        self.assertEqual(response.status_int, 200)
+
+        self.conditional.weak = True
+        self.assertTrue(self.get('/page').headers['ETag'].startswith('W/"'))
+
+        # streamed bodies are not consumed
+        self.assertNotIn('ETag', self.get('/stream').headers)
+
+    def test_validate(self):
+        response = self.get('/post')
+        self.assertEqual(response.headers['ETag'], 'W/"1"')
+        self.assertEqual(response.last_modified.replace(tzinfo=None),
+                         MODIFIED)
+        self.assertEqual(self.rendered, 1)
+
+        response = self.get('/post', **{'If-None-Match': '"1"'})
+        self.assertEqual(response.status_int, 304)
+        response = self.get('/post', **{
+            'If-Modified-Since': 'Tue, 01 May 2012 10:30:00 GMT'})
+        self.assertEqual(response.status_int, 304)
+        response = self.get('/post', **{
+            'If-Modified-Since': 'Tue, 01 May 2012 10:29:59 GMT'})
+        self.assertEqual(response.status_int, 200)
+
+        # cached Web responses keep the validators
+        self.assertEqual(self.rendered, 1)
+        self.cache.invalidate()
+        response = self.get('/post', **{'If-None-Match': 'W/"1"'})
+        self.assertEqual(response.status_int, 304)
+        self.assertEqual(self.rendered, 1)
+
+    def test_close_body(self):
+        """ Test the replaced body of not modified responses is closed.
+        """
+        response = self.get('/file', **{
+            'If-Modified-Since': 'Tue, 01 May 2012 10:30:00 GMT'})
+        self.assertEqual(response.status_int, 304)
+        self.assertTrue(self.body.closed)
+
+if __name__ == '__main__':
+    unittest.main()
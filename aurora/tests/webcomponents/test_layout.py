@@ -0,0 +1,84 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from aurora.webapp import foundation
+from aurora.webcomponents import layout
+
+__all__ = ['TestLayout']
+
+
+class TestLayout(unittest.TestCase):
+    """ Tests for the layout component.
+    """
+
+    def setUp(self):
+        self.layout = layout.Layout(self.render)
+
+    def render(self, template_name, content):
+        return '<html>%s</html>' % content
+
+    def partial(self, app_iter):
+        response = foundation.Response(content_type='x-application/partial')
+        response.app_iter = app_iter
+        return response
+
+    def test_buffered(self):
+        response = self.partial(['café'.encode()])
+        self.layout.post_dispatch(response)
+
+        self.assertEqual(response.content_type, 'text/html')
+        self.assertEqual(response.text, '<html>café</html>')
+        self.assertEqual(int(response.headers['Content-Length']),
+                         len(response.body))
+
+    def test_streamed(self):
+        produced = []
+
+        def generate():
+            for chunk in (b'a', b'b'):
+                produced.append(chunk)
+                yield chunk
+
+        response = self.partial(generate())
+        self.layout.post_dispatch(response)
+        self.assertEqual(response.content_type, 'text/html')
+        self.assertIsNone(response.content_length)
+        self.assertEqual(produced, [])
+
+        self.assertEqual(list(response.app_iter),
+                         [b'<html>', b'a', b'b', b'</html>'])
+
+    def test_not_partial(self):
+        response = foundation.Response(text='page')
+        self.layout.post_dispatch(response)
+        self.assertEqual(response.text, 'page')
+
+if __name__ == '__main__':
+    unittest.main()
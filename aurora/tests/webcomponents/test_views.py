@@ -0,0 +1,126 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import shutil
+import tempfile
+import unittest
+from aurora.webapp import foundation
+from aurora.webcomponents import views
+
+__all__ = ['TestViews']
+
+
+class Engine:
+    """ Template engine formatting the template lines with the context.
+    """
+
+    def __init__(self):
+        self.rendered = []
+
+    def lines(self, file_name, **context):
+        with open(file_name) as file:
+            for line in file:
+                self.rendered.append(line)
+                yield line.format(**context)
+
+    def __call__(self, file_name, **context):
+        return ''.join(self.lines(file_name, **context))
+
+
+class StreamEngine(Engine):
+    """ Template engine producing the content line by line.
+    """
+
+    stream = Engine.lines
+
+
+class TestViews(unittest.TestCase):
+    """ Tests for the template based view rendering component.
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        with open(os.path.join(self.path, 'page.html.fmt'), 'w') as file:
+            file.write('<p>{name}</p>\n<p>{name}</p>')
+
+        self.views = views.Views()
+        self.views.add_path(self.path)
+        self.views.add_engine(Engine(), 'fmt')
+
+    def test_render2response(self):
+        request = foundation.Request.blank('/')
+        response = self.views.render2response(request, 'page.html',
+                                              name='a')
+        self.assertEqual(response.content_type, 'text/html')
+        self.assertEqual(response.text, '<p>a</p>\n<p>a</p>')
+
+    def test_streaming(self):
+        request = foundation.Request.blank('/')
+
+        # engines without stream support produce a single chunk
+        self.views.streaming = True
+        response = self.views.render2response(request, 'page.html',
+                                              name='b')
+        self.assertEqual(list(response.app_iter), [b'<p>b</p>\n<p>b</p>'])
+
+        engine = StreamEngine()
+        self.views.add_engine(engine, 'fmt')
+        self.views.buffer_size = 1
+        response = self.views.render2response(request, 'page.html',
+                                              name='é')
+        self.assertIsNone(response.content_length)
+        self.assertEqual(engine.rendered, [])
+
+        chunks = iter(response.app_iter)
+        self.assertEqual(next(chunks), '<p>é</p>\n'.encode())
+        self.assertEqual(len(engine.rendered), 1)
+        self.assertEqual(list(chunks), ['<p>é</p>'.encode()])
+
+    def test_buffer_size(self):
+        """ Test the streamed fragments are joined into larger chunks.
+        """
+        request = foundation.Request.blank('/')
+        with open(os.path.join(self.path, 'list.html.fmt'), 'w') as file:
+            file.write('<li>{name}</li>\n' * 1000)
+
+        self.views.streaming = True
+        self.views.add_engine(StreamEngine(), 'fmt')
+        self.views.buffer_size = 4096
+
+        response = self.views.render2response(request, 'list.html',
+                                              name='item')
+        chunks = list(response.app_iter)
+        self.assertEqual(b''.join(chunks), b'<li>item</li>\n' * 1000)
+        self.assertEqual(len(chunks), 4)
+        self.assertGreaterEqual(min(map(len, chunks[:-1])), 4096)
+
+if __name__ == '__main__':
+    unittest.main()
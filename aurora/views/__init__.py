@@ -41,6 +41,13 @@ class Engine(collections.Callable):
     absolute filesystem path of the View template as first positional
     argument and any named argument used as context and return a string
     containing the rendered content.
+
+    Engines that parse templates ahead of rendering can provide a
+    ``compile`` attribute, a callable that takes the absolute template file
+    name and prepare the template without rendering it. Engines that produce
+    the content progressively can provide a ``stream`` attribute, a callable
+    taking the same arguments than the engine that return an iterator of
+    rendered content strings.
     """
 
     def __call__(self, file_name: str, **context) -> str:
@@ -52,6 +59,27 @@ class Engine(collections.Callable):
         """
 
 
+def _coalesce(chunks, size: int):
+    """ Join content chunks into chunks of at least `size` characters.
+    """
+    buffer = []
+    buffered = 0
+    try:
+        for chunk in chunks:
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= size:
+                yield ''.join(buffer)
+                buffer = []
+                buffered = 0
+
+        if buffer:
+            yield ''.join(buffer)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
 class Views:
     """ Provide generic template based view rendering support.
 
@@ -78,6 +106,8 @@ class Views:
 
     DEFAULT_MIME_TYPE = 'text/html'
 
+    buffer_size = 8192  # minimum size of the streamed content chunks
+
     @property
     def _engines(self) -> dict:
         try:
@@ -88,20 +118,29 @@ class Views:
             except ImportError:
                 from . import _suba
 
-            def _suba_engine(file_name, **c):
+            def _suba_stream(file_name, **c):
 
                 root_dir, file_name = os.path.split(file_name)
 
                 gen = _suba.template(filename=file_name, root=root_dir, **c)
 
-                result = ''
                 for part in gen:
                     if part is None:
                         break
 
-                    result = ''.join((result, part))
+                    yield part
+
+            def _suba_engine(file_name, **c):
+                return ''.join(_suba_stream(file_name, **c))
+
+            def _suba_compile(file_name):
+                root_dir, file_name = os.path.split(file_name)
+
+                # the template is compiled when the generator is created
+                _suba.template(filename=file_name, root=root_dir)
 
-                return result
+            _suba_engine.compile = _suba_compile
+            _suba_engine.stream = _suba_stream
 
             _engines = self.__dict__['_engines'] = {
                 'suba': _suba_engine
@@ -169,6 +208,29 @@ class Views:
     # services provided by the component
     #
 
+    def warmup(self):
+        """ Prepare the templates found in the template paths for rendering.
+
+        Template names are resolved and templates are compiled by the
+        :class:`Engine`-like objects that support it.
+        """
+        engines = self._engines
+
+        for path in self._paths:
+            for root, dirs, files in os.walk(path):
+                for file_name in files:
+                    name, extension = os.path.splitext(file_name)
+                    if extension[1:] not in engines:
+                        continue
+
+                    # the template may be shadowed by another path
+                    file_name, extension = self._resolve_template(
+                        os.path.relpath(os.path.join(root, name), path))
+
+                    compile = getattr(engines[extension], 'compile', None)
+                    if compile is not None:
+                        compile(file_name)
+
     def render(self, template_name: str, **context) -> str:
         """ Render a template into content with context.
 
@@ -182,4 +244,30 @@ class Views:
 
         file_name, extension = self._resolve_template(template_name)
 
-        return self._engines[extension](file_name, **c)
\ No newline at end of file
+        return self._engines[extension](file_name, **c)
+
+    def stream(self, template_name: str, **context):
+        """ Render a template into content chunks with context.
+
+        The content is produced progressively as the returned iterator is
+        consumed if the template :class:`Engine` support it, otherwise it is
+        produced as a single chunk. The (maybe tiny) fragments produced by
+        the engine are joined into chunks of at least :attr:`buffer_size`
+        characters.
+
+        :param template_name: The relative template name string without the
+            last extension.
+        :param context: The context mapping.
+        :return: An iterator of rendered content strings.
+        """
+        c = self._default_context.copy()
+        c.update(context)
+
+        file_name, extension = self._resolve_template(template_name)
+        engine = self._engines[extension]
+
+        stream = getattr(engine, 'stream', None)
+        if stream is None:
+            return iter((engine(file_name, **c), ))
+
+        return _coalesce(stream(file_name, **c), self.buffer_size)
\ No newline at end of file
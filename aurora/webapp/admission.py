@@ -0,0 +1,208 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+""" Web request admission control.
+
+The number of Web requests handled concurrently by an
+:class:`~.infrastructure.Application` can be limited by setting its
+:attr:`~.infrastructure.Application.admission` attribute. Web requests
+exceeding the limit wait on a bounded queue until a slot is released or
+its deadline expire, then they are rejected with a cheap ``503 Service
+Unavailable`` response (no dispatch extension is invoked) instead of
+piling up until every Web request time out::
+
+    application.admission = admission.AdmissionControl(
+        limit=32, queue_size=64, timeout=2)
+
+Web request handlers can be limited further using the ``_concurrency``
+metadata element of its :class:`mapping rule <.mapping.Rule>`, it is not
+required to :meth:`assemble <.mapping.Mapper.assemble>` Web request
+paths::
+
+    application.mapper.add_rule(mapping.Route('/search'),
+                                _handler=application.search, _concurrency=4)
+
+Streamed Web response bodies (like rendered templates) keep the slot until
+the WSGI server close them, so their production is limited too. The
+admission control apply to Web requests handled synchronously, the
+:meth:`~.infrastructure.Application.dispatch` service is not limited.
+"""
+
+import json
+import threading
+import time
+
+from . import foundation, metrics
+
+__all__ = ['AdmissionControl']
+
+
+class AdmissionControl:
+    """ Limit the Web requests handled concurrently.
+
+    :param limit: The number of Web requests handled concurrently, 0 for
+        no limit (only the Web request handlers limits apply).
+    :param queue_size: The number of Web requests waiting for a slot, 0 to
+        reject them at once.
+    :param timeout: The number of seconds a Web request wait for a slot.
+    :param retry_after: The ``Retry-After`` header value (in seconds) of
+        the rejection responses.
+    """
+
+    limit = 0
+
+    queue_size = 0
+
+    timeout = 1.0
+
+    retry_after = 1
+
+    limit_key = '_concurrency'  # mapping rule metadata element holding the
+                                # Web request handler limit
+
+    def __init__(self, limit=None, queue_size=None, timeout=None,
+                 retry_after=None):
+        if limit is not None:
+            self.limit = limit
+
+        if queue_size is not None:
+            self.queue_size = queue_size
+
+        if timeout is not None:
+            self.timeout = timeout
+
+        if retry_after is not None:
+            self.retry_after = retry_after
+
+        self.active = 0  # Web requests been handled
+        self.queued = 0  # Web requests waiting for a slot
+        self.admitted = 0
+        self.rejected = 0  # rejected at once because the queue was full
+        self.expired = 0  # rejected after waiting until the deadline
+
+        self._active = {}  # Web requests been handled per limited handler
+        self._condition = threading.Condition(threading.Lock())
+
+    def _admissible(self, handler: foundation.Handler, limit) -> bool:
+        if self.limit and self.active >= self.limit:
+            return False
+
+        return not limit or self._active.get(handler, 0) < limit
+
+    def _admit(self, handler: foundation.Handler, limit):
+        self.active += 1
+        self.admitted += 1
+
+        if limit:
+            self._active[handler] = self._active.get(handler, 0) + 1
+
+    def acquire(self, handler: foundation.Handler, limit=None) -> bool:
+        """ Take a slot for a Web request, waiting for it if needed.
+
+        :param handler: The Web request handler.
+        :param limit: The Web request handler limit (if any).
+        :return: `True` if the Web request is admitted, the slot must be
+            given back using :meth:`release`.
+        """
+        with self._condition:
+            if self._admissible(handler, limit):
+                self._admit(handler, limit)
+                return True
+
+            if self.queued >= self.queue_size:
+                self.rejected += 1
+                return False
+
+            deadline = time.monotonic() + self.timeout
+            self.queued += 1
+            try:
+                while not self._admissible(handler, limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.expired += 1
+                        return False
+
+                    self._condition.wait(remaining)
+            finally:
+                self.queued -= 1
+
+            self._admit(handler, limit)
+            return True
+
+    def release(self, handler: foundation.Handler, limit=None):
+        """ Give back the slot taken by :meth:`acquire`.
+
+        :param handler: The Web request handler.
+        :param limit: The Web request handler limit (if any).
+        """
+        with self._condition:
+            self.active -= 1
+
+            if limit:
+                self._active[handler] -= 1
+                if not self._active[handler]:
+                    del self._active[handler]
+
+            # waiters may be blocked by different limits
+            self._condition.notify_all()
+
+    def reject(self, request: foundation.Request) -> foundation.Response:
+        """ Web request handler used for the rejected Web requests.
+        """
+        response = request.response_factory(status=503)
+        response.headers['Retry-After'] = str(self.retry_after)
+
+        return response
+
+    def report(self) -> dict:
+        """ Return the admission counters.
+
+        :return: Mapping with the number of Web requests been handled
+            (``active``, and ``handlers`` per limited Web request handler
+            name), waiting (``queued``), ``admitted``, ``rejected`` because
+            the queue was full and ``expired`` in the queue.
+        """
+        with self._condition:
+            return {
+                'active': self.active,
+                'queued': self.queued,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'expired': self.expired,
+                'handlers': dict((metrics.name(handler), active)
+                                 for handler, active in self._active.items()),
+            }
+
+    def handler(self, request: foundation.Request) -> foundation.Response:
+        """ Web request handler presenting the :meth:`report` as JSON.
+        """
+        response = request.response_factory(
+            text=json.dumps(self.report(), indent=2, sort_keys=True))
+        response.content_type = 'application/json'
+
+        return response
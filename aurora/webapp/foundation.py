@@ -27,11 +27,18 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
 # EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import asyncio
 import collections
+import contextvars
 import functools
+import inspect
+import io
+import sys
 import webob
+from . import multipart
 
-__all__ = ['Request', 'Response', 'Handler', 'wsgi']
+__all__ = ['Request', 'Response', 'RequestServices', 'FileIter', 'Handler',
+           'AsyncHandler', 'wsgi', 'asgi']
 
 
 class Response(webob.Response):
@@ -43,13 +50,135 @@ class Response(webob.Response):
     """
 
 
-class Request(webob.Request):
+class RequestServices:
+    """ Aurora services of the Web request implementations.
+
+    The services are built on top of the WSGI environment, the Web request
+    implementations only need to provide it as the ``environ`` attribute
+    and the ``content_type``, ``content_length`` and ``body_file`` ones.
+
+    ``multipart/form-data`` bodies are parsed as they are read (see
+    :mod:`.multipart`), the Web request body size is checked against
+    :attr:`max_body_size` before it is read and, if it is unknown (like
+    chunked bodies read until ``wsgi.input_terminated``), as it is read.
+    """
+
+    __slots__ = ()
+
+    max_body_size = None  # size limit in bytes of the form bodies, no limit
+                          # if not given.
+
+    spool_size = 1024 * 1024  # size in bytes of the uploaded files kept in
+                              # memory, larger ones use temporary files.
+
+    max_field_size = 1024 * 1024  # size limit in bytes of the text fields.
+
+    @property
+    def characteristics(self) -> dict:
+        """ Web request path characteristics.
+
+        The characteristics produced by the Web request path mapping (see
+        :class:`.infrastructure.Application`), empty if the Web request
+        path has not been mapped.
+        """
+        return self.environ.setdefault('aurora.characteristics', {})
+
+    def after_response(self, task, *args, **kwargs):
+        """ Schedule a call to `task` once the Web response is sent.
+
+        The tasks are invoked in order of scheduling by the :func:`wsgi` and
+        :func:`asgi` adapters after the Web response body is sent, using the
+        task pool of the Web application if any (see :mod:`.tasks`). They
+        must be scheduled before the Web request handler return.
+
+        :param task: The callable object to invoke.
+        :param args: The `task` positional arguments.
+        :param kwargs: The `task` keyword arguments.
+        """
+        self.environ.setdefault('aurora.after_response', []).append(
+            (task, args, kwargs))
+
+    def iter_form(self) -> multipart.Reader:
+        """ Parse the ``multipart/form-data`` body incrementally.
+
+        The body parts are produced one at a time as they are read, their
+        content is read chunk by chunk. The body can't be parsed again, the
+        ``POST`` variables aren't available afterwards.
+
+        :return: An iterable of :class:`~.multipart.Part` objects.
+        :raise .multipart.BodyTooLarge: If the body is larger than
+            :attr:`max_body_size`.
+        :raise ValueError: If the body isn't ``multipart/form-data``.
+        """
+        if self.content_type != 'multipart/form-data':
+            raise ValueError('not a multipart/form-data Web request')
+
+        multipart.check_size(self.content_length, self.max_body_size)
+        self.environ['aurora.form'] = None
+
+        boundary = multipart.boundary(self.environ['CONTENT_TYPE'])
+
+        return multipart.Reader(self.body_file, boundary,
+                                max_size=self.max_body_size)
+
+    def _parse_form(self) -> list:
+        """ Parse the ``multipart/form-data`` body into (name, value) pairs.
+        """
+        if self.environ.get('aurora.form', ()) is None:
+            raise RuntimeError('the Web request body has been consumed')
+
+        multipart.check_size(self.content_length, self.max_body_size)
+
+        return multipart.parse_form(
+            self.body_file, self.environ['CONTENT_TYPE'], 'UTF-8',
+            self.spool_size, self.max_field_size, self.max_body_size)
+
+    def _check_body(self):
+        """ Check the size of a non multipart body before it is parsed.
+
+        ``application/x-www-form-urlencoded`` bodies of unknown size are
+        read up to :attr:`max_body_size` bytes into memory, where they
+        replace the WSGI input stream.
+        """
+        limit = self.max_body_size
+        multipart.check_size(self.content_length, limit)
+
+        if limit is not None and self.content_length is None and \
+                self.environ.get('wsgi.input_terminated') and \
+                self.content_type == 'application/x-www-form-urlencoded':
+            body = multipart.read_body(self.body_file, limit)
+            self.environ['wsgi.input'] = io.BytesIO(body)
+            self.environ['CONTENT_LENGTH'] = str(len(body))
+
+
+class Request(RequestServices, webob.Request):
     """ Web request.
 
     The Web request provide access to the information sent by the
     client browser to the Web application.
     """
 
+    @property
+    def POST(self) -> webob.multidict.MultiDict:
+        """ Form variables.
+
+        ``multipart/form-data`` bodies are parsed as they are read, uploaded
+        files are :class:`~.multipart.Part` objects spooled to temporary
+        files past :attr:`spool_size` bytes.
+        """
+        if self.content_type != 'multipart/form-data':
+            if self.method in ('POST', 'PUT', 'PATCH'):
+                self._check_body()
+
+            return super().POST
+
+        form = self.environ.get('aurora.form')
+        if form is None:
+            form = webob.multidict.MultiDict(self._parse_form())
+            self.environ['aurora.form'] = form
+
+        return form
+
     @property
     def response_factory(self) -> Response:
         """ Factory used to produce a :class:`Web response <Response>` object.
@@ -57,6 +186,31 @@ class Request(webob.Request):
         return Response
 
 
+class FileIter:
+    """ Web response body produced from a file.
+
+    The :func:`wsgi` adapter hand the file to the WSGI server
+    ``wsgi.file_wrapper`` when it is offered, servers can then send it
+    using platform specific mechanisms (like :func:`os.sendfile`) without
+    reading it into Python. Otherwise it is read in `block_size` chunks.
+
+    :param file: The file object opened in binary mode.
+    :param block_size: The size of the chunks read from the file.
+    """
+
+    __slots__ = ('file', 'block_size')
+
+    def __init__(self, file, block_size=65536):
+        self.file = file
+        self.block_size = block_size
+
+    def __iter__(self):
+        return iter(functools.partial(self.file.read, self.block_size), b'')
+
+    def close(self):
+        self.file.close()
+
+
 class Handler(collections.Callable):
     """ Web request handler.
 
@@ -83,15 +237,291 @@ class Handler(collections.Callable):
     """
 
 
-def wsgi(handler):
+class AsyncHandler(collections.Callable):
+    """ Asynchronous Web request handler.
+
+    .. admonition::
+
+        This class is not meant to be inherited it is here just for interface
+        documentation purposes.
+
+    An asynchronous Web request handler is the :mod:`asyncio` variant of the
+    :class:`Web request handler <Handler>` protocol. It is any callable
+    object that accept as first positional argument a
+    :class:`Web request <Request>` object and return an awaitable object
+    that produce a :class:`Web response <Response>` object (a coroutine
+    function for example).
+
+    Example `Hello World!` asynchronous Web request handler::
+
+        async def say_hello(request):
+            return request.response_factory(text='Hello World!')
+    """
+
+
+def _after_response(environ: dict):
+    """ Invoke the tasks scheduled by :meth:`Request.after_response`.
+    """
+    submit = environ.get('aurora.submit')
+    if submit is None:
+        # tasks import this module through metrics
+        from . import tasks
+        submit = tasks.run
+
+    for task, args, kwargs in environ.pop('aurora.after_response', ()):
+        submit(task, *args, **kwargs)
+
+
+class _Closing:
+    """ WSGI response body invoking the scheduled tasks once closed.
+    """
+
+    def __init__(self, app_iter, environ: dict):
+        self.app_iter = app_iter
+        self.environ = environ
+
+    def __iter__(self):
+        return iter(self.app_iter)
+
+    def close(self):
+        try:
+            if hasattr(self.app_iter, 'close'):
+                self.app_iter.close()
+        finally:
+            _after_response(self.environ)
+
+
+def wsgi(handler, request_factory=None):
     """ Wrap `handler` with a WSGI application interface.
 
+    Web response bodies are passed to the WSGI server as they are, bodies
+    produced by an iterator (the Web response ``app_iter``) are sent chunk
+    by chunk as they are produced. Bodies produced by a :class:`FileIter`
+    are given to the WSGI server ``wsgi.file_wrapper`` if available. The
+    tasks scheduled by
+    :meth:`Request.after_response` are invoked once the WSGI server close
+    the Web response body.
+
     :param handler: A :class:`Web request handler <Handler>`.
+    :param request_factory: The Web request implementation, :class:`Request`
+        by default (see :mod:`.lean` for a lightweight one).
     :return: A `WSGI <http://www.python.org/dev/peps/pep-333>`_ application.
     """
+    if request_factory is None:
+        request_factory = Request
 
     @functools.wraps(handler)
     def wsgi_app(env, start_response):
-        return handler(Request(env))(env, start_response)
+        result = handler(request_factory(env))(env, start_response)
+
+        if isinstance(result, FileIter) and 'wsgi.file_wrapper' in env:
+            result = env['wsgi.file_wrapper'](result.file, result.block_size)
+
+        if 'aurora.after_response' in env:
+            return _Closing(result, env)
+
+        return result
 
     return wsgi_app
+
+
+def _environ(scope: dict, body: bytes) -> dict:
+    """ Build a WSGI environment from an ASGI HTTP connection scope.
+    """
+    path = scope['path']
+    root_path = scope.get('root_path', '')
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+
+    server = scope.get('server') or ('localhost', 80)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/%s' % scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+
+        if name in environ:
+            value = ','.join((environ[name], value))
+
+        environ[name] = value
+
+    # the body is buffered, its length is known even for chunked requests
+    if body and 'CONTENT_LENGTH' not in environ:
+        environ['CONTENT_LENGTH'] = str(len(body))
+
+    return environ
+
+
+async def _too_large(send):
+    """ Answer an ASGI HTTP connection with ``413 Request Entity Too Large``.
+    """
+    body = b'Request Entity Too Large'
+    await send({
+        'type': 'http.response.start',
+        'status': 413,
+        'headers': [(b'content-type', b'text/plain'),
+                    (b'content-length', str(len(body)).encode()),
+                    (b'connection', b'close')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def asgi(handler, executor=None, request_factory=None, max_body_size=None):
+    """ Wrap `handler` with an ASGI application interface.
+
+    If `handler` is a coroutine function (an
+    :class:`asynchronous Web request handler <AsyncHandler>` like the
+    :meth:`~.infrastructure.Application.dispatch` service of Web
+    applications) it is called from the event loop, otherwise it is called
+    from a thread pool and if the result is awaitable it is awaited from the
+    event loop. Response bodies that aren't lists are consumed from the
+    thread pool too, like the tasks scheduled by
+    :meth:`Request.after_response` once the Web response is sent.
+
+    The Web request body is read into memory before `handler` is called,
+    bodies larger than `max_body_size` are answered with ``413 Request
+    Entity Too Large`` as soon as the limit is exceeded.
+
+    :param handler: A :class:`Web request handler <Handler>` or
+        :class:`asynchronous Web request handler <AsyncHandler>`.
+    :param executor: The :mod:`concurrent.futures` executor used as thread
+        pool, the event loop default executor is used if not given.
+    :param request_factory: The Web request implementation, :class:`Request`
+        by default.
+    :param max_body_size: The Web request body size limit, the
+        :attr:`~RequestServices.max_body_size` of the Web request
+        implementation by default or 16 MiB if it has none.
+    :return: An `ASGI <https://asgi.readthedocs.io>`_ application.
+    """
+    if request_factory is None:
+        request_factory = Request
+
+    if max_body_size is None:
+        max_body_size = getattr(request_factory, 'max_body_size', None) or \
+            16 * 1024 * 1024
+
+    is_async = inspect.iscoroutinefunction(handler) or \
+        inspect.iscoroutinefunction(getattr(handler, '__call__', None))
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @functools.wraps(handler)
+    async def asgi_app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await lifespan(receive, send)
+
+        if scope['type'] != 'http':
+            raise ValueError('unsupported ASGI scope type %r' % scope['type'])
+
+        loop = asyncio.get_running_loop()
+
+        for name, value in scope.get('headers', ()):
+            if name.lower() == b'content-length' and value.isdigit() and \
+                    int(value) > max_body_size:
+                return await _too_large(send)
+
+        # read the entire request body, its size is checked as it is read
+        body = []
+        size = 0
+        while True:
+            message = await receive()
+
+            if message['type'] == 'http.disconnect':
+                return
+
+            body.append(message.get('body', b''))
+            size += len(body[-1])
+            if size > max_body_size:
+                return await _too_large(send)
+
+            if not message.get('more_body', False):
+                break
+
+        environ = _environ(scope, b''.join(body))
+        request = request_factory(environ)
+
+        if is_async:
+            response = await handler(request)
+            context = contextvars.copy_context()
+        else:
+            # the context is reused to produce the response body
+            context = contextvars.copy_context()
+            response = await loop.run_in_executor(
+                executor, context.run, handler, request)
+
+            if inspect.isawaitable(response):
+                response = await response
+
+        # use the response WSGI interface to produce the status and body
+        start = []
+
+        def start_response(status, headers, exc_info=None):
+            start[:] = [status, headers]
+
+        app_iter = response(environ, start_response)
+
+        await send({
+            'type': 'http.response.start',
+            'status': int(start[0].split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin-1'),
+                         value.encode('latin-1'))
+                        for name, value in start[1]],
+        })
+
+        try:
+            if isinstance(app_iter, (list, tuple)):
+                for chunk in app_iter:
+                    await send({'type': 'http.response.body', 'body': chunk,
+                                'more_body': True})
+            else:
+                chunks = iter(app_iter)
+                while True:
+                    chunk = await loop.run_in_executor(
+                        executor, context.run, next, chunks, None)
+
+                    if chunk is None:
+                        break
+
+                    await send({'type': 'http.response.body', 'body': chunk,
+                                'more_body': True})
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+        await send({'type': 'http.response.body', 'body': b''})
+
+        if 'aurora.after_response' in environ:
+            await loop.run_in_executor(
+                executor, context.run, _after_response, environ)
+
+    return asgi_app
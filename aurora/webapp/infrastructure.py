@@ -27,12 +27,64 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
 # EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import asyncio
+import contextvars
+import inspect
+import time
 from urllib import parse as urllib_parse
-from .import foundation, mapping
+from aurora import di, event
+from .import foundation, mapping, metrics
 
 __all__ = ['Application']
 
 
+async def _await(awaitable):
+    return await awaitable
+
+
+def _complete(result):
+    """ Run `result` to completion if it is an awaitable object.
+    """
+    if inspect.isawaitable(result):
+        return asyncio.run(_await(result))
+
+    return result
+
+
+class _Finishing:
+    """ Streamed Web response body calling `finish` once it is closed.
+
+    The `profile` (if any) is enabled while the chunks are produced.
+    """
+
+    def __init__(self, app_iter, finish, profile=None):
+        self.app_iter = app_iter
+        self.finish = finish
+        self.profile = profile
+
+    def __iter__(self):
+        chunks = iter(self.app_iter)
+        while True:
+            if self.profile is not None:
+                self.profile.enable()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                if self.profile is not None:
+                    self.profile.disable()
+
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self.app_iter, 'close'):
+                self.app_iter.close()
+        finally:
+            self.finish()
+
+
 class Application:
     """ Web application.
 
@@ -45,27 +97,124 @@ class Application:
     :class:`Web request <.foundation.Request>` handling strategy has been
     built on top of the Web request path mapping components. The
     characteristic used as :class:`Web request <.foundation.Request>` handler
-    is ``_handler``. All characteristics except ``_handler`` update the
-    :class:`Web request <.foundation.Request>` ``GET`` mapping.
+    is ``_handler``. All characteristics except ``_handler`` are available
+    from the :attr:`Web request characteristics
+    <.foundation.Request.characteristics>` mapping, they update the
+    :class:`Web request <.foundation.Request>` ``GET`` mapping too if
+    :attr:`merge_characteristics` is set.
 
     The :class:`Web request <.foundation.Request>` handling strategy can be
     extended by implementing the :meth:`pre_dispatch` and :meth:`post_dispatch`
     services. In order to provide plug-able extension points this services
-    can be replaced with event dispatchers.
+    can be replaced with event dispatchers. The time spent on every phase of
+    the Web request handling strategy is recorded if :attr:`metrics` is set
+    (see :mod:`.metrics`) and sampled Web requests are profiled if
+    :attr:`profiler` is set (see :mod:`.profiling`). The Web requests
+    handled concurrently are limited if :attr:`admission` is set (see
+    :mod:`.admission`), the :meth:`dispatch` service record the metrics
+    only. The tasks scheduled using :meth:`Web request
+    after_response <.foundation.Request.after_response>` run on the
+    :attr:`tasks` pool if set (see :mod:`.tasks`).
+
+    The :class:`Web request <.foundation.Request>` been handled is tracked
+    using context local storage, therefore a single Web application object
+    can handle Web requests concurrently from multiple threads or
+    :mod:`asyncio` tasks.
+
+    Web request handlers and extension services can be
+    :class:`asynchronous <.foundation.AsyncHandler>`. The :meth:`dispatch`
+    service is the :class:`asynchronous Web request handler
+    <.foundation.AsyncHandler>` variant of the Web application, it await
+    asynchronous services from the running event loop and call synchronous
+    Web request handlers from the :attr:`executor` thread pool. When the
+    Web application is called synchronously the awaitable objects are run
+    to completion on a new event loop.
     """
 
+    executor = None  # concurrent.futures executor used by `dispatch` to
+                     # call synchronous Web request handlers, the event loop
+                     # default executor is used if not given.
+
+    metrics = None  # metrics.Metrics object used to record the time spent
+                    # on every Web request handling phase, not recorded if
+                    # not given.
+
+    profiler = None  # profiling.Profiler object used to profile sampled Web
+                     # requests, not profiled if not given.
+
+    admission = None  # admission.AdmissionControl object used to limit the
+                      # Web requests handled concurrently, not limited if
+                      # not given.
+
+    tasks = None  # tasks.TaskPool object running the tasks scheduled to run
+                  # after the Web response is sent, they are run in place
+                  # if not given.
+
+    merge_characteristics = False  # update the Web request GET mapping with
+                                   # the characteristics, for Web request
+                                   # handlers reading them from it.
+
     @property
     def mapper(self) -> mapping.Mapper:
         """ Web request :class:`path mapper <.mapping.Mapper>`.
         """
         try:
-            return self.__mapper
-        except AttributeError:
-            self.__mapper = mapping.Mapper()
+            return self.__dict__['_Application__mapper']
+        except KeyError:
+            mapper = mapping.Mapper()
             #noinspection PyTypeChecker
-            self.__mapper.add_rule(mapping.DefaultRule(),
-                _handler=self.not_found)
-            return self.__mapper
+            mapper.add_rule(mapping.DefaultRule(), _handler=self.not_found)
+
+            # keep the first mapper created if it is created concurrently
+            return self.__dict__.setdefault('_Application__mapper', mapper)
+
+    @property
+    def _request(self) -> contextvars.ContextVar:
+        try:
+            return self.__dict__['_Application__request']
+        except KeyError:
+            return self.__dict__.setdefault(
+                '_Application__request',
+                contextvars.ContextVar('aurora.webapp.request'))
+
+    def warmup(self):
+        """ Prepare the Web application to handle Web requests.
+
+        Web application parts are built lazily, the first Web requests pay
+        for building components, compiling templates and so on. This service
+        do that work beforehand: the Web request path :attr:`mapper` and the
+        components provided by :func:`~aurora.di.create_descriptor`
+        descriptors are built and the ``warmup`` service of the components
+        providing one is invoked (templates are compiled by the
+        :class:`~aurora.webcomponents.views.Views` component and static
+        assets are indexed by the :class:`~aurora.webcomponents.assets.Assets`
+        component for example).
+
+        It is meant to be called before the Web application start handling
+        Web requests, like in the master process of a pre-forking server
+        where the work is done once and shared by the worker processes. See
+        :meth:`freeze` too.
+        """
+        self.mapper
+        self._request
+
+        for name in dir(type(self)):
+            if isinstance(getattr(type(self), name, None), di.Descriptor):
+                warmup = getattr(getattr(self, name), 'warmup', None)
+                if callable(warmup):
+                    warmup()
+
+    def freeze(self):
+        """ Prepare the Web application and make its routing immutable.
+
+        This service call :meth:`warmup` and :meth:`freeze
+        <.mapping.Mapper.freeze>` the Web request path :attr:`mapper`, the
+        lookup structures are built once and no more rules can be added.
+        It is meant to be called once the Web application is completely
+        set up.
+        """
+        self.warmup()
+        self.mapper.freeze()
 
     def not_found(self, request: foundation.Request) -> foundation.Response:
         """ Service invoked for not mapped Web requests.
@@ -90,13 +239,14 @@ class Application:
     def get_request(self) -> foundation.Request:
         """ The Web request been handled by the application.
 
-        The Web application can handle one
-        :class:`Web request <.foundation.Request>` at a time. This service
-        return the :class:`Web request <.foundation.Request>` currently been
-        handled. It is intended to be used by components that provide a
-        request centered service (like HTTP session support).
+        This service return the :class:`Web request <.foundation.Request>`
+        currently been handled by the application in the current thread or
+        :mod:`asyncio` task. It is intended to be used by components that
+        provide a request centered service (like HTTP session support).
+
+        :raise LookupError: If there is no Web request been handled.
         """
-        return self.__request
+        return self._request.get()
 
     def url_for(self, **characteristics) -> str:
         """ Create a fully usable url.
@@ -117,6 +267,35 @@ class Application:
             self.mapper.assemble(**characteristics)
         )
 
+    def url_for_many(self, values, **characteristics) -> list:
+        """ Create many fully usable urls at once.
+
+        This is the bulk version of :meth:`url_for` intended for listing
+        pages. The relative urls are produced by the
+        :meth:`~.mapping.Mapper.assemble_many` service of the application's
+        Web request path :attr:`.mapper` and the
+        :class:`Web request <.foundation.Request>` application url is
+        resolved once for all of them.
+
+        :param values: An iterable of characteristics mappings.
+        :param characteristics: The Web request path characteristics shared
+            by all urls.
+        :return: A list of fully usable urls.
+        """
+        base = self.get_request().application_url
+        origin = urllib_parse.urljoin(base, '/')[:-1]
+
+        urls = []
+        for path in self.mapper.assemble_many(values, **characteristics):
+            # absolute paths without dot segments don't need to be resolved
+            if path and path[:1] == '/' and path[:2] != '//' and \
+                    '/.' not in path:
+                urls.append(''.join((origin, path)))
+            else:
+                urls.append(urllib_parse.urljoin(base, path))
+
+        return urls
+
     def pre_dispatch(self, request: foundation.Request):
         """ Web request handling strategy extension.
 
@@ -135,17 +314,177 @@ class Application:
         :param response: The :class:`Web response <.foundation.Response>`.
         """
 
-    def __call__(self, request: foundation.Request) -> foundation.Response:
-        # register request for latter retrieval
-        self.__request = request
+    def _route(self, request: foundation.Request) -> foundation.Handler:
+        """ Map the Web request and return its Web request handler.
+        """
+        # register request for latter retrieval, it is kept after the call
+        # because the response body may be produced while it is sent
+        self._request.set(request)
 
         characteristics = self.mapper.match(request.path_info)
-        handler = characteristics['_handler']
-        del characteristics['_handler']
-        request.GET.update(characteristics)
+        handler = characteristics.pop('_handler')
+        request.environ['aurora.characteristics'] = characteristics
+
+        if self.merge_characteristics:
+            request.GET.update(characteristics)
+
+        if self.tasks is not None:
+            request.environ['aurora.submit'] = self.tasks.submit
+
+        return handler
+
+    def _supervise(self, request: foundation.Request) -> \
+            foundation.Response:
+        """ Handle the Web request under the admission control, profiler and
+        metrics.
+
+        The Web request is admitted and profiled after being mapped, streamed
+        Web response bodies are profiled and keep the admission slot until
+        they are closed. Time spent on every phase is recorded, waiting for
+        admission included.
+        """
+        clock = time.perf_counter
+        timings = {}
+
+        start = clock()
+        handler = self._route(request)
+        matched = clock()
+
+        admission = self.admission
+        if admission is not None:
+            limit = request.characteristics.pop(admission.limit_key, None)
+            if not admission.acquire(handler, limit):
+                return admission.reject(request)
+
+            admitted = clock()
+            timings['admission'] = admitted - matched
+        else:
+            admitted = matched
+
+        profile = None
+        if self.profiler is not None:
+            profile = self.profiler.sample(handler)
+
+        def finish():
+            try:
+                if profile is not None:
+                    self.profiler.record(handler, profile)
+            finally:
+                if admission is not None:
+                    admission.release(handler, limit)
+
+        try:
+            try:
+                if profile is not None:
+                    profile.enable()
+
+                _complete(self.pre_dispatch(request))
+                dispatched = clock()
+                response = _complete(handler(request))
+                handled = clock()
+
+                if isinstance(self.post_dispatch, event.Event):
+                    started = handled
+                    for listener in self.post_dispatch:
+                        _complete(listener(response))
+                        finished = clock()
+                        timings['post_dispatch:' + metrics.name(listener)] = \
+                            finished - started
+                        started = finished
+                else:
+                    _complete(self.post_dispatch(response))
+
+                end = clock()
+            finally:
+                if profile is not None:
+                    profile.disable()
+        except BaseException:
+            finish()
+            raise
+
+        # streamed bodies are produced once returned, files are just sent
+        if (profile is None and admission is None) or isinstance(
+                response.app_iter, (list, tuple, foundation.FileIter)):
+            finish()
+        else:
+            content_length = response.content_length
+            response.app_iter = _Finishing(response.app_iter, finish, profile)
+            response.content_length = content_length
+
+        if self.metrics is not None:
+            timings.update(match=matched - start,
+                           pre_dispatch=dispatched - admitted,
+                           handler=handled - dispatched,
+                           post_dispatch=end - handled,
+                           total=end - start)
+            self.metrics.record(handler, timings)
+
+        return response
+
+    def __call__(self, request: foundation.Request) -> foundation.Response:
+        if self.metrics is not None or self.profiler is not None or \
+                self.admission is not None:
+            return self._supervise(request)
+
+        handler = self._route(request)
+
+        _complete(self.pre_dispatch(request))
+        response = _complete(handler(request))
+        _complete(self.post_dispatch(response))
+
+        return response
+
+    async def dispatch(self, request: foundation.Request) -> \
+            foundation.Response:
+        """ Handle the Web request from the running event loop.
+
+        This service implement the :class:`asynchronous Web request handler
+        <.foundation.AsyncHandler>` protocol and is meant to be served using
+        the :func:`.foundation.asgi` adapter.
+
+        The time spent on every phase is recorded if :attr:`metrics` is set
+        (without a phase per ``post_dispatch`` listener). The
+        :attr:`profiler` and :attr:`admission` are not applied: a profile
+        would record the other Web requests handled by the event loop in the
+        meantime and waiting for admission would block the event loop.
+
+        :param request: The :class:`Web request <.foundation.Request>`.
+        :return: The :class:`Web response <.foundation.Response>`.
+        """
+        clock = time.perf_counter
+
+        start = clock()
+        handler = self._route(request)
+        matched = clock()
+
+        result = self.pre_dispatch(request)
+        if inspect.isawaitable(result):
+            await result
+        dispatched = clock()
+
+        if inspect.iscoroutinefunction(handler):
+            response = await handler(request)
+        else:
+            response = await asyncio.get_running_loop().run_in_executor(
+                self.executor, contextvars.copy_context().run, handler,
+                request)
+
+            if inspect.isawaitable(response):
+                response = await response
+        handled = clock()
+
+        result = self.post_dispatch(response)
+        if inspect.isawaitable(result):
+            await result
+        end = clock()
 
-        self.pre_dispatch(request)
-        response = handler(request)
-        self.post_dispatch(response)
+        if self.metrics is not None:
+            self.metrics.record(handler, {
+                'match': matched - start,
+                'pre_dispatch': dispatched - matched,
+                'handler': handled - dispatched,
+                'post_dispatch': end - handled,
+                'total': end - start,
+            })
 
         return response
\ No newline at end of file
@@ -0,0 +1,723 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+""" Lightweight Web request and response implementation.
+
+The default :class:`~.foundation.Request` and :class:`~.foundation.Response`
+pair is built on WebOb, it provide the complete HTTP toolkit at the cost of
+building rich objects for every Web request. This module provide a lean
+alternative using ``__slots__`` whose parts are parsed on first use, it
+implement the subset used by the Aurora Web applications:
+
+* Web requests: ``environ``, ``method``, ``script_name``, ``path_info``,
+  ``path``, ``path_qs``, ``query_string``, ``GET``, ``POST``, ``params``,
+  ``cookies``, ``headers``, ``content_type``, ``content_length``,
+  ``body_file``, ``body``, ``host_url``, ``application_url``,
+  ``if_modified_since`` and the
+  :class:`Aurora services <.foundation.RequestServices>`.
+* Web responses: ``status``, ``status_int``, ``headers``, ``headerlist``,
+  ``content_type``, ``charset``, ``content_length``, ``last_modified``,
+  ``location``, ``body``, ``text``, ``app_iter``, ``set_cookie`` and
+  ``delete_cookie``.
+
+It is selected using the `request_factory` argument of the
+:func:`~.foundation.wsgi` adapter::
+
+    application = foundation.wsgi(blog, request_factory=lean.Request)
+
+The :mod:`~aurora.webcomponents.assets`,
+:mod:`~aurora.webcomponents.conditional`,
+:mod:`~aurora.webcomponents.layout`, :mod:`~aurora.webcomponents.session`
+and :mod:`~aurora.webcomponents.views` components work with both
+implementations. The :mod:`~aurora.webcomponents.cache` and
+:mod:`~aurora.webcomponents.compression` components rely on other WebOb
+features (the typed ``Cache-Control`` and ``Vary`` headers) and require the
+default implementation.
+"""
+
+import datetime
+import http.client
+import io
+from email import utils as email_utils
+from urllib import parse as urllib_parse
+
+from . import foundation
+
+__all__ = ['MultiDict', 'Headers', 'Request', 'Response']
+
+# content types whose parameters include the charset
+_TEXT_TYPES = ('text/', 'application/json', 'application/javascript',
+               'application/xml')
+
+_FORM_TYPES = ('application/x-www-form-urlencoded', 'multipart/form-data')
+
+
+def _parse_date(value: str or None) -> datetime.datetime or None:
+    """ Parse a HTTP date into an UTC datetime, `None` if it is invalid.
+    """
+    if not value:
+        return None
+
+    try:
+        date = email_utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+
+    return date
+
+
+def _format_date(value) -> str:
+    """ Format a datetime (UTC if naive) or timestamp as a HTTP date.
+
+    Strings are considered already formatted.
+    """
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        value = value.timestamp()
+
+    if isinstance(value, (int, float)):
+        return email_utils.formatdate(value, usegmt=True)
+
+    return value
+
+
+class MultiDict(dict):
+    """ Mapping of names to its last value keeping all the values.
+    """
+
+    __slots__ = ('_multiple', )
+
+    def __init__(self, items=()):
+        super().__init__()
+        self._multiple = {}
+
+        for key, value in items:
+            if key in self:
+                self._multiple.setdefault(key, [self[key]]).append(value)
+            dict.__setitem__(self, key, value)
+
+    def __setitem__(self, key, value):
+        self._multiple.pop(key, None)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._multiple.pop(key, None)
+        dict.__delitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def getall(self, key) -> list:
+        """ Return all the values of `key`.
+        """
+        if key in self._multiple:
+            return list(self._multiple[key])
+
+        return [self[key]] if key in self else []
+
+    def items_all(self) -> list:
+        """ Return the (key, value) pairs including repeated keys.
+        """
+        return [(key, value) for key in self for value in self.getall(key)]
+
+
+class Headers:
+    """ Case insensitive mapping view of a (name, value) pairs list.
+    """
+
+    __slots__ = ('headerlist', )
+
+    def __init__(self, headerlist: list):
+        self.headerlist = headerlist
+
+    def get(self, name: str, default=None):
+        name = name.lower()
+        for key, value in self.headerlist:
+            if key.lower() == name:
+                return value
+
+        return default
+
+    def getall(self, name: str) -> list:
+        name = name.lower()
+        return [value for key, value in self.headerlist
+                if key.lower() == name]
+
+    def __getitem__(self, name: str):
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+
+        return value
+
+    def __setitem__(self, name: str, value: str):
+        self.pop(name)
+        self.headerlist.append((name, value))
+
+    def __delitem__(self, name: str):
+        if self.pop(name) is None:
+            raise KeyError(name)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def __iter__(self):
+        return (key for key, value in self.headerlist)
+
+    def __len__(self) -> int:
+        return len(self.headerlist)
+
+    def add(self, name: str, value: str):
+        self.headerlist.append((name, value))
+
+    def pop(self, name: str, default=None):
+        value = default
+        lower = name.lower()
+        for index in range(len(self.headerlist) - 1, -1, -1):
+            if self.headerlist[index][0].lower() == lower:
+                value = self.headerlist.pop(index)[1]
+
+        return value
+
+    def items(self) -> list:
+        return list(self.headerlist)
+
+
+class _EnvironHeaders:
+    """ Read only mapping view of the WSGI environment HTTP headers.
+    """
+
+    __slots__ = ('environ', )
+
+    def __init__(self, environ: dict):
+        self.environ = environ
+
+    @staticmethod
+    def _key(name: str) -> str:
+        key = name.upper().replace('-', '_')
+        if key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            return key
+
+        return 'HTTP_' + key
+
+    def get(self, name: str, default=None):
+        return self.environ.get(self._key(name), default)
+
+    def __getitem__(self, name: str):
+        return self.environ[self._key(name)]
+
+    def __contains__(self, name: str) -> bool:
+        return self._key(name) in self.environ
+
+
+class _LimitedInput:
+    """ Request body stream limited to the request content length.
+    """
+
+    __slots__ = ('_stream', '_remaining')
+
+    def __init__(self, stream, length: int):
+        self._stream = stream
+        self._remaining = length
+
+    def read(self, size=-1) -> bytes:
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+
+        data = self._stream.read(size) if size else b''
+        self._remaining -= len(data)
+
+        return data
+
+    def readline(self, size=-1) -> bytes:
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+
+        data = self._stream.readline(size) if size else b''
+        self._remaining -= len(data)
+
+        return data
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+
+class Request(foundation.RequestServices):
+    """ Lightweight Web request.
+
+    The query string, form body and cookies are parsed the first time they
+    are accessed.
+
+    :param environ: The WSGI environment.
+    """
+
+    __slots__ = ('environ', '_GET', '_POST', '_cookies')
+
+    charset = 'UTF-8'
+
+    def __init__(self, environ: dict):
+        self.environ = environ
+        self._GET = None
+        self._POST = None
+        self._cookies = None
+
+    @classmethod
+    def blank(cls, path: str, environ=None, **kwargs) -> 'Request':
+        """ Create a Web request for `path` (for testing purposes).
+
+        :param path: The Web request path, it may include a query string.
+        :param environ: Additional WSGI environment elements.
+        :param kwargs: Additional WSGI environment elements.
+        """
+        path, _, query = path.partition('?')
+
+        env = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': urllib_parse.unquote(path, 'latin-1'),
+            'QUERY_STRING': query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'HTTP_HOST': 'localhost:80',
+            'SERVER_PROTOCOL': 'HTTP/1.0',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.multithread': False,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        if environ:
+            env.update(environ)
+        env.update(kwargs)
+
+        return cls(env)
+
+    @property
+    def response_factory(self) -> 'Response':
+        """ Factory used to produce a :class:`Web response <Response>` object.
+        """
+        return Response
+
+    @property
+    def method(self) -> str:
+        return self.environ['REQUEST_METHOD']
+
+    @property
+    def script_name(self) -> str:
+        return self.environ.get('SCRIPT_NAME', '')
+
+    @property
+    def path_info(self) -> str:
+        return self.environ.get('PATH_INFO', '')
+
+    @property
+    def query_string(self) -> str:
+        return self.environ.get('QUERY_STRING', '')
+
+    @property
+    def path(self) -> str:
+        """ The quoted script name and path info.
+        """
+        return urllib_parse.quote(
+            (self.script_name + self.path_info).encode('latin-1'),
+            safe="/:@&+$,;=!*'()~")
+
+    @property
+    def path_qs(self) -> str:
+        """ The quoted path followed by the query string if any.
+        """
+        query = self.query_string
+        return self.path + '?' + query if query else self.path
+
+    @property
+    def host_url(self) -> str:
+        """ The scheme and host, like ``http://example.com:8080``.
+        """
+        environ = self.environ
+        scheme = environ['wsgi.url_scheme']
+        default = ':443' if scheme == 'https' else ':80'
+
+        host = environ.get('HTTP_HOST')
+        if host is None:
+            host = environ['SERVER_NAME'] + ':' + environ['SERVER_PORT']
+
+        if host.endswith(default):
+            host = host[:-len(default)]
+
+        return scheme + '://' + host
+
+    @property
+    def application_url(self) -> str:
+        """ The host url followed by the quoted script name.
+        """
+        return self.host_url + urllib_parse.quote(
+            self.script_name.encode('latin-1'))
+
+    @property
+    def headers(self) -> _EnvironHeaders:
+        """ Read only mapping of the Web request headers.
+        """
+        return _EnvironHeaders(self.environ)
+
+    @property
+    def content_type(self) -> str:
+        """ The body content type without parameters.
+        """
+        return self.environ.get('CONTENT_TYPE', '').partition(';')[0].strip()
+
+    @property
+    def content_length(self) -> int or None:
+        length = self.environ.get('CONTENT_LENGTH')
+        return int(length) if length else None
+
+    @property
+    def if_modified_since(self) -> datetime.datetime or None:
+        """ The ``If-Modified-Since`` header as an UTC datetime.
+        """
+        return _parse_date(self.environ.get('HTTP_IF_MODIFIED_SINCE'))
+
+    @property
+    def GET(self) -> MultiDict:
+        """ Query string variables.
+        """
+        if self._GET is None:
+            self._GET = MultiDict(urllib_parse.parse_qsl(
+                self.query_string, keep_blank_values=True,
+                encoding=self.charset))
+
+        return self._GET
+
+    @property
+    def POST(self) -> MultiDict:
+        """ Form variables of ``POST``, ``PUT`` and ``PATCH`` Web requests.
+
+        Files uploaded with ``multipart/form-data`` bodies are
+        :class:`~.multipart.Part` objects (see
+        :class:`~.foundation.RequestServices`).
+        """
+        if self._POST is None:
+            content_type = self.content_type
+            if self.method not in ('POST', 'PUT', 'PATCH') or \
+                    content_type not in _FORM_TYPES:
+                self._POST = MultiDict()
+            elif content_type == _FORM_TYPES[0]:
+                self._check_body()
+                self._POST = MultiDict(urllib_parse.parse_qsl(
+                    self.body.decode('latin-1'), keep_blank_values=True,
+                    encoding=self.charset))
+            else:
+                self._POST = MultiDict(self._parse_form())
+
+        return self._POST
+
+    @property
+    def params(self) -> MultiDict:
+        """ Query string and form variables, query string ones first.
+        """
+        return MultiDict(self.POST.items_all() + self.GET.items_all())
+
+    @property
+    def cookies(self) -> dict:
+        """ Cookies sent by the client browser.
+        """
+        if self._cookies is None:
+            self._cookies = {}
+            for cookie in self.environ.get('HTTP_COOKIE', '').split(';'):
+                name, sep, value = cookie.partition('=')
+                if not sep:
+                    continue
+
+                value = value.strip()
+                if len(value) > 1 and value[0] == value[-1] == '"':
+                    value = value[1:-1]
+
+                self._cookies[name.strip()] = value
+
+        return self._cookies
+
+    @property
+    def body_file(self):
+        """ Stream of the Web request body, limited to its content length.
+
+        Bodies of unknown length are read until the end of the stream if
+        the WSGI server set ``wsgi.input_terminated``, they are empty
+        otherwise.
+        """
+        length = self.content_length
+        if length is None and self.environ.get('wsgi.input_terminated'):
+            return self.environ['wsgi.input']
+
+        return _LimitedInput(self.environ['wsgi.input'], length or 0)
+
+    @property
+    def body(self) -> bytes:
+        """ The Web request body.
+
+        The body is read once, the WSGI input stream is replaced with an
+        in memory copy.
+        """
+        body = self.body_file.read()
+
+        self.environ['wsgi.input'] = io.BytesIO(body)
+        self.environ['CONTENT_LENGTH'] = str(len(body))
+
+        return body
+
+
+class Response:
+    """ Lightweight Web response.
+
+    :param body: The Web response body as bytes.
+    :param status: The status code or line, ``200 OK`` by default.
+    :param headerlist: The list of (name, value) header pairs.
+    :param app_iter: The Web response body as an iterable of bytes.
+    :param content_type: The content type, ``text/html`` by default.
+    :param charset: The charset of text content types.
+    :param text: The Web response body as text.
+    """
+
+    __slots__ = ('_status', 'headerlist', '_app_iter', '_body', '_charset')
+
+    default_content_type = 'text/html'
+
+    default_charset = 'UTF-8'
+
+    def __init__(self, body: bytes = None, status=None, headerlist=None,
+                 app_iter=None, content_type=None, charset=None,
+                 text: str = None):
+        self.status = status or 200
+        self.headerlist = headerlist if headerlist is not None else []
+        self._app_iter = None
+        self._body = b''
+        self._charset = charset or self.default_charset
+
+        if headerlist is None or content_type is not None:
+            self.content_type = content_type or self.default_content_type
+
+        if text is not None:
+            self.text = text
+        elif app_iter is not None:
+            self.app_iter = app_iter
+        else:
+            self.body = body if body is not None else b''
+
+    @property
+    def status(self) -> str:
+        """ The status line, like ``200 OK``.
+        """
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        if isinstance(value, int):
+            value = '%d %s' % (value, http.client.responses.get(value, ''))
+
+        self._status = value.strip()
+
+    @property
+    def status_int(self) -> int:
+        return int(self._status.split(' ', 1)[0])
+
+    @status_int.setter
+    def status_int(self, value: int):
+        self.status = value
+
+    @property
+    def headers(self) -> Headers:
+        """ Case insensitive mapping of the Web response headers.
+        """
+        return Headers(self.headerlist)
+
+    @property
+    def charset(self) -> str or None:
+        return self._charset
+
+    @charset.setter
+    def charset(self, value: str):
+        self._charset = value
+        if self.content_type:
+            self.content_type = self.content_type
+
+    @property
+    def content_type(self) -> str:
+        """ The content type without parameters.
+
+        The charset parameter is added to text content types, the header is
+        removed if it is set to `None`.
+        """
+        return (Headers(self.headerlist).get('Content-Type') or '').partition(
+            ';')[0].strip()
+
+    @content_type.setter
+    def content_type(self, value: str or None):
+        if value is None:
+            Headers(self.headerlist).pop('Content-Type')
+            return
+
+        if ';' not in value and self._charset and \
+                value.startswith(_TEXT_TYPES):
+            value += '; charset=' + self._charset
+
+        Headers(self.headerlist)['Content-Type'] = value
+
+    @property
+    def content_length(self) -> int or None:
+        length = Headers(self.headerlist).get('Content-Length')
+        return int(length) if length is not None else None
+
+    @content_length.setter
+    def content_length(self, value: int or None):
+        headers = Headers(self.headerlist)
+        if value is None:
+            headers.pop('Content-Length')
+        else:
+            headers['Content-Length'] = str(value)
+
+    @property
+    def last_modified(self) -> datetime.datetime or None:
+        """ The ``Last-Modified`` header as an UTC datetime.
+
+        It is set from a datetime (UTC if naive), a timestamp or a HTTP
+        date, the header is removed if it is set to `None`.
+        """
+        return _parse_date(Headers(self.headerlist).get('Last-Modified'))
+
+    @last_modified.setter
+    def last_modified(self, value):
+        headers = Headers(self.headerlist)
+        if value is None:
+            headers.pop('Last-Modified')
+        else:
+            headers['Last-Modified'] = _format_date(value)
+
+    @property
+    def location(self) -> str or None:
+        """ The ``Location`` header, removed if it is set to `None`.
+        """
+        return Headers(self.headerlist).get('Location')
+
+    @location.setter
+    def location(self, value: str or None):
+        headers = Headers(self.headerlist)
+        if value is None:
+            headers.pop('Location')
+        else:
+            headers['Location'] = value
+
+    @property
+    def body(self) -> bytes:
+        """ The Web response body, produced bodies are consumed.
+        """
+        if self._app_iter is not None:
+            app_iter = self._app_iter
+            try:
+                self.body = b''.join(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+
+        return self._body
+
+    @body.setter
+    def body(self, value: bytes):
+        self._app_iter = None
+        self._body = value
+        self.content_length = len(value)
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self._charset or self.default_charset)
+
+    @text.setter
+    def text(self, value: str):
+        self.body = value.encode(self._charset or self.default_charset)
+
+    @property
+    def app_iter(self):
+        """ The Web response body as an iterable of bytes.
+
+        The content length is unknown once it is set.
+        """
+        if self._app_iter is None:
+            return [self._body]
+
+        return self._app_iter
+
+    @app_iter.setter
+    def app_iter(self, value):
+        self._app_iter = value
+        self._body = b''
+        self.content_length = None
+
+    def set_cookie(self, name: str, value: str, max_age: int = None,
+                   path='/', domain: str = None, secure=False,
+                   httponly=False, samesite: str = None):
+        """ Add a ``Set-Cookie`` header.
+
+        :param max_age: Seconds until the cookie expire, a session cookie
+            if not given.
+        """
+        cookie = ['%s=%s' % (name, value)]
+        if max_age is not None:
+            cookie.append('Max-Age=%d' % max_age)
+        if path:
+            cookie.append('Path=' + path)
+        if domain:
+            cookie.append('Domain=' + domain)
+        if secure:
+            cookie.append('secure')
+        if httponly:
+            cookie.append('HttpOnly')
+        if samesite:
+            cookie.append('SameSite=' + samesite)
+
+        self.headerlist.append(('Set-Cookie', '; '.join(cookie)))
+
+    def delete_cookie(self, name: str, path='/', domain: str = None):
+        """ Expire a cookie on the client browser.
+        """
+        self.set_cookie(name, '', 0, path, domain)
+
+    def __call__(self, environ: dict, start_response):
+        """ WSGI application interface.
+        """
+        start_response(self._status, self.headerlist)
+
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            if hasattr(self._app_iter, 'close'):
+                self._app_iter.close()
+            return []
+
+        return self.app_iter
@@ -29,9 +29,14 @@
 
 import abc
 import collections
+import functools
+import heapq
+import operator
 import re
+from urllib import parse as urllib_parse
 
-__all__ = ['Rule', 'Route', 'DefaultRule', 'Mapper']
+__all__ = ['Rule', 'Route', 'DefaultRule', 'Mapper', 'TrieEngine',
+           'RegexEngine']
 
 
 class Rule(metaclass=abc.ABCMeta):
@@ -43,6 +48,10 @@ class Rule(metaclass=abc.ABCMeta):
 
     This class is not meant to be inherited it is here just for interface
     documentation purposes.
+
+    Rules whose mapping depend on external state (like the filesystem) can
+    provide a ``cacheable`` attribute set to `False` to prevent the
+    :class:`Mapper` from caching its results.
     """
 
     @abc.abstractmethod
@@ -84,7 +93,9 @@ class Route:
 
     At initialization the pattern is passed as first positional argument,
     other named arguments are used as default values for any optional
-    pattern group.
+    pattern group. The pattern is compiled once at initialization into an
+    assembly template made of the literal parts of the pattern and a slot
+    for every group, therefore :meth:`assemble` calls just fill the slots.
     """
 
     dialect = re.compile(r"\(\?P<(\w+)>\\(\w+)\+\)")
@@ -98,6 +109,25 @@ class Route:
         self._defaults = defaults
         self._pattern = self._re.pattern.strip('^$*')
 
+        # compile the assembly template
+        template = [self._prefix.replace('%', '%%')]
+        self._slots = []
+        last_pos = 0
+        for match in self.dialect.finditer(self._pattern):
+            template.append(
+                self._pattern[last_pos:match.start()].replace('%', '%%'))
+            template.append('%s')
+            self._slots.append(match.group(1))
+            last_pos = match.end()
+
+        template.append(self._pattern[last_pos:].replace('%', '%%'))
+        self._template = ''.join(template)
+
+        # default values not used by the pattern are rendered as query
+        self._query_defaults = dict(
+            (key, value) for key, value in defaults.items()
+            if key not in self._slots)
+
     def match(self, path):
         # as a performance improvement match first the fixed path segment
         if not path.startswith(self._prefix):
@@ -116,33 +146,26 @@ class Route:
             return False
 
     def assemble(self, **characteristics):
-        _characteristics = dict(self._defaults)
-        _characteristics.update(characteristics)
-
-        path = [self._prefix]
-        last_pos = 0
-        for match in self.dialect.finditer(self._pattern):
-            if match.group(1) not in _characteristics:
+        values = []
+        for key in self._slots:
+            if key in characteristics:
+                values.append(characteristics.pop(key))
+            elif key in self._defaults:
+                values.append(self._defaults[key])
+            else:
                 return False
-            path.append(self._pattern[last_pos:match.start()])
-            path.append(str(_characteristics[match.group(1)]))
-            del _characteristics[match.group(1)]
-            last_pos = match.end()
 
-        path.append(self._pattern[last_pos:])
-        path = ''.join(path)
+        path = self._template % tuple(values)
 
-        if len(_characteristics) > 0:
-            path = '?'.join((path, self._render_query(**_characteristics)))
+        if characteristics or self._query_defaults:
+            options = dict(self._query_defaults)
+            options.update(characteristics)
+            path = '?'.join((path, self._render_query(**options)))
 
         return path
 
     def _render_query(self, **options):
-        result = '&'.join(map(
-            lambda item: '='.join((item, options[item])),
-            options))
-
-        return result
+        return urllib_parse.urlencode(options)
 
 
 Rule.register(Route)
@@ -167,6 +190,281 @@ class DefaultRule:
 Rule.register(DefaultRule)
 
 
+def _match_rule(rule: Rule, metadata: dict, path: str) -> dict or False:
+    # evaluate a single mapper entry the way :meth:`Mapper.match` does
+    result = rule.match(path)
+
+    if result is False:
+        return False
+
+    result.update(metadata)
+    return result
+
+
+def _assemble_rule(rule: Rule, metadata: dict, characteristics: dict,
+                   annotation_keys=frozenset()) -> str or False:
+    # evaluate a single mapper entry the way :meth:`Mapper.assemble` does
+    options = characteristics.copy()
+    for key, value in metadata.items():
+        if key in annotation_keys:
+            options.pop(key, None)
+            continue
+
+        if key not in options or options[key] != value:
+            return False
+
+        del options[key]
+
+    return rule.assemble(**options)
+
+
+class _TrieNode:
+
+    def __init__(self, regex=None):
+        self.regex = regex
+        self.static = {}
+        self.dynamic = {}
+        self.literal_lengths = set()
+        self.positions = []
+
+
+class TrieEngine:
+    """ Mapper engine that index :class:`Route` objects into a segment trie.
+
+    The Web request path is split at the ``/`` character and every segment is
+    looked up first on the static children of the current trie node and then
+    on the regex ones. Regex children are grouped by the literal text that
+    start the segment, so only the groups whose literal text start the path
+    segment are evaluated. The :class:`Route` objects stored at the nodes
+    reached are the only candidates evaluated, so the cost of a lookup
+    depends on the depth of the path and not on the number of rules.
+
+    Rules that can't be indexed (opaque :class:`Rule` implementations like
+    :class:`DefaultRule` or routes using regex constructs outside the
+    :attr:`Route.dialect`) are always candidates. Candidates are evaluated in
+    the same order used by the :class:`Mapper` linear scan, therefore the
+    most recently added rule still wins.
+    """
+
+    # literal characters and dialect groups allowed on indexed segments
+    segment_syntax = re.compile(
+        r"(?:[\w\-~,;:@=!&'%]|\(\?P<\w+>\\[wd]\+\))*\Z")
+
+    def __init__(self, rules: collections.Sequence):
+        self._rules = tuple(rules)
+        self._root = _TrieNode()
+        self._opaque = []
+
+        for position, (rule, metadata) in enumerate(self._rules):
+            segments = self._segments(rule)
+
+            if segments is None:
+                self._opaque.append(position)
+                continue
+
+            node = self._root
+            for literal, pattern in segments:
+                if pattern is None:
+                    node = node.static.setdefault(literal, _TrieNode())
+                else:
+                    node.literal_lengths.add(len(literal))
+                    children = node.dynamic.setdefault(literal, {})
+                    if pattern not in children:
+                        children[pattern] = _TrieNode(
+                            re.compile(''.join((pattern, r'\Z'))))
+                    node = children[pattern]
+
+            node.positions.append(position)
+
+    def _segments(self, rule: Rule) -> list or None:
+        """ Split a :class:`Route` pattern into its path segments.
+
+        Every segment is returned as a pair made of its leading literal part
+        and the pattern (with anonymous groups) used to match the rest of it
+        or `None` if the segment is fully static. If the rule can't be indexed
+        then `None` is returned.
+        """
+        if not isinstance(rule, Route):
+            return None
+
+        # the route prefix is compared verbatim while the rest is a regex
+        literals = rule._prefix.split('/')
+        patterns = rule._re.pattern[1:-1].split('/')
+
+        for pattern in patterns:
+            if not self.segment_syntax.match(pattern):
+                return None
+
+        segments = [(literal, None) for literal in literals[:-1]]
+        patterns[0] = (literals[-1], patterns[0])
+        for i, pattern in enumerate(patterns[1:], 1):
+            patterns[i] = ('', pattern)
+
+        for literal, pattern in patterns:
+            match = Route.dialect.search(pattern)
+            if match:
+                segments.append((
+                    ''.join((literal, pattern[:match.start()])),
+                    Route.dialect.sub(
+                        lambda match: ''.join(
+                            ('(?:\\', match.group(2), '+)')),
+                        pattern[match.start():])
+                ))
+            else:
+                # without groups the pattern is made of literal characters
+                segments.append((''.join((literal, pattern)), None))
+
+        return segments
+
+    def _collect(self, node: _TrieNode, segments: list, index: int,
+                 candidates: list):
+        if index == len(segments):
+            candidates.extend(node.positions)
+            return
+
+        segment = segments[index]
+
+        child = node.static.get(segment)
+        if child is not None:
+            self._collect(child, segments, index + 1, candidates)
+
+        for length in node.literal_lengths:
+            if length > len(segment):
+                continue
+
+            children = node.dynamic.get(segment[:length])
+            if children is None:
+                continue
+
+            for child in children.values():
+                if child.regex.match(segment, length):
+                    self._collect(child, segments, index + 1, candidates)
+
+    def lookup(self, path: str) -> (int, collections.Mapping or False):
+        # a trailing new line is accepted by the `$` regex anchor used by
+        # routes, those paths are rare enough to fallback to a linear scan
+        if path.endswith('\n'):
+            candidates = range(len(self._rules))
+        else:
+            candidates = list(self._opaque)
+            self._collect(self._root, path.split('/'), 0, candidates)
+            candidates.sort()
+
+        for position in candidates:
+            result = _match_rule(*self._rules[position], path=path)
+
+            if result is not False:
+                return position, result
+
+        return len(self._rules), False
+
+    def match(self, path: str) -> collections.Mapping or False:
+        return self.lookup(path)[1]
+
+
+class _RouteAlternation:
+
+    def __init__(self, rules: list):
+        patterns = []
+        self._entries = {}
+
+        for position, rule, metadata in rules:
+            name = ''.join(('_', str(position)))
+            groups = []
+
+            def rename(match):
+                group = '_'.join((name, match.group(1)))
+                groups.append((group, match.group(1)))
+                return ''.join(('(?P<', group, '>'))
+
+            # an empty group appended to the alternative is the last one
+            # closed on a successful match, wrapping the alternative instead
+            # make the regex engine save the group marks on every branch
+            patterns.append(''.join((
+                re.escape(rule._prefix),
+                RegexEngine.group_name.sub(rename, rule._re.pattern[1:-1]),
+                '$(?P<', name, '>)'
+            )))
+
+            self._entries[name] = (position, rule._defaults, groups, metadata)
+
+        self._re = re.compile('|'.join(patterns))
+
+    def lookup(self, path: str) -> (int, dict or False):
+        result = self._re.match(path)
+
+        if not result:
+            return None, False
+
+        position, defaults, groups, metadata = self._entries[result.lastgroup]
+
+        options = dict(defaults)
+        for group, key in groups:
+            value = result.group(group)
+            if value != '':
+                options[key] = value
+
+        options.update(metadata)
+        return position, options
+
+
+class RegexEngine:
+    """ Mapper engine that compile :class:`Route` patterns into a single regex.
+
+    Consecutive :class:`Route` objects are joined into one alternation regex
+    where every alternative is tagged by a named group. A single
+    :func:`re.match` call select the winning rule (the first alternative
+    that match) and extract its characteristics. Rules that can't be joined
+    (opaque :class:`Rule` implementations and routes using regex constructs
+    that depend on its position inside the pattern like alternations, inline
+    flags or backreferences) split the alternation and are evaluated on its
+    own, keeping the precedence of the :class:`Mapper` linear scan.
+    """
+
+    group_name = re.compile(r"\(\?P<(\w+)>")
+
+    # constructs that change their meaning when the pattern is embedded
+    position_dependent = re.compile(r"\||\(\?(?!P<|:|=|!|<=|<!)|\\[1-9]")
+
+    def __init__(self, rules: collections.Sequence):
+        self._steps = []
+        self._size = len(rules)
+
+        batch = []
+        for position, (rule, metadata) in enumerate(rules):
+            if isinstance(rule, Route) and not self.position_dependent.search(
+                    rule._re.pattern[1:-1]):
+                batch.append((position, rule, metadata))
+                continue
+
+            if batch:
+                self._steps.append(_RouteAlternation(batch).lookup)
+                batch = []
+
+            self._steps.append(functools.partial(
+                self._lookup_rule, position, rule, metadata))
+
+        if batch:
+            self._steps.append(_RouteAlternation(batch).lookup)
+
+    @staticmethod
+    def _lookup_rule(position: int, rule: Rule, metadata: dict,
+                     path: str) -> (int, dict or False):
+        return position, _match_rule(rule, metadata, path)
+
+    def lookup(self, path: str) -> (int, collections.Mapping or False):
+        for step in self._steps:
+            position, result = step(path)
+
+            if result is not False:
+                return position, result
+
+        return self._size, False
+
+    def match(self, path: str) -> collections.Mapping or False:
+        return self.lookup(path)[1]
+
+
 class Mapper:
     """ Map a Web request path and its characteristics using multiple rules.
 
@@ -180,18 +478,126 @@ class Mapper:
     added rules are evaluated in the reverse order of addition. This
     implementation detail imply that in order to function correctly generic
     rules must be added first and specific ones latter.
+
+    By default the :meth:`match` method perform a linear scan over the added
+    rules. A compiled routing mode can be selected by providing an engine
+    factory (like :class:`TrieEngine` or :class:`RegexEngine`) at
+    initialization or as the :attr:`engine_factory` attribute. The engine
+    factory is called with the sequence of (rule, metadata) pairs in
+    evaluation order and must return an object providing a ``lookup``
+    method that map the Web request path into the position of the matched
+    rule in that sequence and the characteristics mapping (`False` if no
+    rule match). The engine is created the first time it is needed and
+    rebuilt after a :meth:`add_rule` call.
+
+    Routes without groups (fully static patterns) are also stored on a hash
+    table keyed on its pattern, so :meth:`match` calls for those Web request
+    paths only need to evaluate the rules that aren't static and were added
+    after the matching route.
+
+    The :meth:`match` results can be stored on a bounded LRU cache keyed on
+    the Web request path by setting :attr:`cache_size` to a positive value.
+    The cache is cleared after a :meth:`add_rule` call. Rules that depend on
+    external state can opt out by setting its ``cacheable`` attribute to
+    `False`, in that case no result produced by evaluating the rule is
+    cached (this include results of the rules evaluated after it).
+
+    The :meth:`assemble` method use an index of the added rules keyed on the
+    value of the :attr:`index_key` metadata element (the Web request handler
+    by default). Only the rules indexed under the value of that
+    characteristic and the rules without an hashable value for it are
+    evaluated.
+
+    Metadata elements named in :attr:`annotation_keys` annotate the rules
+    (like the concurrency limit used by the :mod:`.admission` control), they
+    are added to the :meth:`match` results but aren't required by
+    :meth:`assemble`.
+
+    Once all rules are added the mapping can be made immutable using
+    :meth:`freeze`, the lookup structures are built at once instead of on
+    the first :meth:`match` call.
     """
 
-    def __init__(self):
+    engine_factory = None
+
+    frozen = False
+
+    index_key = '_handler'
+
+    annotation_keys = frozenset(['_concurrency'])
+
+    cache_size = 0
+
+    def __init__(self, engine_factory=None, cache_size=None):
         self._rules = []
+        self._engine = None
+        self._cache = collections.OrderedDict()
+        self._cacheable = 0
+        self._index = {}
+        self._not_indexed = []
+        self._metadata_keys = set()
+        self._static = {}
+        self._dynamic = []
+
+        if engine_factory is not None:
+            self.engine_factory = engine_factory
+
+        if cache_size is not None:
+            self.cache_size = cache_size
 
     def add_rule(self, rule: Rule, **metadata):
         """ Add a :class:`Rule` and its associated metadata to the mapping.
 
         :param rule: A mapping :class:`Rule`.
         :param metadata: The :class:`Rule` associated metadata.
+        :raise RuntimeError: If the mapping is frozen.
         """
+        if self.frozen:
+            raise RuntimeError('rules can not be added to a frozen mapper')
+
         self._rules.insert(0, (rule, metadata))
+        self._engine = None
+        self._cache.clear()
+        self._metadata_keys.update(metadata)
+
+        # count the leading rules that allow caching its results
+        if getattr(rule, 'cacheable', True):
+            self._cacheable += 1
+        else:
+            self._cacheable = 0
+
+        # index entries are tagged with its addition order
+        entry = (len(self._rules), rule, metadata)
+
+        if isinstance(rule, Route) and rule._re.pattern == '^$':
+            characteristics = dict(rule._defaults)
+            characteristics.update(metadata)
+            self._static[rule._prefix] = (len(self._rules), characteristics)
+        else:
+            self._dynamic.insert(0, entry)
+
+        try:
+            self._index.setdefault(metadata[self.index_key], []).insert(
+                0, entry)
+        except (KeyError, TypeError):
+            self._not_indexed.insert(0, entry)
+
+    def freeze(self):
+        """ Make the mapping immutable and build its lookup structures.
+
+        The engine (if an engine factory is set) is built once and the rule
+        sequences are stored as tuples. Further :meth:`add_rule` calls raise
+        :class:`RuntimeError`.
+        """
+        if self.engine_factory is not None and self._engine is None:
+            self._engine = self.engine_factory(self._rules)
+
+        self._rules = tuple(self._rules)
+        self._dynamic = tuple(self._dynamic)
+        self._not_indexed = tuple(self._not_indexed)
+        self._index = dict((key, tuple(entries))
+                           for key, entries in self._index.items())
+        self.frozen = True
 
     def match(self, path: str) -> collections.Mapping or False:
         """ Map the Web request path into its associated characteristics.
@@ -203,37 +609,160 @@ class Mapper:
         :param path: The Web request path.
         :return: The characteristic mapping or `False`
         """
-        for rule, metadata in self._rules:
-            result = rule.match(path)
+        if not self.cache_size:
+            return self._lookup(path)[1]
 
-            if result is False:
-                continue
+        try:
+            result = self._cache[path]
+            self._cache.move_to_end(path)
+        except KeyError:
+            position, result = self._lookup(path)
+
+            if position < self._cacheable:
+                self._cache[path] = result and dict(result)
+
+                while len(self._cache) > self.cache_size:
+                    try:
+                        self._cache.popitem(last=False)
+                    except KeyError:
+                        break
 
-            result.update(metadata)
             return result
 
-        return False
+        # cached mappings are copied to protect them from callers
+        return result and dict(result)
+
+    def _lookup(self, path: str) -> (int, collections.Mapping or False):
+        """ Map the Web request path into the matched rule position and the
+        characteristics mapping.
+        """
+        try:
+            order, characteristics = self._static[path]
+        except KeyError:
+            pass
+        else:
+            # rules that aren't static and were added later take precedence
+            if not self._dynamic or self._dynamic[0][0] < order:
+                return len(self._rules) - order, dict(characteristics)
+
+            if self.engine_factory is None:
+                for _order, rule, metadata in self._dynamic:
+                    if _order < order:
+                        break
+
+                    result = _match_rule(rule, metadata, path)
+                    if result is not False:
+                        return len(self._rules) - _order, result
+
+                return len(self._rules) - order, dict(characteristics)
+
+        if self.engine_factory is not None:
+            if self._engine is None:
+                self._engine = self.engine_factory(self._rules)
+
+            return self._engine.lookup(path)
+
+        for position, (rule, metadata) in enumerate(self._rules):
+            result = _match_rule(rule, metadata, path)
+
+            if result is not False:
+                return position, result
+
+        return len(self._rules), False
 
     def assemble(self, **characteristics) -> str or False:
         """ Map characteristics into its associated Web request path.
 
         A :class:`Rule` is mapped only in the case that all :class:`Rule`
-        associated metadata are present in the characteristics mapping and
-        have the same value.
+        associated metadata (except the :attr:`annotation_keys` ones) are
+        present in the characteristics mapping and have the same value.
 
         :param characteristics: The characteristics mapping.
         :return: The Web request path or `False`.
         """
-        for rule, metadata in self._rules:
+        return self._resolve(characteristics)[0]
+
+    def assemble_many(self, values: collections.Iterable,
+                      **characteristics) -> list:
+        """ Map many characteristics mappings into its Web request paths.
+
+        Every item of `values` is a mapping used to update a copy of the
+        characteristics mapping before it is mapped as :meth:`assemble` does.
+        The :class:`Rule` used is resolved once and reused for all items
+        having the same characteristic names and the same values for the
+        characteristics used as metadata. If the reused :class:`Rule` fail
+        to map an item then it is resolved again.
+
+        :param values: An iterable of characteristics mappings.
+        :param characteristics: The characteristics mapping shared by all
+            items.
+        :return: The list of Web request paths (or `False`) in the same
+            order as `values`.
+        """
+        resolved = {}
+        paths = []
+        for item in values:
             options = characteristics.copy()
-            for key, value in metadata.items():
-                if key not in options or options[key] != value:
-                    break
-
-                del options[key]
+            options.update(item)
+
+            names = frozenset(options)
+            try:
+                key = (names, tuple(options[name] for name in sorted(
+                    names.intersection(self._metadata_keys))))
+                rule, metadata = resolved[key]
+            except TypeError:
+                # unhashable metadata values, resolve the rule every time
+                key = None
+                path = False
+            except KeyError:
+                path = False
             else:
-                result = rule.assemble(**options)
-                if result is not False:
-                    return result
+                path = _assemble_rule(rule, metadata, options,
+                                      self.annotation_keys)
 
-        return False
+            if path is False:
+                path, rule, metadata = self._resolve(options)
+
+                if path is not False and key is not None:
+                    resolved[key] = rule, metadata
+
+            paths.append(path)
+
+        return paths
+
+    def _resolve(self, characteristics: dict) -> tuple:
+        """ Map characteristics into its associated Web request path.
+
+        :return: The Web request path and the (rule, metadata) pair used or
+            `False` and `None` for both.
+        """
+        for rule, metadata in self._candidates(characteristics):
+            result = _assemble_rule(rule, metadata, characteristics,
+                                    self.annotation_keys)
+            if result is not False:
+                return result, rule, metadata
+
+        return False, None, None
+
+    def _candidates(self, characteristics: dict) -> collections.Iterable:
+        """ Return the rules that may assemble the characteristics mapping.
+
+        Rules are returned as (rule, metadata) pairs in evaluation order.
+        """
+        try:
+            indexed = self._index.get(characteristics[self.index_key], ())
+        except KeyError:
+            indexed = ()
+        except TypeError:
+            # an unhashable value can't be looked up, evaluate all rules
+            return self._rules
+
+        if not indexed:
+            entries = self._not_indexed
+        elif not self._not_indexed:
+            entries = indexed
+        else:
+            entries = heapq.merge(indexed, self._not_indexed,
+                                  key=operator.itemgetter(0), reverse=True)
+
+        return ((rule, metadata) for _, rule, metadata in entries)
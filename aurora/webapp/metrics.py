@@ -0,0 +1,186 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+""" Web request timing metrics.
+
+In-process histograms of the time spent by Web requests on every phase of
+the :class:`~.infrastructure.Application` Web request handling strategy,
+aggregated per Web request handler. Timing is enabled by setting the Web
+application :attr:`~.infrastructure.Application.metrics` attribute::
+
+    application.metrics = metrics.Metrics()
+
+    # optional Web request handler presenting the collected metrics
+    application.mapper.add_rule(mapping.Route('/_metrics'),
+                                _handler=application.metrics.handler)
+"""
+
+import bisect
+import json
+import threading
+
+from . import foundation
+
+__all__ = ['Histogram', 'Metrics', 'name']
+
+# bucket upper bounds in seconds, from 1 microsecond doubling up to ~2 minutes
+_BOUNDS = tuple(2 ** i / 1000000 for i in range(28))
+
+
+def name(target) -> str:
+    """ Return a readable name for a Web request handler or listener.
+    """
+    return getattr(target, '__qualname__', None) or \
+        getattr(target, '__name__', None) or type(target).__qualname__
+
+
+class Histogram:
+    """ Histogram of durations using logarithmic buckets.
+
+    Bucket upper bounds double from 1 microsecond up to about two minutes,
+    so recording a value is a binary search over a few bounds and
+    percentiles are accurate within a factor of two.
+    """
+
+    bounds = _BOUNDS
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.buckets = [0] * (len(self.bounds) + 1)
+
+    def add(self, value: float):
+        """ Record a duration in seconds.
+        """
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+
+    def percentile(self, p: float) -> float:
+        """ Estimate the duration below which `p` (0 to 1) values fall.
+
+        :return: The upper bound of the bucket holding the percentile
+            (bounded by the maximum value recorded), `None` if empty.
+        """
+        if not self.count:
+            return None
+
+        rank = p * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                break
+
+        if i < len(self.bounds):
+            return min(self.bounds[i], self.maximum)
+
+        return self.maximum
+
+    def summary(self) -> dict:
+        """ Return the histogram statistics as a JSON serializable mapping.
+        """
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.minimum,
+            'max': self.maximum,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+        }
+
+
+class Metrics:
+    """ Web request timing histograms per Web request handler.
+
+    Timings are recorded by phase name, the
+    :class:`~.infrastructure.Application` use the phases ``match``,
+    ``pre_dispatch``, ``handler``, ``post_dispatch`` (plus a
+    ``post_dispatch:<listener>`` phase for every listener if it is an
+    :class:`~aurora.event.Event`) and ``total``.
+    """
+
+    histogram_factory = Histogram
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, handler, timings: dict):
+        """ Record the phase durations of a Web request.
+
+        :param handler: The Web request handler or its name.
+        :param timings: Mapping of phase names to durations in seconds.
+        """
+        if not isinstance(handler, str):
+            handler = name(handler)
+
+        with self._lock:
+            try:
+                histograms = self._histograms[handler]
+            except KeyError:
+                histograms = self._histograms[handler] = {}
+
+            for phase, value in timings.items():
+                try:
+                    histograms[phase].add(value)
+                except KeyError:
+                    histogram = histograms[phase] = self.histogram_factory()
+                    histogram.add(value)
+
+    def report(self) -> dict:
+        """ Return the histogram summaries by handler name and phase.
+        """
+        with self._lock:
+            return dict(
+                (handler, dict((phase, histogram.summary())
+                               for phase, histogram in histograms.items()))
+                for handler, histograms in self._histograms.items())
+
+    def reset(self):
+        """ Discard the recorded timings.
+        """
+        with self._lock:
+            self._histograms = {}
+
+    def handler(self, request: foundation.Request) -> foundation.Response:
+        """ Web request handler presenting the :meth:`report` as JSON.
+        """
+        response = request.response_factory(
+            text=json.dumps(self.report(), indent=2, sort_keys=True))
+        response.content_type = 'application/json'
+
+        return response
@@ -0,0 +1,316 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+""" Streaming ``multipart/form-data`` Web request body parsing.
+
+Web request bodies are parsed as they are read from the WSGI input stream,
+the whole body is never held in memory. The :class:`Reader` produce the
+body parts one at a time and every :class:`Part` is read chunk by chunk,
+Web request handlers processing large uploads can use it through the
+:meth:`~.foundation.RequestServices.iter_form` service::
+
+    for part in request.iter_form():
+        if part.filename is not None:
+            for chunk in part:
+                storage.write(chunk)
+
+The :func:`parse_form` function build the ``POST`` variables of the Web
+request implementations: uploaded files are spooled to temporary files once
+they exceed a size threshold and text fields are limited in size.
+"""
+
+import email.message
+import email.parser
+import tempfile
+
+__all__ = ['BodyTooLarge', 'Part', 'Reader', 'boundary', 'check_size',
+           'read_body', 'parse_form']
+
+
+class BodyTooLarge(ValueError):
+    """ The Web request body (or a part of it) exceed a size limit.
+
+    Web request handlers are expected to answer with a ``413 Request
+    Entity Too Large`` response.
+    """
+
+    def __init__(self, limit: int):
+        super().__init__('Web request body larger than %d bytes' % limit)
+        self.limit = limit
+
+
+def check_size(content_length: int or None, limit: int or None):
+    """ Check the Web request body size before it is read.
+
+    :param content_length: The Web request body size.
+    :param limit: The size limit, `None` for no limit.
+    :raise BodyTooLarge: If the body exceed the limit.
+    """
+    if limit is not None and (content_length or 0) > limit:
+        raise BodyTooLarge(limit)
+
+
+def read_body(stream, limit: int or None, chunk_size=65536) -> bytes:
+    """ Read a Web request body of unknown size (like a chunked one).
+
+    :param stream: The Web request body stream.
+    :param limit: The size limit, `None` for no limit.
+    :raise BodyTooLarge: If the body exceed the limit, it is detected once
+        `limit` bytes plus at most a chunk are read.
+    """
+    data = bytearray()
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        data += chunk
+        if limit is not None and len(data) > limit:
+            raise BodyTooLarge(limit)
+
+    return bytes(data)
+
+
+def boundary(content_type: str) -> bytes:
+    """ Return the boundary parameter of a multipart content type.
+
+    :raise ValueError: If the content type has no boundary.
+    """
+    message = email.message.Message()
+    message['Content-Type'] = content_type
+
+    value = message.get_param('boundary')
+    if not value or len(value) > 70:
+        raise ValueError('invalid multipart boundary')
+
+    return value.encode('latin-1')
+
+
+class Part:
+    """ Body part of a ``multipart/form-data`` Web request.
+
+    The part content is read from the Web request body by iterating the part
+    (chunk by chunk) or using :meth:`read`, it can be read once unless it is
+    spooled to the :attr:`file` object.
+    """
+
+    def __init__(self, reader: 'Reader', headers: email.message.Message):
+        self.headers = headers
+        self.name = headers.get_param('name', header='content-disposition')
+        self.filename = headers.get_filename()
+        self.type = headers.get_content_type()
+        self.file = None  # spooled content
+        self.size = 0
+
+        self._reader = reader
+        self._done = False
+
+    def __iter__(self):
+        if self.file is not None:
+            self.file.seek(0)
+            yield from iter(lambda: self.file.read(self._reader.chunk_size),
+                            b'')
+            return
+
+        while not self._done:
+            chunk = self._reader._read_data()
+            if chunk is None:
+                self._done = True
+                return
+
+            self.size += len(chunk)
+            yield chunk
+
+    def read(self, limit: int = None) -> bytes:
+        """ Read the whole part content.
+
+        :param limit: The size limit of the content.
+        :raise BodyTooLarge: If the content exceed `limit`.
+        """
+        data = bytearray()
+        for chunk in self:
+            data += chunk
+            if limit is not None and len(data) > limit:
+                raise BodyTooLarge(limit)
+
+        return bytes(data)
+
+    def spool(self, max_size: int):
+        """ Read the part content into the :attr:`file` object.
+
+        :param max_size: Size kept in memory before the content is rolled
+            over to a temporary file.
+        """
+        file = tempfile.SpooledTemporaryFile(max_size)
+        for chunk in self:
+            file.write(chunk)
+
+        file.seek(0)
+        self.file = file
+
+    @property
+    def value(self) -> bytes:
+        """ The part content.
+        """
+        return self.read()
+
+    def _drain(self):
+        # spooled content is already read, the file position is kept
+        if self.file is not None:
+            return
+
+        for chunk in self:
+            pass
+
+
+class Reader:
+    """ Incremental ``multipart/form-data`` body parser.
+
+    Iterating the reader produce the body :class:`Part` objects in order,
+    the unread content of a part is skipped when the next one is requested.
+
+    :param stream: The Web request body stream.
+    :param boundary: The multipart boundary (see :func:`boundary`).
+    :param chunk_size: The number of bytes read from `stream` at once.
+    :param max_header_size: The size limit of the part headers.
+    :param max_size: The size limit of the body, checked as it is read
+        (the stream size may be unknown), `None` for no limit.
+    """
+
+    def __init__(self, stream, boundary: bytes, chunk_size=65536,
+                 max_header_size=16384, max_size=None):
+        self.chunk_size = chunk_size
+        self.max_header_size = max_header_size
+        self.max_size = max_size
+        self.consumed = 0  # number of bytes read from the stream
+
+        self._stream = stream
+        self._delimiter = b'\r\n--' + boundary
+        # the first delimiter doesn't follow a line break
+        self._buffer = b'\r\n'
+
+    def _fill(self):
+        data = self._stream.read(self.chunk_size)
+        if not data:
+            raise ValueError('truncated multipart body')
+
+        self.consumed += len(data)
+        if self.max_size is not None and self.consumed > self.max_size:
+            raise BodyTooLarge(self.max_size)
+
+        self._buffer += data
+
+    def _read_data(self) -> bytes or None:
+        """ Return the next chunk of the current part, `None` at its end.
+        """
+        while True:
+            index = self._buffer.find(self._delimiter)
+            if index == 0:
+                return None
+
+            if index > 0:
+                chunk, self._buffer = \
+                    self._buffer[:index], self._buffer[index:]
+                return chunk
+
+            # keep what may be the start of a delimiter
+            safe = len(self._buffer) - len(self._delimiter) + 1
+            if safe > 0:
+                chunk, self._buffer = self._buffer[:safe], self._buffer[safe:]
+                return chunk
+
+            self._fill()
+
+    def _read_until(self, separator: bytes) -> bytes:
+        while True:
+            index = self._buffer.find(separator)
+            if index > self.max_header_size or \
+                    (index < 0 and len(self._buffer) > self.max_header_size):
+                raise BodyTooLarge(self.max_header_size)
+
+            if index >= 0:
+                data = self._buffer[:index]
+                self._buffer = self._buffer[index + len(separator):]
+                return data
+
+            self._fill()
+
+    def __iter__(self):
+        # skip the preamble
+        while self._read_data() is not None:
+            pass
+
+        while True:
+            while len(self._buffer) < len(self._delimiter) + 2:
+                self._fill()
+
+            self._buffer = self._buffer[len(self._delimiter):]
+            if self._buffer.startswith(b'--'):
+                return
+
+            # discard the transport padding
+            self._read_until(b'\r\n')
+
+            if self._buffer.startswith(b'\r\n'):
+                headers, self._buffer = b'', self._buffer[2:]
+            else:
+                headers = self._read_until(b'\r\n\r\n')
+
+            part = Part(self, email.parser.HeaderParser().parsestr(
+                headers.decode('utf-8', 'surrogateescape')))
+            yield part
+
+            part._drain()
+
+
+def parse_form(stream, content_type: str, charset='UTF-8',
+               spool_size=1024 * 1024, max_field_size=1024 * 1024,
+               max_size=None) -> list:
+    """ Parse a ``multipart/form-data`` Web request body.
+
+    :param stream: The Web request body stream.
+    :param content_type: The Web request content type, with its boundary.
+    :param charset: The text fields charset.
+    :param spool_size: Size of the uploaded files kept in memory, larger
+        files are rolled over to temporary files.
+    :param max_field_size: The size limit of the text fields.
+    :param max_size: The size limit of the body, `None` for no limit.
+    :return: List of (name, value) pairs, values are :class:`Part` objects
+        for uploaded files.
+    :raise BodyTooLarge: If a text field exceed `max_field_size` or the
+        body exceed `max_size`.
+    """
+    items = []
+    for part in Reader(stream, boundary(content_type), max_size=max_size):
+        if part.name is None:
+            continue
+
+        if part.filename is None:
+            items.append((part.name, part.read(max_field_size).decode(
+                charset, 'replace')))
+        else:
+            part.spool(spool_size)
+            items.append((part.name, part))
+
+    return items
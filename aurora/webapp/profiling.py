@@ -0,0 +1,184 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+""" Sampled Web request profiling.
+
+A small share of the Web requests handled by an
+:class:`~.infrastructure.Application` are run under :mod:`cProfile` and
+the collected statistics are written to a directory, one sub-directory per
+Web request handler, keeping only the most recent files. Profiling is
+enabled by setting the Web application
+:attr:`~.infrastructure.Application.profiler` attribute::
+
+    # profile one in a thousand Web requests and every list_posts one
+    application.profiler = profiling.Profiler(
+        '/var/tmp/profiles', rate=1000, handlers=['Blog.list_posts'])
+
+Streamed Web response bodies are profiled while they are produced, the
+statistics are written once the body is closed. The statistics files are
+regular :mod:`pstats` files and the :meth:`Profiler.report` service
+aggregate them into the top functions per Web request handler (including
+the files written by other processes). Web requests handled by the
+:meth:`~.infrastructure.Application.dispatch` service are not profiled.
+"""
+
+import cProfile
+import itertools
+import json
+import os
+import pstats
+import re
+import threading
+import time
+
+from . import foundation, metrics
+
+__all__ = ['Profiler']
+
+
+class Profiler:
+    """ Web request profiler sampling one in `rate` Web requests.
+
+    Web requests handled by the `handlers` (given by name, as reported by
+    the Web request timing :mod:`.metrics`) are always profiled. Only one
+    Web request is profiled at a time, others are not sampled meanwhile.
+
+    :param directory: The directory where statistics files are written.
+    :param rate: Profile one in `rate` Web requests, 0 to profile only the
+        `handlers` Web requests.
+    :param handlers: Names of the Web request handlers always profiled.
+    :param keep: The number of statistics files kept per Web request
+        handler.
+    """
+
+    profile_factory = cProfile.Profile
+
+    def __init__(self, directory: str, rate=100, handlers=(), keep=100):
+        self.directory = directory
+        self.rate = rate
+        self.handlers = frozenset(handlers)
+        self.keep = keep
+
+        self._counter = itertools.count(1)
+        self._files = itertools.count(1)  # unique stats file names
+        self._lock = threading.Lock()
+
+    def _path(self, handler_name: str) -> str:
+        return os.path.join(self.directory,
+                            re.sub(r'[^\w.-]', '_', handler_name))
+
+    def sample(self, handler: foundation.Handler):
+        """ Return a profile to run the Web request under, or `None`.
+
+        :param handler: The Web request handler.
+        """
+        sampled = self.rate and next(self._counter) % self.rate == 0
+        if not sampled and (not self.handlers or
+                            metrics.name(handler) not in self.handlers):
+            return None
+
+        # a single profile can be enabled at a time
+        if not self._lock.acquire(blocking=False):
+            return None
+
+        return self.profile_factory()
+
+    def record(self, handler: foundation.Handler, profile):
+        """ Write the statistics of a finished profile.
+
+        :param handler: The Web request handler.
+        :param profile: The profile returned by :meth:`sample`.
+        """
+        self._lock.release()
+
+        path = self._path(metrics.name(handler))
+        os.makedirs(path, exist_ok=True)
+
+        profile.dump_stats(os.path.join(path, '%d-%d-%d.prof' % (
+            time.time() * 1000000, os.getpid(), next(self._files))))
+
+        files = sorted(os.listdir(path),
+                       key=lambda name: int(name.split('-', 1)[0]))
+        for file_name in files[:-self.keep]:
+            try:
+                os.remove(os.path.join(path, file_name))
+            except OSError:
+                pass
+
+    def report(self, limit=20, sort='tottime') -> dict:
+        """ Aggregate the statistics files into the top functions.
+
+        :param limit: The number of functions reported per Web request
+            handler.
+        :param sort: The function statistic used to rank them (``tottime``,
+            ``cumtime`` or ``calls``).
+        :return: Mapping of Web request handler names to lists of function
+            statistics mappings.
+        """
+        column = {'calls': 1, 'tottime': 2, 'cumtime': 3}[sort]
+
+        report = {}
+        if not os.path.isdir(self.directory):
+            return report
+
+        for handler_name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, handler_name)
+            files = [os.path.join(path, file_name)
+                     for file_name in os.listdir(path)
+                     if file_name.endswith('.prof')]
+            if not files:
+                continue
+
+            stats = pstats.Stats(*files).stats
+            functions = sorted(stats.items(), key=lambda item: item[1][column],
+                               reverse=True)[:limit]
+
+            report[handler_name] = [{
+                'function': '%s:%d(%s)' % function,
+                'calls': calls,
+                'tottime': tottime,
+                'cumtime': cumtime,
+                'samples': len(files),
+            } for function, (primitive, calls, tottime, cumtime, callers)
+                in functions]
+
+        return report
+
+    def handler(self, request: foundation.Request) -> foundation.Response:
+        """ Web request handler presenting the :meth:`report` as JSON.
+
+        The ``limit`` and ``sort`` query parameters are supported.
+        """
+        report = self.report(int(request.GET.get('limit', 20)),
+                             request.GET.get('sort', 'tottime'))
+
+        response = request.response_factory(
+            text=json.dumps(report, indent=2, sort_keys=True))
+        response.content_type = 'application/json'
+
+        return response
@@ -0,0 +1,755 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+""" Multi-threaded HTTP/1.1 WSGI server.
+
+This module provide a production ready serving path for Aurora Web
+applications based only on the Python standard library. Connections are
+handled by a bounded thread pool, HTTP/1.1 persistent connections are
+supported and the server can be stopped gracefully (in-flight Web requests
+are completed before the server exit). A pre-forking multi-process mode
+is available too, it use every CPU despite the Python global interpreter
+lock.
+
+Example::
+
+    from aurora.webapp import foundation, server
+
+    server.serve(foundation.wsgi(Application()), port=8008)
+
+    # four worker processes recycled every 10000 Web requests
+    server.serve(foundation.wsgi(Application()), port=8008, workers=4,
+                 max_requests=10000)
+
+The module can be executed as a script too, in that case the Web request
+handler is given as a ``module:attribute`` reference (if the attribute is a
+class it is instantiated)::
+
+    python -m aurora.webapp.server application:Application --port 8008
+
+The Web request handler ``freeze`` service (or ``warmup`` if it has no
+``freeze`` service) is invoked before serving, see
+:meth:`.infrastructure.Application.freeze`.
+"""
+
+import argparse
+import concurrent.futures
+import gc
+import importlib
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from http import server as http_server
+from urllib import parse as urllib_parse
+
+from . import foundation, multipart, tasks
+
+__all__ = ['FileWrapper', 'WSGIRequestHandler', 'Server', 'Prefork', 'serve',
+           'main']
+
+
+class _Input:
+    """ Request body stream limited to the request content length.
+    """
+
+    def __init__(self, stream, length: int):
+        self._stream = stream
+        self._remaining = length
+
+    def read(self, size=-1) -> bytes:
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+
+        data = self._stream.read(size) if size else b''
+        self._remaining -= len(data)
+
+        return data
+
+    def readline(self, size=-1) -> bytes:
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+
+        data = self._stream.readline(size) if size else b''
+        self._remaining -= len(data)
+
+        return data
+
+    def readlines(self, hint=-1) -> list:
+        return list(iter(self.readline, b''))
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+    def drain(self, limit: int) -> bool:
+        """ Discard up to `limit` unread bytes, return if the body is done.
+        """
+        while 0 < self._remaining <= limit:
+            data = self.read(min(self._remaining, 65536))
+            if not data:
+                return False
+            limit -= len(data)
+
+        return self._remaining == 0
+
+
+class FileWrapper:
+    """ The server ``wsgi.file_wrapper``.
+
+    Files wrapped by the WSGI application having a file descriptor are sent
+    by the kernel using :meth:`socket.socket.sendfile` when the response
+    content length is known, otherwise they are read in `block_size`
+    chunks.
+    """
+
+    def __init__(self, filelike, block_size=65536):
+        self.filelike = filelike
+        self.block_size = block_size
+
+    def __iter__(self):
+        return iter(lambda: self.filelike.read(self.block_size), b'')
+
+    def close(self):
+        if hasattr(self.filelike, 'close'):
+            self.filelike.close()
+
+
+class WSGIRequestHandler(http_server.BaseHTTPRequestHandler):
+    """ HTTP/1.1 request handler that call the server WSGI application.
+
+    Persistent connections are kept open until the client close them, the
+    :attr:`Server.keep_alive_timeout` expire, the server is stopping or
+    there are connections waiting for a thread.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    server_version = 'Aurora'
+
+    # responses are written with few write calls, do not delay them
+    disable_nagle_algorithm = True
+
+    # unread request bodies larger than this close the connection
+    max_drain = 65536
+
+    # chunked request bodies larger than this are answered with 413
+    max_chunked_size = 1024 * 1024 * 1024
+
+    def setup(self):
+        self.timeout = self.server.keep_alive_timeout
+        super().setup()
+
+    def handle_one_request(self):
+        try:
+            self.raw_requestline = self.rfile.readline(65537)
+        except socket.timeout:
+            self.close_connection = True
+            return
+
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            self.close_connection = True
+            return
+
+        if not self.raw_requestline:
+            self.close_connection = True
+            return
+
+        if not self.parse_request():
+            return
+
+        self.run_application()
+
+        with self.server._lock:
+            self.server.requests += 1
+
+    def get_environ(self) -> dict:
+        """ Build the WSGI environment for the current request.
+        """
+        path, _, query = self.path.partition('?')
+
+        environ = dict(self.server.base_environ)
+        environ.update({
+            'REQUEST_METHOD': self.command,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': urllib_parse.unquote(path, 'latin-1'),
+            'QUERY_STRING': query,
+            'SERVER_PROTOCOL': self.request_version,
+            'REMOTE_ADDR': self.client_address[0],
+            'wsgi.errors': sys.stderr,
+        })
+
+        for name, value in self.headers.items():
+            name = name.upper().replace('-', '_')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = 'HTTP_' + name
+
+            if name in environ and name.startswith('HTTP_'):
+                value = ','.join((environ[name], value))
+
+            environ[name] = value
+
+        return environ
+
+    def get_input(self, environ: dict):
+        """ Return the request body stream.
+
+        Chunked request bodies are read into a temporary file.
+
+        :raise .multipart.BodyTooLarge: If a chunked request body is larger
+            than :attr:`max_chunked_size`.
+        """
+        if 'chunked' in environ.get('HTTP_TRANSFER_ENCODING', '').lower():
+            body = tempfile.SpooledTemporaryFile(1024 * 1024)
+            while True:
+                size = int(self.rfile.readline().split(b';', 1)[0], 16)
+                if size == 0:
+                    # discard the trailer
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+
+                if body.tell() + size > self.max_chunked_size:
+                    body.close()
+                    raise multipart.BodyTooLarge(self.max_chunked_size)
+
+                body.write(self.rfile.read(size))
+                self.rfile.readline()
+
+            environ['CONTENT_LENGTH'] = str(body.tell())
+            del environ['HTTP_TRANSFER_ENCODING']
+            body.seek(0)
+
+            return _Input(body, int(environ['CONTENT_LENGTH']))
+
+        return _Input(self.rfile, int(environ.get('CONTENT_LENGTH') or 0))
+
+    def run_application(self):
+        environ = self.get_environ()
+        try:
+            environ['wsgi.input'] = body = self.get_input(environ)
+        except multipart.BodyTooLarge:
+            # the rest of the request body is never read
+            self.close_connection = True
+            self.send_error(413)
+            return
+
+        state = {'headers': None, 'sent': False, 'chunked': False}
+
+        def send_headers():
+            status, headers = state['headers']
+            code, _, message = status.partition(' ')
+            code = int(code)
+
+            names = set(name.lower() for name, value in headers)
+            no_body = self.command == 'HEAD' or code in (204, 304) or \
+                100 <= code < 200
+
+            if 'content-length' not in names and not no_body:
+                if self.request_version == 'HTTP/1.1':
+                    state['chunked'] = True
+                    headers.append(('Transfer-Encoding', 'chunked'))
+                else:
+                    self.close_connection = True
+
+            # give the thread to connections waiting for one
+            if self.server.stopping or self.server.pending > 0:
+                self.close_connection = True
+
+            if self.close_connection:
+                headers.append(('Connection', 'close'))
+
+            self.log_request(code)
+            self.send_response_only(code, message)
+            if 'server' not in names:
+                self.send_header('Server', self.version_string())
+            if 'date' not in names:
+                self.send_header('Date', self.date_time_string())
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+
+            state['sent'] = True
+            state['no_body'] = no_body
+
+        def write(data: bytes):
+            if not state['sent']:
+                send_headers()
+
+            if not data or state['no_body']:
+                return
+
+            if state['chunked']:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            else:
+                self.wfile.write(data)
+
+        def send_file(wrapper: FileWrapper) -> bool:
+            # only regular files with a known content length
+            length = None
+            for name, value in state['headers'][1]:
+                if name.lower() == 'content-length':
+                    length = int(value)
+
+            try:
+                wrapper.filelike.fileno()
+                offset = wrapper.filelike.tell()
+            except (AttributeError, OSError, ValueError):
+                return False
+
+            if length is None:
+                return False
+
+            send_headers()
+            if not state['no_body'] and length:
+                sent = self.connection.sendfile(wrapper.filelike, offset,
+                                                length)
+
+                # the response framing is broken if the file is shorter
+                if sent < length:
+                    self.close_connection = True
+
+            return True
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info:
+                try:
+                    if state['sent']:
+                        raise exc_info[1].with_traceback(exc_info[2])
+                finally:
+                    exc_info = None
+            elif state['headers'] is not None:
+                raise AssertionError('start_response called twice')
+
+            state['headers'] = (status, list(headers))
+            return write
+
+        try:
+            result = self.server.application(environ, start_response)
+            try:
+                if not isinstance(result, FileWrapper) or \
+                        not send_file(result):
+                    for data in result:
+                        write(data)
+
+                if not state['sent']:
+                    send_headers()
+
+                if state['chunked']:
+                    self.wfile.write(b'0\r\n\r\n')
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        except Exception:
+            self.close_connection = True
+            if not state['sent']:
+                self.send_error(500)
+            raise
+
+        # keep the connection only if the request body framing is known
+        if not body.drain(self.max_drain):
+            self.close_connection = True
+
+    def log_request(self, code='-', size='-'):
+        if self.server.access_log:
+            super().log_request(code, size)
+
+
+class Server(socketserver.TCPServer):
+    """ Multi-threaded WSGI server.
+
+    Accepted connections are handled by a pool of `threads` worker threads.
+    At most `threads` connections wait for a worker, once this limit is
+    reached the server stop accepting connections and new ones wait on the
+    listening socket accept queue whose size is set by `backlog`.
+
+    :param address: The (host, port) pair to listen on.
+    :param application: The WSGI application.
+    :param threads: The number of worker threads.
+    :param backlog: The listening socket accept queue size.
+    :param keep_alive_timeout: Seconds an idle persistent connection is kept
+        open.
+    """
+
+    allow_reuse_address = True
+
+    access_log = False
+
+    def __init__(self, address: tuple, application, threads=8, backlog=128,
+                 keep_alive_timeout=5,
+                 handler_factory=WSGIRequestHandler):
+        self.request_queue_size = backlog
+        super().__init__(address, handler_factory)
+
+        self.application = application
+        self.keep_alive_timeout = keep_alive_timeout
+        self.stopping = False
+        self.pending = 0
+        self.requests = 0
+        self.serving = False
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(threads)
+        self._slots = threading.BoundedSemaphore(threads * 2)
+        self._lock = threading.Lock()
+        self._futures = set()
+
+        host, port = self.server_address[:2]
+        self.base_environ = {
+            'SERVER_NAME': socket.getfqdn(host) if host else 'localhost',
+            'SERVER_PORT': str(port),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+            'wsgi.file_wrapper': FileWrapper,
+        }
+
+    def serve_forever(self, poll_interval=0.5):
+        self.serving = True
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self.serving = False
+
+    def process_request(self, request, client_address):
+        # wait for a free slot, this stop accepting new connections
+        while not self._slots.acquire(timeout=0.5):
+            if self.stopping:
+                self.shutdown_request(request)
+                return
+
+        with self._lock:
+            self.pending += 1
+
+        future = self._executor.submit(
+            self._process_request, request, client_address)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+
+    def _process_request(self, request, client_address):
+        with self._lock:
+            self.pending -= 1
+
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def stop(self, timeout=None) -> bool:
+        """ Stop the server gracefully.
+
+        The server stop accepting connections and wait for the Web requests
+        been handled to complete, then for the background tasks they
+        scheduled (see :func:`.tasks.drain`). Persistent connections are
+        closed after its current Web request.
+
+        :param timeout: Maximum number of seconds to wait.
+        :return: Whether the Web requests and tasks completed in time.
+        """
+        self.stopping = True
+        if self.serving:
+            self.shutdown()
+        self.server_close()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        done, not_done = concurrent.futures.wait(
+            list(self._futures), timeout)
+        self._executor.shutdown(wait=not not_done)
+
+        # background tasks scheduled by the Web requests
+        drained = tasks.drain(None if deadline is None else
+                              max(0, deadline - time.monotonic()))
+
+        return not not_done and drained
+
+
+def _private_memory() -> int:
+    """ Return the memory used only by the current process in bytes.
+
+    Memory pages shared copy-on-write with the parent process are not
+    counted. Where it can't be measured the peak resident memory is used.
+    """
+    try:
+        with open('/proc/self/smaps_rollup') as file:
+            private = 0
+            for line in file:
+                if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                    private += int(line.split()[1]) * 1024
+
+            return private
+    except OSError:
+        import resource
+
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == 'darwin' else usage * 1024
+
+
+class Prefork:
+    """ Pre-forking multi-process WSGI server.
+
+    The master process listen on `address`, prepare the Web application and
+    fork `workers` worker processes accepting connections from the shared
+    listening socket, each one handle them using a :class:`Server` thread
+    pool. The Web application is prepared once by calling `preload` and the
+    objects existing at that point are moved to the garbage collector
+    permanent generation (see :func:`gc.freeze`), this keep their memory
+    pages shared between worker processes.
+
+    A worker process is recycled once it handle `max_requests` Web requests
+    or its private memory exceed `max_memory` bytes, worker processes that
+    exit unexpectedly are restarted. It is available only on platforms
+    supporting :func:`os.fork`.
+
+    :param address: The (host, port) pair to listen on.
+    :param application: The WSGI application.
+    :param workers: The number of worker processes, the number of CPUs by
+        default.
+    :param preload: Callable invoked in the master process before forking
+        the worker processes.
+    :param max_requests: Web requests handled by a worker process before it
+        is recycled, unlimited if 0.
+    :param max_memory: Private memory in bytes used by a worker process
+        before it is recycled, unlimited if 0.
+    :param stop_timeout: Seconds to wait for in-flight Web requests once
+        the server is stopping.
+    :param options: Additional :class:`Server` options.
+    """
+
+    # seconds between worker processes checks
+    interval = 0.5
+
+    def __init__(self, address: tuple, application, workers=None,
+                 preload=None, max_requests=0, max_memory=0, stop_timeout=30,
+                 **options):
+        self.server = Server(address, application, **options)
+        self.workers = workers or os.cpu_count() or 1
+        self.preload = preload
+        self.max_requests = max_requests
+        self.max_memory = max_memory
+        self.stop_timeout = stop_timeout
+        self.stopping = False
+        self.children = set()
+
+    def serve_forever(self):
+        """ Serve until :meth:`stop` is called or SIGINT or SIGTERM is
+        received.
+        """
+        if self.preload is not None:
+            self.preload()
+
+        gc.collect()
+        gc.freeze()
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+            signal.signal(signal.SIGINT, lambda signum, frame: self.stop())
+
+        try:
+            while not self.stopping:
+                self._reap()
+                while len(self.children) < self.workers and \
+                        not self.stopping:
+                    self._spawn()
+
+                time.sleep(self.interval)
+        finally:
+            self._stop_workers()
+            self.server.server_close()
+
+    def stop(self):
+        """ Stop the worker processes gracefully, exit :meth:`serve_forever`.
+        """
+        self.stopping = True
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            return
+
+        status = 1
+        try:
+            self._work()
+            status = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+
+    def _work(self):
+        server = self.server
+
+        def stop(signum, frame):
+            server.stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        # other worker processes may accept the connection first
+        server.socket.setblocking(False)
+        server.timeout = self.interval
+
+        checked = time.monotonic()
+        while not server.stopping:
+            server.handle_request()
+
+            if self.max_requests and server.requests >= self.max_requests:
+                server.stopping = True
+
+            if self.max_memory and time.monotonic() - checked > \
+                    self.interval:
+                checked = time.monotonic()
+                if _private_memory() > self.max_memory:
+                    server.stopping = True
+
+        server.stop(self.stop_timeout)
+
+    def _reap(self):
+        for pid in list(self.children):
+            try:
+                pid, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                self.children.discard(pid)
+                continue
+
+            if not pid:
+                continue
+
+            self.children.discard(pid)
+            if status and not self.stopping:
+                sys.stderr.write(
+                    'Worker process %d exited unexpectedly (status %d), '
+                    'restarting it\n' % (pid, status))
+
+    def _stop_workers(self):
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.stop_timeout
+        while self.children and time.monotonic() < deadline:
+            time.sleep(0.05)
+            self._reap()
+
+        for pid in self.children:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+        self.children.clear()
+
+
+def serve(application, host='', port=8008, stop_timeout=30, workers=0,
+          **options):
+    """ Serve a WSGI application until SIGINT or SIGTERM is received.
+
+    :param application: The WSGI application.
+    :param host: The host name or address to listen on.
+    :param port: The port to listen on.
+    :param stop_timeout: Seconds to wait for in-flight Web requests once
+        the server is stopping.
+    :param workers: Serve from this number of worker processes using a
+        :class:`Prefork` server, 0 serve from the current process.
+    :param options: Additional :class:`Server` or :class:`Prefork` options.
+    """
+    if workers:
+        Prefork((host, port), application, workers, stop_timeout=stop_timeout,
+                **options).serve_forever()
+        return
+
+    server = Server((host, port), application, **options)
+
+    def stop(signum, frame):
+        server.stopping = True
+
+        # the serving loop run on this thread, shut it down from other one
+        threading.Thread(target=server.shutdown).start()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+    try:
+        server.serve_forever()
+    finally:
+        server.stop(stop_timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Serve an Aurora Web request handler.')
+    parser.add_argument('handler',
+                        help='Web request handler as module:attribute')
+    parser.add_argument('--host', default='')
+    parser.add_argument('--port', type=int, default=8008)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--backlog', type=int, default=128)
+    parser.add_argument('--keep-alive-timeout', type=float, default=5)
+    parser.add_argument('--workers', type=int, default=0,
+                        help='number of pre-forked worker processes')
+    parser.add_argument('--max-requests', type=int, default=0,
+                        help='Web requests before recycling a worker')
+    parser.add_argument('--max-memory', type=int, default=0,
+                        help='megabytes used before recycling a worker')
+    args = parser.parse_args(argv)
+
+    module, _, attribute = args.handler.partition(':')
+    handler = getattr(importlib.import_module(module), attribute)
+    if isinstance(handler, type):
+        handler = handler()
+
+    options = {}
+    if args.workers:
+        options.update(max_requests=args.max_requests,
+                       max_memory=args.max_memory * 1024 * 1024)
+
+    prepare = getattr(handler, 'freeze', None) or \
+        getattr(handler, 'warmup', None)
+    if callable(prepare):
+        prepare()
+
+    print('Serving on port %d...' % args.port)
+    sys.stdout.flush()
+    serve(foundation.wsgi(handler), args.host, args.port,
+          workers=args.workers, threads=args.threads, backlog=args.backlog,
+          keep_alive_timeout=args.keep_alive_timeout, **options)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+""" Background tasks run after the Web response is sent.
+
+Web request handlers can schedule work the client doesn't need to wait for
+(search indexing, notifications and so on) using the
+:meth:`Web request after_response <.foundation.Request.after_response>`
+service. The scheduled callables are invoked once the Web response has
+been sent by the :func:`~.foundation.wsgi` or :func:`~.foundation.asgi`
+adapters, from a :class:`TaskPool` if the
+:attr:`~.infrastructure.Application.tasks` attribute of the Web
+application is set (otherwise they are invoked in place by :func:`run`).
+Errors raised by the tasks are reported by :func:`report_error`::
+
+    application.tasks = tasks.TaskPool(workers=4, queue_size=1000)
+
+    def compose_post(request):
+        ...
+        request.after_response(index_post, post)
+        return response
+
+The Aurora :mod:`.server` drain the task pools of the process once it
+stop handling Web requests (see :func:`drain`).
+"""
+
+import concurrent.futures
+import contextvars
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+from . import metrics
+
+__all__ = ['TaskPool', 'drain', 'run', 'report_error']
+
+# task pools created by the process
+_pools = weakref.WeakSet()
+
+
+class TaskPool:
+    """ Bounded pool of worker threads running background tasks.
+
+    At most `queue_size` tasks wait for a worker thread, tasks submitted
+    once this limit is reached are rejected instead of delaying the Web
+    responses. Errors raised by the tasks are reported by
+    :meth:`report_error`.
+
+    :param workers: The number of worker threads.
+    :param queue_size: The number of tasks waiting for a worker thread.
+    """
+
+    def __init__(self, workers=4, queue_size=1000):
+        self.closed = False
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            workers, thread_name_prefix='aurora-tasks')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._futures = set()
+
+        _pools.add(self)
+
+    def submit(self, task, *args, **kwargs) -> bool:
+        """ Schedule a call to `task` with the given arguments.
+
+        The task run in a copy of the current context (the Web request been
+        handled is available to the Web application components for
+        example).
+
+        :return: Whether the task was scheduled, `False` if it was rejected
+            because the pool is full or shut down.
+        """
+        if self.closed or not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+
+            sys.stderr.write('Background task %s rejected\n' %
+                             metrics.name(task))
+            return False
+
+        future = self._executor.submit(contextvars.copy_context().run,
+                                       self._run, task, args, kwargs)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+
+        return True
+
+    def _run(self, task, args, kwargs):
+        try:
+            task(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+
+            self.report_error(task, sys.exc_info())
+        else:
+            with self._lock:
+                self.completed += 1
+        finally:
+            self._slots.release()
+
+    def report_error(self, task, exc_info):
+        """ Report the error raised by a task.
+
+        The error is reported by the module :func:`report_error` function,
+        override to send them somewhere else.
+
+        :param task: The failed task.
+        :param exc_info: The exception information as returned by
+            :func:`sys.exc_info`.
+        """
+        report_error(task, exc_info)
+
+    def drain(self, timeout=None) -> bool:
+        """ Wait for the scheduled tasks to complete.
+
+        :param timeout: Maximum number of seconds to wait.
+        :return: Whether all tasks completed before the timeout.
+        """
+        done, not_done = concurrent.futures.wait(list(self._futures),
+                                                 timeout)
+        return not not_done
+
+    def shutdown(self, timeout=None) -> bool:
+        """ Stop accepting tasks and wait for the scheduled ones.
+
+        :param timeout: Maximum number of seconds to wait.
+        :return: Whether all tasks completed before the timeout.
+        """
+        self.closed = True
+        drained = self.drain(timeout)
+        self._executor.shutdown(wait=drained)
+
+        return drained
+
+
+def report_error(task, exc_info):
+    """ Report the error raised by a task writing its traceback to the
+    standard error.
+
+    :param task: The failed task.
+    :param exc_info: The exception information as returned by
+        :func:`sys.exc_info`.
+    """
+    sys.stderr.write('Background task %s failed\n' % metrics.name(task))
+    traceback.print_exception(*exc_info)
+
+
+def run(task, *args, **kwargs) -> bool:
+    """ Call `task` in place with the given arguments.
+
+    This is how scheduled tasks run when the Web application has no task
+    pool, errors are reported by :func:`report_error` instead of being
+    raised so the following tasks still run.
+
+    :return: Whether the task completed without errors.
+    """
+    try:
+        task(*args, **kwargs)
+    except Exception:
+        report_error(task, sys.exc_info())
+        return False
+
+    return True
+
+
+def drain(timeout=None) -> bool:
+    """ Wait for the tasks scheduled on every task pool of the process.
+
+    :param timeout: Maximum number of seconds to wait.
+    :return: Whether all tasks completed before the timeout.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    drained = True
+    for pool in list(_pools):
+        remaining = None if deadline is None else \
+            max(0, deadline - time.monotonic())
+        drained = pool.drain(remaining) and drained
+
+    return drained
@@ -80,6 +80,11 @@ class Assets:
         This function has been intentionally left public to allow caching
         static assets information for later automated tasks.
         """
+        try:
+            return self.__dict__['_index'][os.path.normpath(path_info)]
+        except KeyError:
+            pass
+
         for path in reversed(self._paths):
             file_name = ''.join((path, os.path.normpath(path_info)))
 
@@ -90,6 +95,21 @@ class Assets:
     # services provided by the component
     #
 
+    def warmup(self):
+        """ Index the static assets files found in the registered paths.
+
+        Indexed static assets are resolved without hitting the filesystem,
+        files added after the call are resolved as usual.
+        """
+        index = {}
+        for path in self._paths:
+            for root, dirs, files in os.walk(path):
+                for file_name in files:
+                    file_name = os.path.join(root, file_name)
+                    index[os.path.normpath(file_name[len(path):])] = file_name
+
+        self.__dict__['_index'] = index
+
     @property
     def rule_factory(self) -> mapping.Rule:
         """ Return an object used to route and assemble URIs for static assets.
@@ -97,6 +117,9 @@ class Assets:
 
         class Rule:
 
+            # matching depends on the filesystem state
+            cacheable = False
+
             def __init__(self, assets, base_uri=''):
                 self.assets = assets
                 self.base_uri = base_uri
@@ -126,10 +149,15 @@ class Assets:
 
     def handler(self, request: foundation.Request) -> foundation.Response:
         """ Handle Web requests by serving static assets.
+
+        The file is the Web response body (see
+        :class:`~aurora.webapp.foundation.FileIter`), it is sent without
+        entering Python by WSGI servers offering a ``wsgi.file_wrapper``
+        (like the Aurora :mod:`~aurora.webapp.server`).
         """
 
         # resolve absolute file path name
-        file_name = self._resolve_filename(request.GET['filename'])
+        file_name = self._resolve_filename(request.characteristics['filename'])
 
         response = request.response_factory()
 
@@ -140,11 +168,13 @@ class Assets:
 
         file = open(file_name, 'rb')
         fs = os.fstat(file.fileno())
-        response.content_length = str(fs[6])
+
+        # the file is sent by the WSGI server file wrapper if available
+        response.app_iter = foundation.FileIter(file)
+        response.content_length = fs.st_size
         response.last_modified = email_utils.formatdate(
             fs.st_mtime, usegmt=True
         )
-        response.body_file = file
 
         return response
 
@@ -0,0 +1,319 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import collections
+import functools
+import inspect
+import threading
+import time
+
+from aurora.webapp import foundation
+
+__all__ = ['ResponseCache']
+
+
+class _Entry:
+
+    __slots__ = ('status', 'headers', 'body', 'size', 'expires', 'handler')
+
+    def __init__(self, status, headers, body, expires, handler):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.size = len(body) + sum(
+            len(name) + len(value) for name, value in headers) + 256
+        self.expires = expires
+        self.handler = handler
+
+
+class _Recorder:
+    """ Record a streamed Web response body as it is sent.
+
+    The body is stored once it is completely sent unless it is larger than
+    `limit` bytes.
+    """
+
+    def __init__(self, app_iter, store, limit: int):
+        self.app_iter = app_iter
+        self.store = store
+        self.limit = limit
+
+    def __iter__(self):
+        chunks = []
+        size = 0
+        for chunk in self.app_iter:
+            if chunks is not None:
+                size += len(chunk)
+                if size <= self.limit:
+                    chunks.append(chunk)
+                else:
+                    chunks = None
+
+            yield chunk
+
+        if chunks is not None:
+            self.store(b''.join(chunks))
+
+    def close(self):
+        if hasattr(self.app_iter, 'close'):
+            self.app_iter.close()
+
+
+class ResponseCache:
+    """ Full-page Web response cache.
+
+    Complete Web responses (status, headers and body) are kept in memory
+    keyed on the Web request method, path, query string and the values of
+    the :attr:`vary` request headers. Entries expire after :attr:`ttl`
+    seconds and the least recently used ones are evicted once the cache
+    exceed :attr:`max_size` bytes.
+
+    In order to setup correctly this component you need to perform the
+    following steps:
+
+     - wrap the Web request handlers producing cacheable Web responses using
+       the :meth:`cached` service (a cache hit skip the Web request handler).
+     - register the :meth:`post_dispatch` service as a
+       :meth:`~aurora.webapp.infrastructure.Application.post_dispatch` event
+       listener after the listeners producing the final Web response (like
+       :meth:`.layout.Layout.post_dispatch`) and before the ones adding
+       client specific information (like
+       :meth:`.session.SessionProvider.post_dispatch`).
+
+    Streamed Web response bodies are recorded as they are sent and stored
+    once they are completely sent. Only successful ``GET`` and ``HEAD`` Web
+    responses are stored and those
+    setting cookies, marked as ``private`` or ``no-store`` or varying on
+    headers not listed in :attr:`vary` are never stored. Web request
+    handlers should call :meth:`invalidate` once the cached content change.
+    """
+
+    #
+    # stubs for component dependencies
+    #
+
+    ttl = 60  # seconds a Web response is kept
+
+    max_size = 64 * 1024 * 1024  # bytes used by the Web responses kept
+
+    vary = ()  # names of the request headers Web responses vary on
+
+    def get_request(self) -> foundation.Request:
+        """ Web request been handled by the application.
+
+        This service return the Web request currently been handled in the
+        calling thread or :mod:`asyncio` task.
+        """
+        raise NotImplementedError()
+
+    #
+    # component implementation
+    #
+
+    def __init__(self, get_request=None, ttl=None, max_size=None, vary=None):
+        """ Initialize the response cache component.
+
+        :param get_request: A
+            :func:`aurora.webapp.infrastructure.Application.get_request`
+            compliant service.
+        :param ttl: Seconds a Web response is kept.
+        :param max_size: Bytes used by the Web responses kept.
+        :param vary: Names of the request headers Web responses vary on.
+        """
+        if get_request:
+            self.get_request = get_request
+        if ttl is not None:
+            self.ttl = ttl
+        if max_size is not None:
+            self.max_size = max_size
+        if vary is not None:
+            self.vary = tuple(vary)
+
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+
+        self._generation = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._vary_keys = tuple(
+            'HTTP_' + name.upper().replace('-', '_') for name in self.vary)
+
+    def _key(self, request: foundation.Request) -> tuple:
+        environ = request.environ
+
+        return (environ['REQUEST_METHOD'], request.path,
+                environ.get('QUERY_STRING', '')) + \
+            tuple(environ.get(key) for key in self._vary_keys)
+
+    def _lookup(self, request: foundation.Request, handler) -> \
+            foundation.Response:
+        """ Return the cached Web response or mark the Web request for storing.
+        """
+        if request.method not in ('GET', 'HEAD'):
+            return None
+
+        key = self._key(request)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+
+                    return request.response_factory(
+                        status=entry.status, headerlist=list(entry.headers),
+                        body=entry.body)
+
+                del self._entries[key]
+                self.size -= entry.size
+
+            self.misses += 1
+
+        request.environ['aurora.cache'] = (key, handler)
+
+    def _storable(self, response: foundation.Response) -> bool:
+        if response.status_int != 200 or 'Set-Cookie' in response.headers:
+            return False
+
+        cache_control = response.cache_control
+        if cache_control.no_store or cache_control.private:
+            return False
+
+        vary = set(name.lower() for name in self.vary)
+        for name in response.vary or ():
+            if name == '*' or name.lower() not in vary:
+                return False
+
+        return True
+
+    def _store(self, key: tuple, entry: _Entry, generation: int):
+        if entry.size > self.max_size:
+            return
+
+        with self._lock:
+            # the entry was produced before an invalidation
+            if generation != self._generation:
+                return
+
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+
+            self._entries[key] = entry
+            self.size += entry.size
+
+            while self.size > self.max_size:
+                key, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+
+    #
+    # services provided by the component
+    #
+
+    def cached(self, handler: foundation.Handler) -> foundation.Handler:
+        """ Produce a Web request handler whose Web responses are cached.
+
+        Asynchronous handlers (coroutine functions) are supported too.
+
+        :param handler: The Web request handler.
+        :return: The caching Web request handler.
+        """
+        if inspect.iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def _handler(request):
+                response = self._lookup(request, _handler)
+                if response is None:
+                    response = await handler(request)
+
+                return response
+
+            return _handler
+
+        @functools.wraps(handler)
+        def _handler(request):
+            response = self._lookup(request, _handler)
+            if response is None:
+                response = handler(request)
+
+            return response
+
+        return _handler
+
+    def post_dispatch(self, response: foundation.Response):
+        """ Store the Web response of a Web request handled after a miss.
+
+        This service is intended to be registered as a
+        :meth:`aurora.webapp.infrastructure.Application.post_dispatch` event
+        listener.
+
+        :param response: The Web response object.
+        """
+        key, handler = self.get_request().environ.pop('aurora.cache',
+                                                      (None, None))
+        if key is None or not self._storable(response):
+            return
+
+        status = response.status
+        headers = tuple(response.headerlist)
+        generation = self._generation
+
+        def store(body):
+            self._store(key, _Entry(status, headers, body,
+                                    time.monotonic() + self.ttl, handler),
+                        generation)
+
+        if isinstance(response.app_iter, (list, tuple)):
+            store(response.body)
+        else:
+            response.app_iter = _Recorder(response.app_iter, store,
+                                          self.max_size)
+
+    def invalidate(self, path: str = None, handler: foundation.Handler = None):
+        """ Discard cached Web responses.
+
+        Without arguments every Web response is discarded.
+
+        :param path: Discard the Web responses for this Web request path.
+        :param handler: Discard the Web responses produced by this
+            :meth:`cached` Web request handler.
+        """
+        with self._lock:
+            self._generation += 1
+
+            if path is None and handler is None:
+                self._entries.clear()
+                self.size = 0
+                return
+
+            for key, entry in list(self._entries.items()):
+                if (path is None or key[1] == path) and \
+                        (handler is None or entry.handler is handler):
+                    del self._entries[key]
+                    self.size -= entry.size
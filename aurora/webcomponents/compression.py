@@ -0,0 +1,239 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import zlib
+
+from aurora.webapp import foundation
+
+__all__ = ['Compression']
+
+
+class _CompressedIter:
+    """ Compress a streamed Web response body chunk by chunk.
+
+    The compressed content is flushed once `flush_size` bytes of the body
+    are compressed so the client browser receive the content as it is
+    produced, flushing every (maybe small) chunk ruin the compression.
+    """
+
+    def __init__(self, app_iter, compressor, flush_size: int):
+        self.app_iter = app_iter
+        self.compressor = compressor
+        self.flush_size = flush_size
+
+    def __iter__(self):
+        compress = self.compressor.compress
+        flush = self.compressor.flush
+        pending = 0
+
+        for chunk in self.app_iter:
+            if not chunk:
+                continue
+
+            data = compress(chunk)
+            pending += len(chunk)
+            if pending >= self.flush_size:
+                data += flush(zlib.Z_SYNC_FLUSH)
+                pending = 0
+
+            if data:
+                yield data
+
+        yield flush()
+
+    def close(self):
+        if hasattr(self.app_iter, 'close'):
+            self.app_iter.close()
+
+
+class Compression:
+    """ Web response compression support.
+
+    This component compress Web response bodies using the ``gzip`` or
+    ``deflate`` content coding negotiated with the client browser through
+    the ``Accept-Encoding`` header. Buffered bodies are compressed at once if
+    they are larger than :attr:`min_size`, streamed bodies are compressed
+    chunk by chunk as they are sent and flushed every :attr:`flush_size`
+    bytes. Only the :attr:`content_types` are compressed, already compressed
+    content (like images and archives served by the :class:`.assets.Assets`
+    component) is left as is. Bodies produced from files
+    (:class:`~aurora.webapp.foundation.FileIter` objects, like the static
+    assets) are left as is too, they are sent by the WSGI server
+    ``wsgi.file_wrapper``.
+
+    The entity tag of compressed Web responses is made weak because the
+    compressed bytes differ from the identity ones.
+
+    In order to setup correctly this component you need to perform the
+    following steps:
+
+     - register the :meth:`post_dispatch` service as the last
+       :meth:`~aurora.webapp.infrastructure.Application.post_dispatch` event
+       listener modifying the Web response body.
+    """
+
+    #
+    # stubs for component dependencies
+    #
+
+    level = 6  # zlib compression level
+
+    min_size = 1024  # minimum buffered body size compressed
+
+    flush_size = 8192  # streamed body size compressed between flushes
+
+    content_types = (  # compressed content type prefixes
+        'text/',
+        'application/javascript',
+        'application/json',
+        'application/xml',
+        'application/xhtml+xml',
+        'application/rss+xml',
+        'application/atom+xml',
+        'image/svg+xml',
+    )
+
+    def get_request(self) -> foundation.Request:
+        """ Web request been handled by the application.
+
+        This service return the Web request currently been handled in the
+        calling thread or :mod:`asyncio` task.
+        """
+        raise NotImplementedError()
+
+    #
+    # component implementation
+    #
+
+    def __init__(self, get_request=None, level=None, min_size=None,
+                 flush_size=None):
+        """ Initialize the compression component.
+
+        :param get_request: A
+            :func:`aurora.webapp.infrastructure.Application.get_request`
+            compliant service.
+        :param level: The zlib compression level.
+        :param min_size: Minimum buffered body size compressed.
+        :param flush_size: Streamed body size compressed between flushes.
+        """
+        if get_request:
+            self.get_request = get_request
+        if level is not None:
+            self.level = level
+        if min_size is not None:
+            self.min_size = min_size
+        if flush_size is not None:
+            self.flush_size = flush_size
+
+    @staticmethod
+    def _negotiate(accept_encoding: str) -> str:
+        """ Select the content coding from an ``Accept-Encoding`` header.
+
+        :return: ``gzip``, ``deflate`` or `None` for no compression.
+        """
+        qualities = {}
+        for coding in accept_encoding.split(','):
+            coding, _, parameters = coding.partition(';')
+            quality = 1.0
+            name, _, value = parameters.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+            qualities[coding.strip().lower()] = quality
+
+        default = qualities.get('*', 0.0)
+        best = max(('gzip', 'deflate'),
+                   key=lambda coding: qualities.get(coding, default))
+
+        if qualities.get(best, default) > 0:
+            return best
+
+    def _compressor(self, coding: str):
+        # gzip wrapper for gzip, zlib wrapper for HTTP deflate
+        return zlib.compressobj(self.level, zlib.DEFLATED,
+                                31 if coding == 'gzip' else 15)
+
+    #
+    # services provided by the component
+    #
+
+    def post_dispatch(self, response: foundation.Response):
+        """ Compress the Web response body if the client browser accept it.
+
+        This service is intended to be registered as a
+        :meth:`aurora.webapp.infrastructure.Application.post_dispatch` event
+        listener.
+
+        :param response: The Web response object.
+        """
+        if response.status_int < 200 or response.status_int in (204, 304) \
+                or 'Content-Encoding' in response.headers:
+            return
+
+        content_type = response.content_type or ''
+        if not content_type.startswith(self.content_types):
+            return
+
+        app_iter = response.app_iter
+        if isinstance(app_iter, foundation.FileIter):
+            return
+
+        buffered = isinstance(app_iter, (list, tuple))
+        if buffered and sum(map(len, app_iter)) < self.min_size:
+            return
+
+        # the representation depends on Accept-Encoding from now on
+        vary = response.vary or ()
+        if 'accept-encoding' not in (name.lower() for name in vary):
+            response.vary = tuple(vary) + ('Accept-Encoding', )
+
+        request = self.get_request()
+        coding = self._negotiate(
+            request.environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None or request.method == 'HEAD':
+            return
+
+        compressor = self._compressor(coding)
+        if buffered:
+            response.body = b''.join(
+                [compressor.compress(chunk) for chunk in app_iter] +
+                [compressor.flush()])
+        else:
+            response.app_iter = _CompressedIter(app_iter, compressor,
+                                                self.flush_size)
+            response.content_length = None
+
+        response.content_encoding = coding
+
+        etag = response.headers.get('ETag')
+        if etag is not None and not etag.startswith('W/'):
+            response.headers['ETag'] = 'W/' + etag
@@ -0,0 +1,207 @@
+# Copyright (c) 2011, Yeiniel Suarez Sosa.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright notice,
+#      this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Yeiniel Suarez Sosa. nor the names of its
+#      contributors may be used to endorse or promote products derived from
+#      this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import hashlib
+
+from aurora.webapp import foundation
+
+__all__ = ['ConditionalGet']
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+class ConditionalGet:
+    """ Conditional ``GET`` Web requests support.
+
+    This component answer ``GET`` and ``HEAD`` Web requests carrying a
+    ``If-None-Match`` or ``If-Modified-Since`` header with a
+    ``304 Not Modified`` Web response when the content is the one the
+    client browser already has.
+
+    Web responses get an ``ETag`` header computed from its body (if it is
+    buffered), or Web request handlers can provide a cheap validator (like
+    the modification time of the content) using the :meth:`validate`
+    service before producing the Web response, skipping its rendering if
+    the client browser content is fresh.
+
+    In order to setup correctly this component you need to perform the
+    following steps:
+
+     - register the :meth:`post_dispatch` service as a
+       :meth:`~aurora.webapp.infrastructure.Application.post_dispatch` event
+       listener after the listeners producing the final Web response body
+       (like :meth:`.layout.Layout.post_dispatch`). If the
+       :class:`.cache.ResponseCache` component is used register it before
+       the cache listener, the cached Web responses keep the validators.
+    """
+
+    #
+    # stubs for component dependencies
+    #
+
+    weak = False  # produce weak entity tags for computed ETag headers
+
+    def get_request(self) -> foundation.Request:
+        """ Web request been handled by the application.
+
+        This service return the Web request currently been handled in the
+        calling thread or :mod:`asyncio` task.
+        """
+        raise NotImplementedError()
+
+    #
+    # component implementation
+    #
+
+    def __init__(self, get_request=None, weak=None):
+        """ Initialize the conditional GET component.
+
+        :param get_request: A
+            :func:`aurora.webapp.infrastructure.Application.get_request`
+            compliant service.
+        :param weak: Produce weak entity tags for computed ETag headers.
+        """
+        if get_request:
+            self.get_request = get_request
+        if weak is not None:
+            self.weak = weak
+
+    def _not_modified(self, request: foundation.Request,
+                      response: foundation.Response) -> bool:
+        """ Return if the client browser content is fresh.
+        """
+        if request.method not in ('GET', 'HEAD'):
+            return False
+
+        if_none_match = request.environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            etag = response.headers.get('ETag')
+            if if_none_match.strip() == '*':
+                return True
+            if etag is None:
+                return False
+
+            # weak comparison, as required for If-None-Match
+            return _opaque_tag(etag) in map(_opaque_tag,
+                                            if_none_match.split(','))
+
+        if_modified_since = request.if_modified_since
+        last_modified = response.last_modified
+        if if_modified_since is None or last_modified is None:
+            return False
+
+        return last_modified <= if_modified_since
+
+    def _make_not_modified(self, response: foundation.Response):
+        response.status_int = 304
+        if hasattr(response.app_iter, 'close'):
+            response.app_iter.close()
+        response.app_iter = []
+        for name in ('Content-Type', 'Content-Length'):
+            response.headers.pop(name, None)
+
+    def _compute_etag(self, response: foundation.Response) -> str:
+        """ Produce the entity tag of a buffered Web response body.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for chunk in response.app_iter:
+            digest.update(chunk)
+
+        etag = '"%s"' % digest.hexdigest()
+
+        return 'W/' + etag if self.weak else etag
+
+    #
+    # services provided by the component
+    #
+
+    def validate(self, request: foundation.Request, etag: str = None,
+                 last_modified=None, weak=True) -> foundation.Response:
+        """ Answer the Web request from a validator known before rendering.
+
+        Web request handlers call this service once they know the validator
+        of the content they are about to produce and return the produced
+        Web response as is if there is one. Otherwise the validators are
+        added to the Web response produced later.
+
+        :param request: The Web request object.
+        :param etag: The content entity tag without quotes, like a version
+            or a digest.
+        :param last_modified: The content modification time as a
+            :class:`datetime.datetime` object (UTC if naive) or timestamp.
+        :param weak: Whether `etag` is a weak entity tag, the content change
+            only when the validator change but its bytes may not.
+        :return: A ``304 Not Modified`` Web response if the client browser
+            content is fresh, `None` otherwise.
+        """
+        response = request.response_factory(status=304)
+        if etag is not None:
+            response.headers['ETag'] = ('W/"%s"' if weak else '"%s"') % etag
+        if last_modified is not None:
+            response.last_modified = last_modified
+
+        if self._not_modified(request, response):
+            self._make_not_modified(response)
+            return response
+
+        request.environ['aurora.conditional'] = [
+            (name, value) for name, value in response.headerlist
+            if name in ('ETag', 'Last-Modified')]
+
+    def post_dispatch(self, response: foundation.Response):
+        """ Add validators to the Web response and answer conditional Web
+        requests.
+
+        This service is intended to be registered as a
+        :meth:`aurora.webapp.infrastructure.Application.post_dispatch` event
+        listener.
+
+        :param response: The Web response object.
+        """
+        request = self.get_request()
+        validators = request.environ.pop('aurora.conditional', ())
+
+        if request.method not in ('GET', 'HEAD') or \
+                response.status_int != 200:
+            return
+
+        for name, value in validators:
+            if name not in response.headers:
+                response.headers[name] = value
+
+        # only buffered bodies, streamed ones would be consumed
+        if 'ETag' not in response.headers and \
+                isinstance(response.app_iter, (list, tuple)):
+            response.headers['ETag'] = self._compute_etag(response)
+
+        if self._not_modified(request, response):
+            self._make_not_modified(response)
@@ -28,14 +28,27 @@
 # EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import functools
+import inspect
+import uuid
 
 __all__ = ['partial' , 'Layout']
 
 
 def partial(handler):
     """ Mark the handler as a view partial (set response Content-Type).
+
+    Asynchronous handlers (coroutine functions) are supported too.
     """
 
+    if inspect.iscoroutinefunction(handler):
+        @functools.wraps(handler)
+        async def _handler(*args, **kwargs):
+            response = await handler(*args, **kwargs)
+            response.content_type = 'x-application/partial'
+            return response
+
+        return _handler
+
     @functools.wraps(handler)
     def _handler(*args, **kwargs):
         response = handler(*args, **kwargs)
@@ -44,6 +57,25 @@ def partial(handler):
 
     return _handler
 
+class _Wrapped:
+    """ Streamed body between a layout head and tail.
+    """
+
+    def __init__(self, head: bytes, app_iter, tail: bytes):
+        self.head = head
+        self.app_iter = app_iter
+        self.tail = tail
+
+    def __iter__(self):
+        yield self.head
+        yield from self.app_iter
+        yield self.tail
+
+    def close(self):
+        if hasattr(self.app_iter, 'close'):
+            self.app_iter.close()
+
+
 class Layout:
     """ The layout component
 
@@ -96,11 +128,41 @@ class Layout:
         :func:`aurora.webapp.infrastructure.Application.after_handle` event
         listener and this behaviour is only activated if the response content
         type is the `x-application/partial` string.
+
+        Streamed response bodies are wrapped without reading them, the
+        layout template is rendered around a placeholder content and the
+        layout parts before and after it are sent around the streamed body.
         :param response: The Web response object.
         """
         if 'x-application/partial' in response.content_type and \
                 response.status_int in self.status_codes:
-            response.text = self.render(self.template_name,
-                                        content=response.text)
-
+            charset = response.charset or 'UTF-8'
+
+            if isinstance(response.app_iter, (list, tuple)):
+                content = self.render(
+                    self.template_name,
+                    content=response.body.decode(charset))
+
+                response.content_type = self.content_type
+                response.charset = charset
+                response.body = content.encode(charset)
+                return
+
+            placeholder = uuid.uuid4().hex
+            head, found, tail = self.render(
+                self.template_name, content=placeholder).partition(
+                placeholder)
+
+            if not found:
+                # the layout doesn't show the content
+                head, tail = head.encode(charset), b''
+                if hasattr(response.app_iter, 'close'):
+                    response.app_iter.close()
+                response.app_iter = []
+            else:
+                head, tail = head.encode(charset), tail.encode(charset)
+
+            response.app_iter = _Wrapped(head, response.app_iter, tail)
+            response.content_length = None
             response.content_type = self.content_type
+            response.charset = charset
@@ -82,17 +82,16 @@ class SessionProvider:
         :return: A mapping.
         """
         try:
-            return self.__cache
-        except AttributeError:
-            self.__cache = {}
-
-            return self.__cache
+            return self.__dict__['_SessionProvider__cache']
+        except KeyError:
+            # keep the first cache created if it is created concurrently
+            return self.__dict__.setdefault('_SessionProvider__cache', {})
 
     def get_request(self) -> foundation.Request:
         """ Web request been handled by the application.
 
-        The Web application can handle one Web request at a time. This service
-        return the Web request currently been handled.
+        This service return the Web request currently been handled in the
+        calling thread or :mod:`asyncio` task.
         """
         raise NotImplementedError()
 
@@ -125,9 +124,10 @@ class SessionProvider:
             self.secret.encode(), id.encode(), hashlib.sha1).hexdigest()[:8]
 
     def get_session_info(self, request: foundation.Request) -> (str, str):
-        if hasattr(request, '_session_id'):
-            id = request._session_id
-            hash = request._session_hash
+        # kept in the WSGI environment, Web request objects may use slots
+        info = request.environ.get('aurora.session')
+        if info is not None:
+            id, hash = info
         else:
             cn = self.cookie_name
             if cn in request.cookies and \
@@ -139,8 +139,7 @@ class SessionProvider:
                 id = self.generate_id()
                 hash = self.make_hash(id)
 
-            request._session_id = id
-            request._session_hash = hash
+            request.environ['aurora.session'] = id, hash
 
         return id, hash
 
@@ -177,8 +176,8 @@ class SessionProvider:
         if id in self.get_cache() and len(self.get_cache()[id]) > 0:
             response.set_cookie(self.cookie_name, ''.join((id, hash)),
                     self.max_age, request.script_name)
-        elif id in self.get_cache():
-            del self.get_cache()[id]
+        else:
+            self.get_cache().pop(id, None)
 
 
     def post_dispatch(self, response: foundation.Response):
@@ -46,11 +46,21 @@ class Views(views.Views):
 
     The component add a ``escape`` default content item designed to escape all
     content that represent a XSS attack vulnerability.
+
+    If :attr:`streaming` is set the Web responses produced by
+    :meth:`render2response` have a body streamed as the template is
+    rendered (see :meth:`aurora.views.Views.stream`), the client browser
+    start receiving the content before the rendering finish.
     """
 
-    def __init__(self):
+    streaming = False  # produce Web responses with streamed bodies
+
+    def __init__(self, streaming=None):
         self.add_default('escape', html.escape)
 
+        if streaming is not None:
+            self.streaming = streaming
+
     def render2response(self, request: foundation.Request, template_name: str,
                         **context) -> foundation.Response:
         """ Render a template into a :class:`~aurora.webapp.foundation.Response` object with context.
@@ -67,13 +77,21 @@ class Views(views.Views):
         :return: The rendered :class:`~aurora.webapp.foundation.Response`
             object.
         """
-        response = request.response_factory(
-            text=self.render(template_name, request=request, **context))
+        response = request.response_factory()
 
         response.content_type, _ = mimetypes.guess_type(template_name)
         if not response.content_type:
             response.content_type = self.DEFAULT_MIME_TYPE
 
+        charset = response.charset or 'UTF-8'
+        if self.streaming:
+            chunks = self.stream(template_name, request=request, **context)
+            response.app_iter = (chunk.encode(charset) for chunk in chunks)
+            response.content_length = None
+        else:
+            response.body = self.render(
+                template_name, request=request, **context).encode(charset)
+
         return response
 
     def handler4template(self, template_name: str, **context) -> foundation.Handler:
@@ -62,7 +62,7 @@ class Application(webapp.Application):
 
     def show_post(self, request: foundation.Request) -> foundation.Response:
         """ Show a post. """
-        post_id = request.params['id']
+        post_id = request.characteristics['id']
 
         orm_session = orm.sessionmaker(bind=self.db.get_engine())()
 
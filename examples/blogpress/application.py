@@ -30,7 +30,8 @@
 import os
 
 from aurora import di, event, webapp
-from aurora.webcomponents import assets, layout, views
+from aurora.webcomponents import assets, cache, compression, conditional, \
+    layout, views
 
 from components import blog, engine_provider
 
@@ -61,23 +62,33 @@ class Application(webapp.Application):
     assets = di.create_descriptor(assets.Assets)
 
     blog = di.create_descriptor(blog.Blog, 'db.get_engine',
-        'views.render2response', 'url_for')
+        'views.render2response', 'url_for', 'cache.cached', 'cache.invalidate',
+        'conditional.validate')
+
+    cache = di.create_descriptor(cache.ResponseCache, 'get_request')
+
+    compression = di.create_descriptor(compression.Compression,
+        'get_request')
+
+    conditional = di.create_descriptor(conditional.ConditionalGet,
+        'get_request')
 
     db = di.create_descriptor(engine_provider.EngineProvider)
 
     layout = di.create_descriptor(layout.Layout, 'views.render')
 
     post_dispatch = di.create_descriptor(event.Event,
-        di.list(['layout.post_dispatch']))
+        di.list(['layout.post_dispatch', 'conditional.post_dispatch',
+            'cache.post_dispatch', 'compression.post_dispatch']))
 
-    views = di.create_descriptor(views.Views)
+    # pages start arriving at the client browser before rendering finish
+    views = di.create_descriptor(views.Views, streaming=True)
 
 if __name__ == '__main__':
-    from wsgiref import simple_server
-    from aurora.webapp import foundation
+    from aurora.webapp import foundation, server
 
-    wsgi_app = foundation.wsgi(Application())
-    httpd = simple_server.make_server('', 8008, wsgi_app)
+    application = Application()
+    application.freeze()
 
     print("Serving on port 8008...")
-    httpd.serve_forever()
+    server.serve(foundation.wsgi(application), port=8008)
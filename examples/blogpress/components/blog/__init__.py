@@ -60,6 +60,14 @@ class Blog:
      - A :meth:`aurora.webapp.infrastructure.Application.url_for` compliant
        service used to create suitable URLs for known Web request handlers.
 
+     - Optionally, :meth:`aurora.webcomponents.cache.ResponseCache.cached`
+       and :meth:`aurora.webcomponents.cache.ResponseCache.invalidate`
+       compliant services used to cache the posts listing and the posts.
+
+     - Optionally, a
+       :meth:`aurora.webcomponents.conditional.ConditionalGet.validate`
+       compliant service used to skip rendering posts client browsers have.
+
     This component can be simply installed into your Web application by
     calling the two services (:meth:`setup_mapping` and :meth:`setup_views`)
     used to setup the component.
@@ -72,11 +80,23 @@ class Blog:
 
     def __init__(self, get_engine: engine_provider.EngineProvider.get_engine,
                  render2response: views.Views.render2response,
-                 url_for: infrastructure.Application.url_for):
+                 url_for: infrastructure.Application.url_for,
+                 cached=None, invalidate_cache=None, validate=None):
         self.get_engine = get_engine
         self.render2response = render2response
         self.url_for = url_for
 
+        if cached:
+            self.cached = cached
+        if invalidate_cache:
+            self.invalidate_cache = invalidate_cache
+        if validate:
+            self.validate = validate
+
+        # read-heavy Web request handlers
+        self.list_posts = self.cached(self.list_posts)
+        self.show_post = self.cached(self.show_post)
+
         # create the model tables if they don't exist
         models.Model.metadata.create_all(self.get_engine())
 
@@ -117,6 +137,29 @@ class Blog:
         """
         raise NotImplementedError()
 
+    def cached(self, handler: foundation.Handler) -> foundation.Handler:
+        """ Produce a Web request handler whose Web responses are cached.
+
+        :param handler: The Web request handler.
+        :return: The caching Web request handler.
+        """
+        return handler
+
+    def invalidate_cache(self):
+        """ Discard the cached Web responses.
+        """
+
+    def validate(self, request: foundation.Request, etag: str = None,
+                 last_modified=None) -> foundation.Response:
+        """ Answer the Web request from a content validator.
+
+        :param request: A Web request object.
+        :param etag: The content entity tag.
+        :param last_modified: The content modification time.
+        :return: A ``304 Not Modified`` Web response if the client browser
+            content is fresh, `None` otherwise.
+        """
+
     def get_profile_id(self, request: foundation.Request) -> str:
         """ Return the profile ID for the user related to the Web request.
         :param request: A Web request object.
@@ -153,8 +196,8 @@ class Blog:
     def show_post(self, request: foundation.Request) -> foundation.Response:
         """ Present a Blog post on the client browser.
 
-        The value of the element from the `params` request mapping with
-        keyword `id` is used as table row id if present.
+        The value of the `id` Web request path characteristic is used as
+        table row id.
 
         :param request: The
             :class:`Web request <aurora.webapp.foundation.Request>` object.
@@ -162,12 +205,17 @@ class Blog:
             object.
         """
 
-        id = request.params['id']
+        id = request.characteristics['id']
 
         orm_session = orm.sessionmaker(bind=self.get_engine())()
 
         post = orm_session.query(models.Post).filter_by(id=id).one()
 
+        # skip rendering if the client browser has the post
+        response = self.validate(request, last_modified=post.modified)
+        if response is not None:
+            return response
+
         return self.render2response(request, 'blog/show.html', post=post,
             blog=self, url_for=self.url_for)
 
@@ -199,6 +247,9 @@ class Blog:
             orm_session.add(post)
             orm_session.commit()
 
+            # the posts listing changed
+            self.invalidate_cache()
+
             # redirect to the post page
             resp = request.response_factory()
             resp.status_int = 302